@@ -0,0 +1,191 @@
+"""Microbenchmark of the TextFormatter transforms.
+
+Compares the current transforms (compiled pipelines and the single-pass
+``ThaiphonEngine``) against the per-call ``replace_multi`` chain they
+replaced, on pronunciations and classifiers from synthetic rows, and checks
+that both give the same output. ``transliterate`` is format_tones plus
+format_pronunciation_search, as ``_process_row`` uses them.
+
+A second table times each ``RegexPatterns`` group on its own: one
+``re.sub`` per rule against the ``RegexPipeline`` steps, which run literal
+rules through ``str.replace`` or a merged character class or alternation.
+
+A third table compares per-cell calls with the batch entry points on whole
+columns, as the columnar processing mode uses them.
+
+Usage:
+  python -m benchmarks.bench_formatter
+  python -m benchmarks.bench_formatter --rows 50000 --repeat 5
+"""
+
+import argparse
+import dataclasses
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from src.config import RegexPatterns
+from src.text_formatter import RegexPipeline, TextFormatter
+
+from benchmarks.synthetic import generate_rows
+
+
+def legacy_transforms(formatter: TextFormatter) -> Dict[str, Callable[[str, bool], str]]:
+    """The transforms as chains of replace_multi calls over the pattern dicts."""
+    p = formatter.patterns
+    multi = formatter.replace_multi
+
+    def chain(*groups):
+        def apply(text):
+            for group in groups:
+                text = multi(text, group)
+            return text
+        return apply
+
+    tones = chain(p.default, p.remove_starting_brackets, p.pron, p.pron2)
+    paiboon = chain(p.type_friendly_1, p.to_paiboon)
+    search = chain(p.remove_brackets, p.type_friendly_1, p.type_friendly_2)
+    search_paiboon = chain(p.remove_brackets, p.type_friendly_2)
+
+    def format_classifier(text, pb):
+        text = tones(multi(text, p.classifier))
+        return paiboon(text) if pb else text
+
+    def transliterate(text, pb):
+        pron = paiboon(tones(text)) if pb else tones(text)
+        return pron, search_paiboon(pron) if pb else search(pron)
+
+    return {
+        'format_tones': lambda text, pb: paiboon(tones(text)) if pb else tones(text),
+        'format_classifier': format_classifier,
+        'format_pronunciation_search': lambda text, pb: search_paiboon(text) if pb else search(text),
+        'format_final_pronunciation': lambda text, pb: text if pb else multi(text, p.final_pron),
+        'transliterate': transliterate,
+    }
+
+
+def compiled_transforms(formatter: TextFormatter) -> Dict[str, Callable[[str, bool], str]]:
+    return {
+        'format_tones': formatter.format_tones,
+        'format_classifier': formatter.format_classifier,
+        'format_pronunciation_search': formatter.format_pronunciation_search,
+        'format_final_pronunciation': formatter.format_final_pronunciation,
+        'transliterate': lambda text, pb: _forms(formatter.transliterate(text), pb),
+    }
+
+
+def _forms(pron, paiboon: bool) -> Tuple[str, str]:
+    return pron.tones(paiboon), pron.search(paiboon)
+
+
+def group_transforms(patterns: RegexPatterns) -> Dict[str, Tuple[Callable[[str], str], RegexPipeline]]:
+    """Per RegexPatterns group: one compiled re.sub per rule, and the group's RegexPipeline."""
+    groups = {}
+    for field in dataclasses.fields(patterns):
+        group = getattr(patterns, field.name)
+        rules = [(re.compile(pattern), replacement) for pattern, replacement in group.items() if pattern]
+
+        def regex_only(text, rules=rules):
+            for pattern, replacement in rules:
+                text = pattern.sub(replacement, text)
+            return text
+
+        groups[field.name] = (regex_only, RegexPipeline.compile(group))
+    return groups
+
+
+def sample_inputs(rows: int, seed: int) -> Dict[str, List[str]]:
+    """Pronunciations and classifier parts as the processor passes them in."""
+    formatter = TextFormatter(RegexPatterns())
+    prons, classifiers = [], []
+    for row in generate_rows(rows, seed, header=False):
+        prons.append(row[2].lower())
+        if row[10]:
+            classifiers.extend(part.strip() for part in row[10].split(";") if part.strip())
+    tones = [formatter.format_tones(text, True) for text in prons]
+    return {
+        'format_tones': prons,
+        'format_classifier': classifiers,
+        'format_pronunciation_search': tones,
+        'format_final_pronunciation': [formatter.format_tones(text, False) for text in prons],
+        'transliterate': prons,
+    }
+
+
+def time_transform(transform: Callable[[str, bool], str], inputs: List[str], paiboon: bool,
+                   repeat: int) -> Tuple[float, List[str]]:
+    """Best of ``repeat`` runs over all inputs, plus the outputs of the last run."""
+    best = float('inf')
+    outputs: List[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [transform(text, paiboon) for text in inputs]
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+def main() -> int:
+    """Run the formatter microbenchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the TextFormatter transforms")
+    parser.add_argument('--rows', type=int, default=20000, help='Synthetic rows to take inputs from')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per transform (best time is reported)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic rows')
+    args = parser.parse_args()
+
+    formatter = TextFormatter(RegexPatterns())
+    inputs = sample_inputs(args.rows, args.seed)
+    legacy = legacy_transforms(formatter)
+    compiled = compiled_transforms(formatter)
+
+    mismatches = 0
+    print(f"{'transform':30s} {'paiboon':>7s} {'calls':>7s} {'legacy':>9s} {'compiled':>9s} {'speedup':>8s}")
+    for name, texts in inputs.items():
+        for paiboon in (True, False):
+            legacy_seconds, expected = time_transform(legacy[name], texts, paiboon, args.repeat)
+            compiled_seconds, outputs = time_transform(compiled[name], texts, paiboon, args.repeat)
+            if outputs != expected:
+                mismatches += 1
+                print(f"Warning: {name} (paiboon={paiboon}) output differs from the replace_multi chain")
+            speedup = legacy_seconds / compiled_seconds if compiled_seconds else 0.0
+            print(f"{name:30s} {str(paiboon):>7s} {len(texts):7d} {legacy_seconds:8.3f}s "
+                  f"{compiled_seconds:8.3f}s {speedup:7.2f}x")
+
+    all_texts = [text for texts in inputs.values() for text in texts]
+    print(f"\n{'group':30s} {'rules':>7s} {'steps':>7s} {'re.sub':>9s} {'pipeline':>9s} {'speedup':>8s}")
+    for name, (regex_only, pipeline) in group_transforms(formatter.patterns).items():
+        regex_seconds, expected = time_transform(lambda text, _: regex_only(text), all_texts, False, args.repeat)
+        pipeline_seconds, outputs = time_transform(lambda text, _: pipeline(text), all_texts, False, args.repeat)
+        if outputs != expected:
+            mismatches += 1
+            print(f"Warning: {name} pipeline output differs from the re.sub chain")
+        speedup = regex_seconds / pipeline_seconds if pipeline_seconds else 0.0
+        print(f"{name:30s} {len(pipeline.rules):7d} {len(pipeline):7d} {regex_seconds:8.3f}s "
+              f"{pipeline_seconds:8.3f}s {speedup:7.2f}x")
+
+    print(f"\n{'batch':36s} {'cells':>7s} {'unique':>7s} {'per-cell':>9s} {'batch':>9s} {'speedup':>8s}")
+    columns = {
+        'transliterate_batch': (inputs['transliterate'], lambda text, _: formatter.transliterate(text),
+                                lambda texts, _: formatter.transliterate_batch(texts)),
+        'format_tones_batch': (inputs['format_tones'], formatter.format_tones, formatter.format_tones_batch),
+        'split_and_format_classifiers_batch': (inputs['format_classifier'], formatter.split_and_format_classifiers,
+                                               formatter.split_and_format_classifiers_batch),
+    }
+    for name, (texts, per_cell, batch) in columns.items():
+        per_cell_seconds, expected = time_transform(per_cell, texts, True, args.repeat)
+        batch_seconds = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            outputs = batch(texts, True)
+            batch_seconds = min(batch_seconds, time.perf_counter() - start)
+        if outputs != expected:
+            mismatches += 1
+            print(f"Warning: {name} output differs from per-cell calls")
+        speedup = per_cell_seconds / batch_seconds if batch_seconds else 0.0
+        print(f"{name:36s} {len(texts):7d} {len(set(texts)):7d} {per_cell_seconds:8.3f}s "
+              f"{batch_seconds:8.3f}s {speedup:7.2f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
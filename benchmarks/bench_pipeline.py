@@ -0,0 +1,163 @@
+"""Time the processing stages on synthetic data of increasing size.
+
+Each size is timed per stage: the ``TextFormatter`` transforms on the
+pronunciation and classifier columns, ``_process_row``, ``_write_output_files``
+and ``StardictBuilder`` conversion and zip (with ``--stardict-backend
+pyglossary`` only when pyglossary is installed).
+Rows come from ``benchmarks.synthetic`` and are generated in chunks outside
+the timed sections. The report ends with the scaling exponent of each stage
+(slope of log time over log rows; 1.0 is linear).
+
+Usage:
+  python -m benchmarks.bench_pipeline
+  python -m benchmarks.bench_pipeline --sizes 1000 10000 100000 1000000 --json scaling.json
+"""
+
+import argparse
+import json
+import math
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.config import Config
+from src.dictionary_processor import DictionaryProcessor
+from src.stardict_builder import BACKENDS, DEFAULT_BACKEND, StardictBuilder
+
+from benchmarks.synthetic import generate_rows
+
+CHUNK_SIZE = 10000
+STAGES = ("formatter", "process_row", "write", "stardict", "zip")
+
+
+def _chunks(rows: Iterator[Tuple], size: int) -> Iterator[List[Tuple]]:
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def time_stages(row_count: int, seed: int, work_dir: Path, stardict: Optional[str]) -> Dict[str, float]:
+    """Run every stage once on ``row_count`` synthetic rows, return seconds per stage.
+
+    ``stardict`` is the backend of the stardict and zip stages, or None to skip them.
+    """
+    config = Config()
+    config.dictionary.output_folder = work_dir / "txt"
+    config.dictionary.use_cache = False
+    config.dictionary.debug_test_1000_rows = False
+    config.dictionary.output_folder.mkdir(parents=True, exist_ok=True)
+    processor = DictionaryProcessor(config)
+    formatter = processor.formatter
+    paiboon = config.dictionary.paiboon
+    maps = processor._create_aggregation_maps(None)
+    timings: Dict[str, float] = defaultdict(float)
+
+    for chunk in _chunks(generate_rows(row_count, seed, header=False), CHUNK_SIZE):
+        start = time.perf_counter()
+        for row in chunk:
+            pron = formatter.format_tones(row[2].lower(), paiboon)
+            formatter.format_pronunciation_search(pron, paiboon)
+            formatter.format_final_pronunciation(pron, paiboon)
+            if row[10]:
+                formatter.split_and_format_classifiers(row[10], paiboon)
+        timings["formatter"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for row in chunk:
+            processor._process_row(row, *maps)
+        timings["process_row"] += time.perf_counter() - start
+
+    files = processor._open_output_files()
+    start = time.perf_counter()
+    try:
+        processor._write_output_files(files, *maps)
+    finally:
+        for f in files.values():
+            f.close()
+    timings["write"] = time.perf_counter() - start
+
+    if stardict:
+        builder = StardictBuilder(config.dictionary.output_folder, work_dir / "stardict", stardict)
+        start = time.perf_counter()
+        builder.convert_to_stardict()
+        timings["stardict"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        builder.create_zip_packages()
+        timings["zip"] = time.perf_counter() - start
+
+    return dict(timings)
+
+
+def scaling_exponent(points: List[Tuple[int, float]]) -> Optional[float]:
+    """Least-squares slope of log(seconds) over log(rows)."""
+    points = [(rows, seconds) for rows, seconds in points if seconds > 0]
+    if len(points) < 2:
+        return None
+    xs = [math.log(rows) for rows, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    denominator = sum((x - x_mean) ** 2 for x in xs)
+    if not denominator:
+        return None
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / denominator
+
+
+def main() -> int:
+    """Run the pipeline benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the processing stages on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Row counts to benchmark (default: 1000 10000 100000)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per size (best time per stage is reported)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic rows')
+    parser.add_argument('--no-stardict', action='store_true', help='Skip the stardict and zip stages')
+    parser.add_argument('--stardict-backend', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help='Backend of the stardict stage (default: native)')
+    parser.add_argument('--json', type=Path, help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    stardict = None if args.no_stardict else args.stardict_backend
+    if stardict == 'pyglossary' and shutil.which("pyglossary") is None:
+        print("pyglossary not found, stardict and zip stages skipped")
+        stardict = None
+
+    results: Dict[int, Dict[str, float]] = {}
+    for size in sorted(args.sizes):
+        best: Dict[str, float] = {}
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix="volubilis_bench_") as work_dir:
+                for stage, seconds in time_stages(size, args.seed, Path(work_dir), stardict).items():
+                    best[stage] = min(seconds, best.get(stage, seconds))
+        results[size] = best
+
+    stages = [stage for stage in STAGES if any(stage in timings for timings in results.values())]
+    print(f"{'rows':>9s} " + " ".join(f"{stage:>12s}" for stage in stages) + f" {'rows/s':>10s}")
+    for size, timings in results.items():
+        total = sum(timings.values())
+        cells = " ".join(f"{timings.get(stage, 0.0):11.3f}s" for stage in stages)
+        print(f"{size:9d} {cells} {size / total if total else 0:10.0f}")
+
+    exponents = {
+        stage: scaling_exponent([(size, timings[stage]) for size, timings in results.items() if stage in timings])
+        for stage in stages
+    }
+    print(f"{'scaling':>9s} " + " ".join(
+        f"{exponent:12.2f}" if exponent is not None else f"{'-':>12s}" for exponent in exponents.values()))
+
+    if args.json:
+        report = {
+            'seed': args.seed,
+            'results': [{'rows': size, 'seconds': timings} for size, timings in results.items()],
+            'scaling_exponents': exponents,
+        }
+        args.json.write_text(json.dumps(report, indent=2) + "\n", encoding='utf-8')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
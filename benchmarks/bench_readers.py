@@ -0,0 +1,59 @@
+"""Compare the Excel reader backends on the same workbook.
+
+Usage:
+  python -m benchmarks.bench_readers src/vol_mundo_01.11.2025.xlsx
+  python -m benchmarks.bench_readers file.xlsx --repeat 3 --backends native openpyxl
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from src.xlsx_reader import READERS, available_readers, create_reader
+
+
+def time_reader(name: str, excel_file: Path) -> tuple:
+    """Read every row with one backend, return (seconds, row count, cell count)."""
+    start = time.perf_counter()
+    row_count = 0
+    cell_count = 0
+    with create_reader(name, excel_file) as reader:
+        for row in reader.iter_rows():
+            row_count += 1
+            cell_count += len(row)
+    return time.perf_counter() - start, row_count, cell_count
+
+
+def main() -> int:
+    """Run the reader benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the Excel reader backends")
+    parser.add_argument('excel_file', type=Path, help='Workbook to read')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per backend (best time is reported)')
+    parser.add_argument('--backends', nargs='+', choices=sorted(READERS), default=available_readers(),
+                        help='Backends to compare (default: all installed)')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.backends:
+        if name not in available_readers():
+            print(f"{name:10s} not installed, skipped")
+            continue
+        runs = [time_reader(name, args.excel_file) for _ in range(args.repeat)]
+        results[name] = min(runs)
+
+    baseline = results.get('openpyxl')
+    print(f"{'backend':10s} {'seconds':>9s} {'rows':>9s} {'rows/s':>10s} {'speedup':>8s}")
+    for name, (seconds, rows, cells) in results.items():
+        speedup = f"{baseline[0] / seconds:.2f}x" if baseline else "-"
+        print(f"{name:10s} {seconds:9.3f} {rows:9d} {rows / seconds:10.0f} {speedup:>8s}")
+
+    row_counts = {rows for _, rows, _ in results.values()}
+    if len(row_counts) > 1:
+        print("Warning: backends returned different row counts")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""Synthetic Volubilis-shaped rows and workbooks for benchmarks.
+
+Rows follow the vol_mundo column layout (see ``src/schema.py``): Thai
+headwords built from real syllable shapes with ``;``/``=`` synonyms,
+thaiphon pronunciations with tone marks and optional ``[...]`` parts,
+classifiers, ``(thai) syn`` brackets, domains and levels. Headwords are
+drawn from a Zipf-like pool so that, as in the real file, many headwords
+carry more than one entry. Output is deterministic for a given seed.
+
+Usage:
+  python -m benchmarks.synthetic out.xlsx --rows 100000
+"""
+
+import argparse
+import random
+import sys
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+HEADER = ("THAIROM", "EASYTHAI", "THAIPHON", "THA", "ENG", "FRA", "TYPE", "USAGE",
+          "SCIENT", "DOM", "CLASSIF", "SYN", "LEVEL", "NOTE")
+
+# (Thai, thaiphon) building blocks of a syllable
+ONSETS = [("ก", "k"), ("ข", "kh"), ("ค", "kh"), ("ง", "ng"), ("จ", "j"), ("ช", "ch"), ("ด", "d"),
+          ("ต", "t"), ("ท", "th"), ("น", "n"), ("บ", "b"), ("ป", "p"), ("พ", "ph"), ("ม", "m"),
+          ("ย", "y"), ("ร", "r"), ("ล", "l"), ("ว", "w"), ("ส", "s"), ("ห", "h"), ("อ", "")]
+VOWELS = [("{c}{t}า", "ā"), ("{c}ิ{t}", "i"), ("{c}ี{t}", "ī"), ("{c}ุ{t}", "u"), ("{c}ู{t}", "ū"),
+          ("เ{c}{t}", "ē"), ("โ{c}{t}", "ō"), ("{c}{t}อ", "ø"), ("{c}ั{t}ว", "ūa"), ("ไ{c}{t}", "ai"),
+          ("เ{c}{t}าะ", "ǿ")]
+CODAS = [("", ""), ("น", "n"), ("ง", "ng"), ("ม", "m"), ("ก", "k"), ("ด", "t")]
+# Thai tone mark and the thaiphon prefix for it (mid tone has neither)
+TONES = [("", ""), ("่", "_"), ("้", "\\"), ("๊", "¯"), ("๋", "/")]
+
+ENGLISH = ["house", "home", "dog", "cat", "horse", "water", "rice", "eat", "drink", "go", "come",
+           "see", "big", "small", "hot", "cold", "red", "green", "market", "road", "car", "boat",
+           "teacher", "student", "book", "write", "read", "sleep", "work", "money", "price",
+           "mountain", "river", "sea", "tree", "flower", "fruit", "banana", "mango", "chicken",
+           "fish", "pork", "beef", "spicy", "sweet", "sour", "salty", "happy", "sad", "angry",
+           "to walk", "to run", "to sit down", "to stand up", "temple", "monk", "king", "village",
+           "city", "country", "language", "word", "speak", "listen", "morning", "evening", "night",
+           "day", "week", "month", "year", "friend", "mother", "father", "child", "older brother"]
+TYPES = ["n.", "n.", "n.", "v.", "v.", "adj.", "adv.", "n. exp.", "v. exp.", "X", "pron.", "prep."]
+USAGES = ["", "", "", "", "exp.", "colloq.", "formal", "slang", "old use"]
+DOMAINS = ["", "", "", "ANIMAL", "FOOD", "BOTANY", "MEDICINE", "LAW", "RELIGION", "SPORT"]
+GENERA = ["Canis", "Felis", "Oryza", "Musa", "Mangifera", "Gallus", "Bos", "Sus", "Ficus"]
+LEVELS = [None, None, 1, 1, 2, 2, 3, 4, 5]
+
+
+class RowGenerator:
+    """Deterministic source of synthetic Volubilis rows."""
+
+    def __init__(self, seed: int = 0, vocabulary: int = 50000):
+        self.random = random.Random(seed)
+        self.syllables = [
+            (vowel.format(c=onset, t=mark) + coda, tone + onset_phon + vowel_phon + coda_phon)
+            for onset, onset_phon in ONSETS
+            for vowel, vowel_phon in VOWELS
+            for coda, coda_phon in CODAS
+            for mark, tone in TONES
+        ]
+        self.vocabulary = [self._word() for _ in range(vocabulary)]
+
+    def _word(self) -> Tuple[str, str]:
+        """A 1-3 syllable Thai word and its thaiphon."""
+        count = self.random.choice((1, 1, 2, 2, 2, 3))
+        parts = [self.random.choice(self.syllables) for _ in range(count)]
+        thai = "".join(part[0] for part in parts)
+        phon = " ".join(part[1] for part in parts)
+        if count > 1 and self.random.random() < 0.05:
+            # Optional syllable, e.g. "¯[kin] _øn"
+            first, rest = phon.split(" ", 1)
+            phon = f"[{first}] {rest}"
+        return thai, phon
+
+    def _pick_word(self) -> Tuple[str, str]:
+        """Zipf-like pick: low indexes are much more frequent."""
+        index = int(len(self.vocabulary) * self.random.random() ** 2)
+        return self.vocabulary[index]
+
+    def _english(self) -> str:
+        words = self.random.sample(ENGLISH, self.random.choice((1, 1, 1, 2, 3)))
+        return "; ".join(words)
+
+    def row(self) -> Tuple:
+        """One data row in sheet column order (trailing cells may be None)."""
+        rnd = self.random
+        thai, phon = self._pick_word()
+        if rnd.random() < 0.1:
+            synonym, _ = self._pick_word()
+            thai = f"{thai}{rnd.choice(';=')}{synonym}"
+
+        classif = None
+        if rnd.random() < 0.2:
+            classifiers = [rnd.choice(self.syllables) for _ in range(rnd.choice((1, 1, 2)))]
+            classif = "; ".join(f"{c_thai} [{c_phon}]" for c_thai, c_phon in classifiers)
+
+        syn = None
+        if rnd.random() < 0.15:
+            syn = f"({self._pick_word()[0]}) syn"
+
+        scient = f"{rnd.choice(GENERA)} {rnd.choice(('sp.', 'indica', 'domesticus'))}" if rnd.random() < 0.03 else None
+        note = "note" if rnd.random() < 0.05 else None
+
+        return (None, None, phon, thai, self._english(), "fr", rnd.choice(TYPES),
+                rnd.choice(USAGES) or None, scient, rnd.choice(DOMAINS) or None,
+                classif, syn, rnd.choice(LEVELS), note)
+
+
+def generate_rows(count: int, seed: int = 0, header: bool = True) -> Iterator[Tuple]:
+    """Yield the two header rows (title and column names) followed by ``count`` data rows."""
+    generator = RowGenerator(seed, vocabulary=max(100, int(count * 0.7)))
+    if header:
+        yield ("volubilis synthetic",)
+        yield HEADER
+    for _ in range(count):
+        yield generator.row()
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _row_xml(row_number: int, row: Tuple, letters: List[str]) -> str:
+    cells = []
+    for i, value in enumerate(row):
+        if value is None:
+            continue
+        ref = f"{letters[i]}{row_number}"
+        if isinstance(value, (int, float)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+def write_workbook(path: Path, rows: Iterable[Tuple]) -> int:
+    """Write rows to a minimal single-sheet xlsx with inline strings; returns the row count."""
+    letters = [_column_letter(i) for i in range(len(HEADER))]
+    row_count = 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", CONTENT_TYPES)
+        zf.writestr("_rels/.rels", ROOT_RELS)
+        zf.writestr("xl/workbook.xml", WORKBOOK)
+        zf.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS)
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(SHEET_START.encode("utf-8"))
+            for row in rows:
+                row_count += 1
+                sheet.write(_row_xml(row_count, row, letters).encode("utf-8"))
+            sheet.write(SHEET_END.encode("utf-8"))
+    return row_count
+
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="vol_mundo" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_END = '</sheetData></worksheet>'
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Write a synthetic workbook."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic Volubilis workbook")
+    parser.add_argument('output', type=Path, help='xlsx file to write')
+    parser.add_argument('--rows', type=int, default=10000, help='Number of data rows (default: 10000)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args(argv)
+
+    count = write_workbook(args.output, generate_rows(args.rows, args.seed))
+    print(f"Wrote {count} rows to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,12 @@ import subprocess
 import sys
 from pathlib import Path
 
-from src.config import Config
+from src.config import Config, parse_output_flavors
 from src.dictionary_processor import DictionaryProcessor
-from src.stardict_builder import StardictBuilder
+from src.metrics import RunMetrics, total_size
+from src.stardict_builder import BACKENDS, StardictBuilder
+from src.renderer import FLAVORS
+from src.xlsx_reader import READERS
 
 
 def setup_logging(verbose: bool = False) -> None:
@@ -33,6 +36,20 @@ Examples:
   python main.py file.xlsx --debug-1000       # Process only first 1000 rows for testing
   python main.py file.xlsx --no-cache         # Disable caching
   python main.py file.xlsx --refresh-cache    # Force cache refresh
+  python main.py file.xlsx --reader native    # Stream the workbook with the native reader
+  python main.py file.xlsx --jobs 8           # Process rows in 8 worker processes
+  python main.py file.xlsx --snapshot         # Reuse a binary snapshot of the workbook
+  python main.py file.xlsx --incremental      # Only reprocess changed rows
+  python main.py file.xlsx --memory-budget 256  # Bound aggregation memory to ~256 MB
+  python main.py file.xlsx --columnar         # Format whole column blocks in batch calls
+  python main.py file.xlsx --formatter-cache 50000  # Memoize repeated pronunciations
+  python main.py file.xlsx --transform-store  # Reuse formatting results across runs
+  python main.py file.xlsx --output-flavor en_th=plain  # Plain-text en-th definitions
+  python main.py file.xlsx --write-threads 1   # Write the output files one after another
+  python main.py file.xlsx --stardict-backend pyglossary  # Convert with the pyglossary CLI
+  python main.py file.xlsx --dictzip-level 6  # Faster .dict.dz compression
+  python main.py file.xlsx --combined-package  # Add a deduplicated Thai-English package
+  python main.py file.xlsx --metrics-out metrics.json  # Write a JSON timing report
         """
     )
 
@@ -68,6 +85,136 @@ Examples:
         help='Process only first 1000 rows for debugging'
     )
 
+    parser.add_argument(
+        '--reader',
+        choices=sorted(READERS),
+        help='Excel reader backend (default: openpyxl)'
+    )
+
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help='Read rows from a columnar snapshot of the workbook, building it on first use'
+    )
+
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only reprocess rows that changed since the previous build'
+    )
+
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        metavar='MB',
+        help='Spill aggregated entries to temp files above this many MB (default: unlimited)'
+    )
+
+    parser.add_argument(
+        '--columnar',
+        action='store_true',
+        help='Format the pronunciation, classifier and synonym columns in batches of rows'
+    )
+
+    parser.add_argument(
+        '--formatter-cache',
+        type=int,
+        metavar='N',
+        help='Memoize up to N pronunciation/classifier formatting results (default: disabled)'
+    )
+
+    parser.add_argument(
+        '--transform-store',
+        action='store_true',
+        help='Reuse formatting results of previous runs from a persistent store in the output directory'
+    )
+
+    parser.add_argument(
+        '--flavor',
+        choices=sorted(FLAVORS),
+        help='Definition markup of all outputs: html, compact HTML without CSS classes, or plain text (default: html)'
+    )
+
+    parser.add_argument(
+        '--output-flavor',
+        action='append',
+        default=[],
+        metavar='OUTPUT=FLAVOR',
+        help='Definition markup of one output (th_en, th_pron_en, th_pron_merge_en, en_th); repeatable'
+    )
+
+    parser.add_argument(
+        '--write-buffer',
+        type=int,
+        metavar='MB',
+        help='Collect this many MB of output text per write call (default: 8)'
+    )
+
+    parser.add_argument(
+        '--write-threads',
+        type=int,
+        metavar='N',
+        help='Number of threads writing the output files concurrently (default: 4)'
+    )
+
+    parser.add_argument(
+        '--no-stardict-order',
+        action='store_true',
+        help='Write headwords in first-seen order instead of pre-sorted StarDict order'
+    )
+
+    parser.add_argument(
+        '--stardict-backend',
+        choices=BACKENDS,
+        help='Write Stardict files natively in process or with the pyglossary CLI (default: native)'
+    )
+
+    parser.add_argument(
+        '--no-dictzip',
+        action='store_true',
+        help='Package plain .dict files instead of dictzip-compressed .dict.dz files'
+    )
+
+    parser.add_argument(
+        '--dictzip-level',
+        type=int,
+        metavar='N',
+        help='zlib compression level of .dict.dz files, 1-9 (default: 9)'
+    )
+
+    parser.add_argument(
+        '--dictzip-chunk-size',
+        type=int,
+        metavar='BYTES',
+        help='Uncompressed bytes per dictzip chunk, at most 58315 (default: 58315)'
+    )
+
+    parser.add_argument(
+        '--dictzip-threads',
+        type=int,
+        metavar='N',
+        help='Threads compressing dictzip chunks (default: one per CPU)'
+    )
+
+    parser.add_argument(
+        '--combined-package',
+        action='store_true',
+        help='Also build one Thai-English package storing each definition once, other headwords as synonyms'
+    )
+
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        help='Number of worker processes for row processing (default: 1)'
+    )
+
+    parser.add_argument(
+        '--metrics-out',
+        type=Path,
+        metavar='FILE',
+        help='Write per-stage timings, throughput and peak RSS as JSON to FILE'
+    )
+
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -103,6 +250,8 @@ def main() -> int:
     # Setup logging
     setup_logging(args.verbose)
 
+    metrics = RunMetrics()
+    success = False
     try:
         # Load configuration
         config = Config.from_file()
@@ -115,31 +264,82 @@ def main() -> int:
         config.dictionary.debug_test_1000_rows = args.debug_1000
         config.dictionary.use_cache = not args.no_cache
         config.dictionary.force_refresh_cache = args.refresh_cache
+        if args.reader:
+            config.dictionary.reader_backend = args.reader
+        if args.jobs:
+            config.dictionary.jobs = args.jobs
+        if args.snapshot:
+            config.dictionary.use_snapshot = True
+        if args.incremental:
+            config.dictionary.incremental = True
+        if args.memory_budget is not None:
+            config.dictionary.memory_budget_mb = args.memory_budget
+        if args.columnar:
+            config.dictionary.columnar = True
+        if args.formatter_cache is not None:
+            config.dictionary.formatter_cache_size = args.formatter_cache
+        if args.transform_store:
+            config.dictionary.use_transform_store = True
+        if args.flavor:
+            config.dictionary.definition_flavor = args.flavor
+        if args.output_flavor:
+            config.dictionary.output_flavors.update(parse_output_flavors(args.output_flavor))
+        if args.write_buffer is not None:
+            config.dictionary.write_buffer_mb = args.write_buffer
+        if args.write_threads is not None:
+            config.dictionary.write_threads = args.write_threads
+        if args.no_stardict_order:
+            config.dictionary.stardict_order = False
+        if args.stardict_backend:
+            config.dictionary.stardict_backend = args.stardict_backend
+        if args.no_dictzip:
+            config.dictionary.dictzip = False
+        if args.dictzip_level is not None:
+            config.dictionary.dictzip_level = args.dictzip_level
+        if args.dictzip_chunk_size is not None:
+            config.dictionary.dictzip_chunk_size = args.dictzip_chunk_size
+        if args.dictzip_threads is not None:
+            config.dictionary.dictzip_threads = args.dictzip_threads
+        if args.combined_package:
+            config.dictionary.combined_package = True
 
         # Validate configuration
         config.validate()
 
         # Create processor and run
-        processor = DictionaryProcessor(config)
+        processor = DictionaryProcessor(config, metrics)
         processor.process_excel_file()
 
         # Build Stardict packages
         stardict_dir = Path("stardict")
         stardict_dir.mkdir(exist_ok=True)
 
-        builder = StardictBuilder(args.output_dir, stardict_dir)
+        builder = StardictBuilder(
+            args.output_dir, stardict_dir, config.dictionary.stardict_backend,
+            dictzip=config.dictionary.dictzip,
+            dictzip_level=config.dictionary.dictzip_level,
+            dictzip_chunk_size=config.dictionary.dictzip_chunk_size,
+            dictzip_threads=config.dictionary.dictzip_threads,
+            combined=config.dictionary.combined_package,
+        )
         logging.info("Converting to Stardict format...")
-        builder.convert_to_stardict()
+        with metrics.stage("stardict") as stage:
+            builder.convert_to_stardict()
+            stage.bytes_written = total_size(builder.unzipped_dir.iterdir())
 
         logging.info("Creating zip packages...")
-        zip_files = builder.create_zip_packages()
+        with metrics.stage("zip") as stage:
+            zip_files = builder.create_zip_packages()
+            stage.bytes_written = total_size(zip_files)
 
         # Convert to MOBI format if enabled and calibre is available
         if config.dictionary.enable_mobi_build:
             import shutil
             if shutil.which("ebook-convert"):
                 logging.info("Converting to MOBI format...")
-                builder.convert_to_mobi()
+                with metrics.stage("mobi") as stage:
+                    builder.convert_to_mobi()
+                    stage.bytes_written = total_size((stardict_dir / "mobi").iterdir())
             else:
                 logging.warning("Calibre not found - skipping MOBI conversion")
 
@@ -154,6 +354,7 @@ def main() -> int:
             if not shutil.which("ebook-convert"):
                 print("\033[91mError: calibre not found. Please install calibre to build MOBI files.\033[0m")
 
+        success = True
         return 0
 
     except Exception as e:
@@ -163,6 +364,11 @@ def main() -> int:
             traceback.print_exc()
         return 1
 
+    finally:
+        metrics.log_summary()
+        if args.metrics_out:
+            metrics.write_json(args.metrics_out, success)
+
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
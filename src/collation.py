@@ -0,0 +1,89 @@
+"""Thai collation and tone keys for ordering dictionary entries.
+
+Code point order sorts every word that starts with a leading vowel
+(เ แ โ ใ ไ) after all words that start with a consonant, and lets tone
+marks decide the order before the letters that follow them. Thai
+dictionaries instead order by the consonant the leading vowel is written
+before, and only look at tone marks and other diacritics to break ties.
+
+``thai_collation_key`` builds that order into one string per word, so
+sorting compares plain strings; keys are cached since the same words come
+back across the th-en, en-th and merged outputs.
+
+``stardict_sort_key`` is the headword order of a StarDict ``.idx`` file,
+which the txt outputs are written in so converters need not sort them;
+``stardict_headword_key`` applies it to a txt headword with alternates,
+and ``presorted_marker`` names the file that says a txt output is in it.
+"""
+
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+# Leading vowels, swapped behind the consonant that follows them
+_LEADING_VOWEL = re.compile('([เ-ไ])([ก-ฮ])')
+# Maitaikhu, tone marks, thanthakhat, nikhahit, yamakkan: ignored except to break ties
+DIACRITICS = '็่้๊๋์ํ๎'
+_STRIP_DIACRITICS = str.maketrans('', '', DIACRITICS)
+_ONLY_DIACRITICS = re.compile(f'[^{DIACRITICS}]')
+
+# Tone marks in the order they are looked for: low, falling, high, rising
+TONE_MARKS = ('่', '้', '๊', '๋')
+
+# Separates the levels of a key; lower than any character of a word
+KEY_SEPARATOR = '\x01'
+
+CACHE_SIZE = 1 << 17
+
+# Suffix of the empty file that marks a txt output as written in StarDict order
+PRESORTED_SUFFIX = ".presorted"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def thai_collation_key(word: str) -> str:
+    """Sort key of a Thai word: letters in dictionary order, then diacritics, then the word itself."""
+    primary = _LEADING_VOWEL.sub(r'\2\1', word).translate(_STRIP_DIACRITICS)
+    return f"{primary}{KEY_SEPARATOR}{_ONLY_DIACRITICS.sub('', word)}{KEY_SEPARATOR}{word}"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def tone_priority(word: str) -> int:
+    """Tone priority of a word: 0 mid, 1 low, 2 falling, 3 high, 4 rising.
+
+    The first of the marks found in ``TONE_MARKS`` order wins.
+    """
+    for priority, mark in enumerate(TONE_MARKS, 1):
+        if mark in word:
+            return priority
+    return 0
+
+
+def level_sort_prefix(level: str) -> str:
+    """Two-character prefix that orders entries by level, blank levels first."""
+    return level[:2].ljust(2)
+
+
+def stardict_sort_key(word: str) -> Tuple[bytes, bytes]:
+    """Order of StarDict headwords: g_ascii_strcasecmp of the UTF-8 bytes, then strcmp.
+
+    ``bytes.lower`` only folds ASCII letters, like g_ascii_strcasecmp, and
+    bytes compare unsigned, like strcmp.
+    """
+    data = word.encode('utf-8')
+    return data.lower(), data
+
+
+def stardict_headword_key(headword: str) -> Tuple[bytes, bytes]:
+    """StarDict order of a txt headword: only its first term counts, the alternates after "|" do not."""
+    return stardict_sort_key(headword.partition('|')[0])
+
+
+def presorted_marker(txt_file: Path) -> Path:
+    """The file next to ``txt_file`` whose presence marks it as written in StarDict order."""
+    return txt_file.with_name(txt_file.name + PRESORTED_SUFFIX)
+
+
+def tone_level_key(word: str, level: str) -> Tuple[int, str, str]:
+    """Order of words sharing a pronunciation: tone, then level, then Thai collation."""
+    return tone_priority(word), level_sort_prefix(level), thai_collation_key(word)
@@ -5,12 +5,31 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .renderer import DEFAULT_FLAVOR, FLAVORS
+from .dictzip import DEFAULT_CHUNK_SIZE, DEFAULT_LEVEL, MAX_CHUNK_SIZE
+from .stardict_builder import BACKENDS, DEFAULT_BACKEND
+from .xlsx_reader import READERS
+
 try:
     from dotenv import load_dotenv
     DOTENV_AVAILABLE = True
 except ImportError:
     DOTENV_AVAILABLE = False
 
+# Names of the txt outputs, as used for per-output settings
+OUTPUT_NAMES = ('th_en', 'th_pron_en', 'th_pron_merge_en', 'en_th')
+
+
+def parse_output_flavors(specs: List[str]) -> Dict[str, str]:
+    """Parse 'OUTPUT=FLAVOR' items (e.g. 'en_th=plain') into an output to flavor map."""
+    flavors = {}
+    for spec in specs:
+        output, sep, flavor = spec.partition('=')
+        if not sep:
+            raise ValueError(f"Expected OUTPUT=FLAVOR, got: {spec}")
+        flavors[output.strip()] = flavor.strip()
+    return flavors
+
 
 
 
@@ -101,6 +120,13 @@ class DictionaryConfig:
     debug: bool = False
     debug_test_1000_rows: bool = True
 
+    # Excel reader backend: 'native', 'openpyxl' or 'calamine' (needs python-calamine)
+    reader_backend: str = 'openpyxl'
+
+    # Row processing in worker processes (1 = serial)
+    jobs: int = 1
+    job_batch_size: int = 2000
+
     # Pronunciation file options
     th_pron: bool = True
     th_pron_prefix: str = '.'
@@ -119,6 +145,52 @@ class DictionaryConfig:
     cache_file: Path = Path("cache.pkl")
     force_refresh_cache: bool = False
 
+    # Columnar workbook snapshot, keyed by the xlsx content hash
+    use_snapshot: bool = False
+    snapshot_dir: Path = Path("snapshots")
+
+    # Incremental rebuild: only rows whose content changed are reprocessed
+    incremental: bool = False
+    row_store_file: Path = Path("row_store.pkl")
+
+    # Aggregation memory budget in MB; above it entries spill to sorted temp files (0 = unlimited)
+    memory_budget_mb: int = 0
+
+    # Entries kept in the LRU memo of pronunciation/classifier formatting (0 = disabled)
+    formatter_cache_size: int = 0
+
+    # Columnar mode: format whole column blocks with the TextFormatter batch calls
+    columnar: bool = False
+    columnar_block_size: int = 20000
+
+    # Persistent store of formatter results, keyed by a fingerprint of the patterns
+    use_transform_store: bool = False
+    transform_store_file: Path = Path("transform_store.sqlite")
+    transform_store_max_entries: int = 500000
+
+    # Definition markup: 'html', 'compact' or 'plain', optionally per output name
+    definition_flavor: str = DEFAULT_FLAVOR
+    output_flavors: Dict[str, str] = field(default_factory=dict)
+
+    # Output writing: MB of text collected per write call, threads writing the output files
+    write_buffer_mb: int = 8
+    write_threads: int = 4
+
+    # Write headwords in StarDict .idx order, marked by a header line, so converters need not sort
+    stardict_order: bool = True
+
+    # Stardict conversion: 'native' writes the dictionaries in process, 'pyglossary' runs the pyglossary CLI
+    stardict_backend: str = DEFAULT_BACKEND
+
+    # Compress each .dict to dictzip .dict.dz: zlib level, chunk size in bytes, threads (0 = one per CPU)
+    dictzip: bool = True
+    dictzip_level: int = DEFAULT_LEVEL
+    dictzip_chunk_size: int = DEFAULT_CHUNK_SIZE
+    dictzip_threads: int = 0
+
+    # Also build one Thai-English package that stores each definition once, with the other headwords in its .syn
+    combined_package: bool = False
+
     # Dictionary metadata
     title_en_th: str = "volubilis v2 (en-th)"
     title_th_en: str = "volubilis v2 (th-en)"
@@ -195,6 +267,9 @@ class Config:
         config.dictionary.paiboon = os.getenv('VOLUBILIS_PAIBOON', str(config.dictionary.paiboon)).lower() == 'true'
         config.dictionary.debug = os.getenv('VOLUBILIS_DEBUG', str(config.dictionary.debug)).lower() == 'true'
         config.dictionary.debug_test_1000_rows = os.getenv('VOLUBILIS_DEBUG_TEST_1000_ROWS', str(config.dictionary.debug_test_1000_rows)).lower() == 'true'
+        config.dictionary.reader_backend = os.getenv('VOLUBILIS_READER_BACKEND', config.dictionary.reader_backend)
+        config.dictionary.jobs = int(os.getenv('VOLUBILIS_JOBS', config.dictionary.jobs))
+        config.dictionary.job_batch_size = int(os.getenv('VOLUBILIS_JOB_BATCH_SIZE', config.dictionary.job_batch_size))
 
         # Pronunciation options
         config.dictionary.th_pron = os.getenv('VOLUBILIS_TH_PRON', str(config.dictionary.th_pron)).lower() == 'true'
@@ -213,6 +288,34 @@ class Config:
         config.dictionary.use_cache = os.getenv('VOLUBILIS_USE_CACHE', str(config.dictionary.use_cache)).lower() == 'true'
         config.dictionary.cache_file = Path(os.getenv('VOLUBILIS_CACHE_FILE', str(config.dictionary.cache_file)))
         config.dictionary.force_refresh_cache = os.getenv('VOLUBILIS_FORCE_REFRESH_CACHE', str(config.dictionary.force_refresh_cache)).lower() == 'true'
+        config.dictionary.use_snapshot = os.getenv('VOLUBILIS_USE_SNAPSHOT', str(config.dictionary.use_snapshot)).lower() == 'true'
+        config.dictionary.snapshot_dir = Path(os.getenv('VOLUBILIS_SNAPSHOT_DIR', str(config.dictionary.snapshot_dir)))
+        config.dictionary.incremental = os.getenv('VOLUBILIS_INCREMENTAL', str(config.dictionary.incremental)).lower() == 'true'
+        config.dictionary.row_store_file = Path(os.getenv('VOLUBILIS_ROW_STORE_FILE', str(config.dictionary.row_store_file)))
+        config.dictionary.memory_budget_mb = int(os.getenv('VOLUBILIS_MEMORY_BUDGET_MB', config.dictionary.memory_budget_mb))
+        config.dictionary.formatter_cache_size = int(os.getenv('VOLUBILIS_FORMATTER_CACHE_SIZE', config.dictionary.formatter_cache_size))
+        config.dictionary.columnar = os.getenv('VOLUBILIS_COLUMNAR', str(config.dictionary.columnar)).lower() == 'true'
+        config.dictionary.columnar_block_size = int(os.getenv('VOLUBILIS_COLUMNAR_BLOCK_SIZE', config.dictionary.columnar_block_size))
+        config.dictionary.use_transform_store = os.getenv('VOLUBILIS_USE_TRANSFORM_STORE', str(config.dictionary.use_transform_store)).lower() == 'true'
+        config.dictionary.transform_store_file = Path(os.getenv('VOLUBILIS_TRANSFORM_STORE_FILE', str(config.dictionary.transform_store_file)))
+        config.dictionary.transform_store_max_entries = int(os.getenv('VOLUBILIS_TRANSFORM_STORE_MAX_ENTRIES', config.dictionary.transform_store_max_entries))
+
+        # Definition flavors
+        config.dictionary.definition_flavor = os.getenv('VOLUBILIS_DEFINITION_FLAVOR', config.dictionary.definition_flavor)
+        output_flavors = os.getenv('VOLUBILIS_OUTPUT_FLAVORS')
+        if output_flavors:
+            config.dictionary.output_flavors = parse_output_flavors(output_flavors.split(','))
+
+        # Output writing
+        config.dictionary.write_buffer_mb = int(os.getenv('VOLUBILIS_WRITE_BUFFER_MB', config.dictionary.write_buffer_mb))
+        config.dictionary.write_threads = int(os.getenv('VOLUBILIS_WRITE_THREADS', config.dictionary.write_threads))
+        config.dictionary.stardict_order = os.getenv('VOLUBILIS_STARDICT_ORDER', str(config.dictionary.stardict_order)).lower() == 'true'
+        config.dictionary.stardict_backend = os.getenv('VOLUBILIS_STARDICT_BACKEND', config.dictionary.stardict_backend)
+        config.dictionary.dictzip = os.getenv('VOLUBILIS_DICTZIP', str(config.dictionary.dictzip)).lower() == 'true'
+        config.dictionary.dictzip_level = int(os.getenv('VOLUBILIS_DICTZIP_LEVEL', config.dictionary.dictzip_level))
+        config.dictionary.dictzip_chunk_size = int(os.getenv('VOLUBILIS_DICTZIP_CHUNK_SIZE', config.dictionary.dictzip_chunk_size))
+        config.dictionary.dictzip_threads = int(os.getenv('VOLUBILIS_DICTZIP_THREADS', config.dictionary.dictzip_threads))
+        config.dictionary.combined_package = os.getenv('VOLUBILIS_COMBINED_PACKAGE', str(config.dictionary.combined_package)).lower() == 'true'
 
         # Metadata
         config.dictionary.title_en_th = os.getenv('VOLUBILIS_TITLE_EN_TH', config.dictionary.title_en_th)
@@ -231,6 +334,49 @@ class Config:
         if self.dictionary.columns < 1:
             raise ValueError("Columns must be positive")
 
+        if self.dictionary.jobs < 1:
+            raise ValueError("Jobs must be positive")
+
+        if self.dictionary.memory_budget_mb < 0:
+            raise ValueError("Memory budget must not be negative")
+
+        if self.dictionary.formatter_cache_size < 0:
+            raise ValueError("Formatter cache size must not be negative")
+
+        if self.dictionary.columnar_block_size < 1:
+            raise ValueError("Columnar block size must be positive")
+
+        if self.dictionary.transform_store_max_entries < 1:
+            raise ValueError("Transform store max entries must be positive")
+
+        if self.dictionary.write_buffer_mb < 1:
+            raise ValueError("Write buffer size must be positive")
+
+        if self.dictionary.write_threads < 1:
+            raise ValueError("Write threads must be positive")
+
+        if self.dictionary.reader_backend not in READERS:
+            raise ValueError(f"Unknown reader backend: {self.dictionary.reader_backend}")
+
+        if self.dictionary.stardict_backend not in BACKENDS:
+            raise ValueError(f"Unknown Stardict backend: {self.dictionary.stardict_backend}")
+
+        if not 1 <= self.dictionary.dictzip_level <= 9:
+            raise ValueError("Dictzip level must be between 1 and 9")
+
+        if not 1 <= self.dictionary.dictzip_chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"Dictzip chunk size must be between 1 and {MAX_CHUNK_SIZE}")
+
+        if self.dictionary.dictzip_threads < 0:
+            raise ValueError("Dictzip threads must not be negative")
+
+        for flavor in (self.dictionary.definition_flavor, *self.dictionary.output_flavors.values()):
+            if flavor not in FLAVORS:
+                raise ValueError(f"Unknown definition flavor: {flavor}")
+        for output in self.dictionary.output_flavors:
+            if output not in OUTPUT_NAMES:
+                raise ValueError(f"Unknown output for a definition flavor: {output}")
+
         # Validate column mapping doesn't exceed columns
         max_col = max(self.dictionary.COLUMN_MAPPING.values())
         if max_col >= self.dictionary.columns:
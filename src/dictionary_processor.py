@@ -4,40 +4,105 @@ import hashlib
 import logging
 import pickle
 import re
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, groupby, islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-
-try:
-    from openpyxl import load_workbook
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
-    load_workbook = None
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
+from .collation import (level_sort_prefix, presorted_marker, stardict_headword_key, thai_collation_key,
+                        tone_level_key)
 from .config import Config, DictionaryConfig
+from .entries import Entry, EntryStore
 from .file_handler import FileHandler
+from .metrics import RunMetrics, peak_rss_mb
+from .output_writer import BufferedLineWriter
+from .renderer import DEFAULT_FLAVOR, DefinitionRenderer, get_renderer, level_text
+from .schema import FIELD_HEADERS, RowSchema
 from .text_formatter import TextFormatter
+from .transform_store import TransformStore
+from .transliteration import Transliteration
+from .snapshot import SnapshotReader, snapshot_path, write_snapshot
+from .spill import SpillBudget, SpillingAggregator, SpillingEntryStore
+from .xlsx_reader import OPENPYXL_AVAILABLE, OpenpyxlReader, RowReader, create_reader
 
 
 logger = logging.getLogger(__name__)
 
+# Positions in RowSchema.extract() output of the columns formatted in batch by columnar mode
+_THAIPHON, _CLASSIF, _SYN = (list(FIELD_HEADERS).index(name) for name in ('thaiphon', 'classif', 'syn'))
+
+
+class RowFragment(NamedTuple):
+    """What one accepted row adds to the build: its entry and the map keys it is listed under."""
+
+    entry: Entry
+    thai_word: str  # th-en headword
+    pron_headword: str  # th-pron-en headword, empty when there is none
+    base_pron: str  # th-pron-merge-en key
+    merge_synonyms: Tuple[Tuple[str, str], ...]  # (Thai, English) synonyms merged under base_pron
+    english_word: str  # "|"-separated en-th headwords
+
+
+# Output files a build may write
+OUTPUT_FILES = ('th_en', 'th_pron_en', 'en_th', 'th_pron_merge_en')
+# Most memory a buffered character takes while its chunk is listed, joined and UTF-8 encoded
+WRITE_BUFFER_BYTES_PER_CHAR = 8
+
+_worker_processor: Optional['DictionaryProcessor'] = None
+
+
+def _init_worker(config: Config, schema: RowSchema) -> None:
+    """Create the per-process DictionaryProcessor used by _process_row_batch."""
+    global _worker_processor
+    _worker_processor = DictionaryProcessor(config)
+    _worker_processor.schema = schema
+
+
+def _process_row_batch(rows: List[Tuple]) -> Tuple[int, Dict[str, Dict]]:
+    """Process a batch of rows in a worker and return (processed count, partial maps)."""
+    return _worker_processor._process_rows_partial(rows)
+
 
 class DictionaryProcessor:
     """Processes Excel dictionary files into various output formats."""
 
-    def __init__(self, config: Config):
+    # Bump when _process_row output changes so old row stores are discarded
+    ROW_STORE_VERSION = 4
+    # Bump when the layout of cached data changes so old caches are rebuilt
+    CACHE_VERSION = 3
+
+    def __init__(self, config: Config, metrics: Optional[RunMetrics] = None):
         self.config = config.dictionary
-        self.formatter = TextFormatter(self.config.patterns)
+        self.formatter = TextFormatter(self.config.patterns, self.config.formatter_cache_size)
         self.file_handler = FileHandler()
-
-        # Ensure cache file is in output directory
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        self.rows_read = 0
+        # Time spent waiting on the row reader, split out of the processing loop
+        self.ingest_wall_seconds = 0.0
+        self.ingest_cpu_seconds = 0.0
+        # Column positions, resolved from the header row when a sheet is read
+        self.schema = RowSchema()
+        # Entries referenced by ID from the aggregation maps
+        self.entries = EntryStore()
+        # Sort keys use the default flavor, so every flavor has the same entry order
+        self.html_renderer = get_renderer(DEFAULT_FLAVOR)
+
+        # Ensure cache file and snapshots are in output directory
         if not self.config.cache_file.is_absolute():
             self.config.cache_file = self.config.output_folder / self.config.cache_file
+        if not self.config.row_store_file.is_absolute():
+            self.config.row_store_file = self.config.output_folder / self.config.row_store_file
+        if not self.config.snapshot_dir.is_absolute():
+            self.config.snapshot_dir = self.config.output_folder / self.config.snapshot_dir
+        if not self.config.transform_store_file.is_absolute():
+            self.config.transform_store_file = self.config.output_folder / self.config.transform_store_file
 
     def process_excel_file(self) -> None:
         """Main method to process the Excel file."""
-        if not OPENPYXL_AVAILABLE:
+        if self.config.reader_backend == OpenpyxlReader.name and not OPENPYXL_AVAILABLE:
             logger.warning("openpyxl not available - using mock data for demonstration")
             # Use mock processing for demonstration
             self._process_mock_data()
@@ -56,95 +121,505 @@ class DictionaryProcessor:
         # Ensure output directory exists
         self.file_handler.ensure_directory(self.config.output_folder)
 
-        # Load workbook
-        wb = load_workbook(self.config.excel_file, read_only=True)
-        logger.info(f"Sheet names: {wb.sheetnames}")
-
-        # Process the active sheet
-        ws = wb.active
-        ws.reset_dimensions()
-
-        # Log column mapping from header row (second row)
-        rows = list(ws.values)
-        if len(rows) > 1:
-            header_row = rows[1]  # Second row (index 1)
-            mapping_lines = []
-            for i, col in enumerate(header_row):
-                usage = "unused"
-                if i == 0: usage = "thai_romanized"
-                elif i == 1: usage = "easythai"
-                elif i == 2: usage = "thaiphon (pronunciation)"
-                elif i == 3: usage = "thai (word)"
-                elif i == 4: usage = "english (definition)"
-                elif i == 7: usage = "type_word"
-                elif i == 8: usage = "scient"
-                elif i == 9: usage = "dom"
-                elif i == 10: usage = "classif"
-                elif i == 11: usage = "syn"
-                elif i == 12: usage = "level"
-                elif i == 13: usage = "note"
-                col_clean = str(col).replace('\n', ' ')
-                mapping_lines.append(f"{i}: {col_clean} -> {usage}")
-            logger.info("Column mapping:\n" + "\n".join(mapping_lines))
+        # Open the active sheet (or its snapshot) with the configured reader backend
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        reader = self._open_reader()
+        logger.info(f"Reading rows with the '{reader.name}' backend")
 
-        # Initialize data structures
-        th_en_data = defaultdict(list)  # Thai to English
-        th_pron_en_data = defaultdict(list)  # Thai with pronunciation to English
-        th_pron_merge_en_data = defaultdict(list)  # Merged pronunciation to English
-        en_th_data = defaultdict(lambda: defaultdict(list))  # English to Thai
+        # Stream the sheet once: the two header rows and the data rows come
+        # from the same iterator, so the workbook is never held in memory.
+        rows = reader.iter_rows()
+        header_rows = self._read_header(rows, reader)
+        self._log_column_mapping(header_rows[1] if len(header_rows) > 1 else ())
+        self.ingest_wall_seconds = time.perf_counter() - wall_start
+        self.ingest_cpu_seconds = time.process_time() - cpu_start
+
+        store = self._open_transform_store()
+
+        # Initialize data structures (disk-backed when a memory budget is set)
+        budget = self._create_spill_budget()
+        self.entries = self._create_entry_store(budget)
+        th_en_data, th_pron_en_data, th_pron_merge_en_data, en_th_data = self._create_aggregation_maps(budget)
 
         # Open output files
-        output_files = self._open_output_files()
+        output_files = self._open_output_files(budget)
 
         try:
-            row_count = 0
-            processed_count = 0
-
-            for row in ws.values:
-                row_count += 1
-
-                # Skip header rows
-                if row_count <= 2:
-                    continue
-
-                # Process the row
-                processed = self._process_row(row, th_en_data, th_pron_en_data,
-                                            th_pron_merge_en_data, en_th_data)
-                if processed:
-                    processed_count += 1
-
-                # Progress logging
-                if row_count == 6:
-                    logger.info("Processing rows...")
-                if row_count % 1000 == 0:
-                    logger.info(f"Processed {row_count} rows")
-
-                # Debug limit
-                if self.config.debug_test_1000_rows and row_count >= 1000:
-                    logger.info("Debug mode: stopping at 1000 rows")
-                    break
-
+            data_rows = self._iter_data_rows(rows, len(header_rows))
+            if self.config.incremental:
+                processed_count = self._process_rows_incremental(
+                    data_rows, th_en_data, th_pron_en_data, th_pron_merge_en_data, en_th_data)
+            elif self.config.columnar:
+                processed_count = self._process_rows_columnar(
+                    data_rows, th_en_data, th_pron_en_data, th_pron_merge_en_data, en_th_data)
+            elif self.config.jobs > 1:
+                processed_count = self._process_rows_parallel(
+                    data_rows, th_en_data, th_pron_en_data, th_pron_merge_en_data, en_th_data)
+            else:
+                processed_count = 0
+                for row in data_rows:
+                    if self._process_row(row, th_en_data, th_pron_en_data,
+                                         th_pron_merge_en_data, en_th_data):
+                        processed_count += 1
+            row_count = self.rows_read
+
+            elapsed = time.perf_counter() - wall_start
+            cpu_elapsed = time.process_time() - cpu_start
+            self.metrics.add_stage("ingest", self.ingest_wall_seconds, self.ingest_cpu_seconds, rows=row_count)
+            self.metrics.add_stage("process", elapsed - self.ingest_wall_seconds,
+                                   cpu_elapsed - self.ingest_cpu_seconds, rows=row_count)
+            logger.info(
+                f"Ingested {row_count} rows in {elapsed:.2f}s "
+                f"({row_count / elapsed if elapsed else 0:.0f} rows/s), "
+                f"peak RSS {peak_rss_mb():.1f} MB"
+            )
             logger.info(f"Total entries processed: {processed_count}")
+            self._record_distinct_values()
+            self._record_formatter_cache_stats()
+
+            if budget is not None:
+                # Write from disk only, leaving the budget to the merges and the write buffers
+                budget.spill()
 
             # Write the processed data to files
-            self._write_output_files(output_files, th_en_data, th_pron_en_data,
-                                   th_pron_merge_en_data, en_th_data)
+            self._write_outputs(output_files, th_en_data, th_pron_en_data,
+                                th_pron_merge_en_data, en_th_data, processed_count)
 
         finally:
             # Close all files
             for f in output_files.values():
                 f.close()
-
-        # Save to cache if enabled
-        if self.config.use_cache:
+            reader.close()
+            if store is not None:
+                self._close_transform_store(store)
+            if budget is not None:
+                logger.info(f"Aggregation spilled to disk {budget.spill_count} times")
+                budget.close()
+
+        # Save to cache if enabled (a spilled build never holds the full maps in memory)
+        if budget is not None and self.config.use_cache:
+            logger.info("Skipping cache save for a memory-budgeted build")
+        elif self.config.use_cache:
             # Convert defaultdict structures to regular dicts for pickling
             cache_data = {
+                'entries': self.entries,
                 'th_en': self._convert_defaultdict_to_dict(th_en_data),
                 'th_pron_en': self._convert_defaultdict_to_dict(th_pron_en_data),
                 'en_th': self._convert_defaultdict_to_dict(en_th_data)
             }
             self._save_to_cache(cache_data)
 
+    def _record_distinct_values(self) -> None:
+        """Log the distinct value count of each encoded entry field and add them to the run metrics."""
+        counts = self.entries.distinct_counts()
+        self.metrics.counters['distinct_values'] = counts
+        logger.info("Distinct values: " + ", ".join(f"{field} {count}" for field, count in counts.items()))
+
+    def _record_formatter_cache_stats(self) -> None:
+        """Log the formatter memo counters and add them to the run metrics.
+
+        With ``--jobs`` the rows are formatted in the workers, whose caches
+        are not reported.
+        """
+        stats = self.formatter.cache_stats()
+        if stats is None:
+            return
+        self.metrics.counters['formatter_cache'] = stats
+        logger.info(
+            f"Formatter cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%}), {stats['evictions']} evictions, "
+            f"{stats['size']}/{stats['max_size']} entries"
+        )
+
+    def _open_transform_store(self) -> Optional[TransformStore]:
+        """Open the persistent formatter store and attach it to the formatter, if enabled."""
+        if not self.config.use_transform_store:
+            return None
+        try:
+            store = TransformStore.open(self.config.transform_store_file, self.config.patterns,
+                                        self.config.transform_store_max_entries)
+        except Exception as e:
+            logger.warning(f"Failed to open transform store: {e}")
+            return None
+        self.formatter.attach_store(store)
+        return store
+
+    def _close_transform_store(self, store: TransformStore) -> None:
+        """Write back the store, log its counters and add them to the run metrics."""
+        self.formatter.store = None
+        stats = store.stats()
+        self.metrics.counters['transform_store'] = stats
+        logger.info(
+            f"Transform store: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%}), {stats['written']} new results"
+        )
+        try:
+            store.close()
+        except Exception as e:
+            logger.warning(f"Failed to save transform store: {e}")
+
+    def _create_spill_budget(self) -> Optional[SpillBudget]:
+        """Shared spill budget for the aggregation maps, or None to keep them in memory."""
+        if not self.config.memory_budget_mb:
+            return None
+        logger.info(f"Aggregating with a {self.config.memory_budget_mb} MB memory budget")
+        return SpillBudget(self.config.memory_budget_mb * 1024 * 1024)
+
+    def _create_entry_store(self, budget: Optional[SpillBudget]) -> EntryStore:
+        """Entry table of a build; under a memory budget its text fields spill to disk too."""
+        if budget is None:
+            return EntryStore()
+        return SpillingEntryStore(budget)
+
+    def _create_aggregation_maps(self, budget: Optional[SpillBudget]) -> Tuple[Any, Any, Any, Any]:
+        """Create the th-en, th-pron-en, th-pron-merge-en and en-th aggregation maps.
+
+        Spilling maps keep their headwords in the order _write_output_files
+        sorts them into and their values roughly in output order, by compact
+        keys that end with the entry ID; the writers sort each headword's
+        values in full, so either kind of map produces the same output. The
+        maps only hold entry IDs; the entries themselves stay in
+        ``self.entries``.
+        """
+        if budget is None:
+            return (
+                defaultdict(list),  # Thai to English
+                defaultdict(list),  # Thai with pronunciation to English
+                defaultdict(list),  # Merged pronunciation to English
+                defaultdict(lambda: defaultdict(list)),  # English to Thai
+            )
+
+        th_en_order, th_pron_en_order, th_pron_merge_en_order, en_th_order = self._headword_orders()
+        return (
+            SpillingAggregator(budget, lambda _, entry_id: (*self._entry_sort_key(entry_id, True), entry_id),
+                               key_order=th_en_order),
+            SpillingAggregator(budget, lambda _, entry_id: (*self._entry_sort_key(entry_id, True), entry_id),
+                               key_order=th_pron_en_order),
+            SpillingAggregator(budget, lambda _, item: tone_level_key(item[0], self._level_value(item[2])),
+                               key_order=th_pron_merge_en_order),
+            SpillingAggregator(budget, lambda type_code, entry_id: (
+                self.entries.tables['type_word'].values[type_code], *self._entry_sort_key(entry_id), entry_id),
+                nested=True, key_order=en_th_order),
+        )
+
+    def _headword_orders(self) -> Tuple[Optional[Callable[[str], Any]], ...]:
+        """StarDict order keys of the th-en, th-pron-en, th-pron-merge-en and en-th map keys.
+
+        Each key is ordered by the start of the headword it is written as, so
+        the lines of every file come out in StarDict order, which only looks
+        at the first of the "|"-separated terms. All are None when
+        ``stardict_order`` is off and headwords keep their first-seen order.
+        """
+        if not self.config.stardict_order:
+            return None, None, None, None
+        th_pron_prefix = self.config.th_pron_prefix or ""
+        merge_prefix = self.config.th_pron_merge_prefix or ""
+        merge_length = self.config.th_pron_merge_max_headword_length
+        return (
+            stardict_headword_key,
+            lambda pron_word: stardict_headword_key(th_pron_prefix + pron_word),
+            # Merged headwords are "<prefix><pron> - <Thai words>"; the Thai words only break ties
+            lambda base_pron: stardict_headword_key(f"{merge_prefix}{base_pron} - "[:merge_length]),
+            stardict_headword_key,
+        )
+
+    def _headword_items(self, data, key_order: Optional[Callable[[str], Any]]) -> Iterable[Tuple[str, Any]]:
+        """Items of an aggregation map in ``key_order``; spilling maps already yield them in order."""
+        if key_order is None or isinstance(data, SpillingAggregator):
+            return data.items()
+        return sorted(data.items(), key=lambda item: key_order(item[0]))
+
+    def _open_reader(self) -> RowReader:
+        """Open the row source: the workbook snapshot if enabled, else the workbook itself."""
+        if not self.config.use_snapshot:
+            return create_reader(self.config.reader_backend, self.config.excel_file, self.config.jobs)
+
+        path = snapshot_path(self.config.excel_file, self.config.snapshot_dir)
+        if path.exists():
+            logger.info(f"Using workbook snapshot: {path}")
+        else:
+            logger.info(f"Building workbook snapshot: {path}")
+            with create_reader(self.config.reader_backend, self.config.excel_file, self.config.jobs) as reader:
+                rows = reader.iter_rows()
+                header_rows = self._read_header(rows, reader)
+                write_snapshot(chain(header_rows, rows), path, self.schema.max_column)
+        return SnapshotReader(path, self.config.excel_file)
+
+    def _read_header(self, rows: Iterator[Tuple], reader: RowReader) -> List[Tuple]:
+        """Consume the two header rows, resolve the column schema and project the reader on it."""
+        header_rows = list(islice(rows, 2))
+        if len(header_rows) > 1:
+            self.schema = RowSchema.from_header(header_rows[1])  # Second row (index 1)
+        reader.project(self.schema.columns)
+        return header_rows
+
+    def _iter_data_rows(self, rows: Iterator[Tuple], row_count: int) -> Iterator[Tuple]:
+        """Yield data rows with progress logging, honouring the debug row limit.
+
+        ``row_count`` is the number of rows already consumed (the headers);
+        the running total is kept in ``self.rows_read``.
+        """
+        self.rows_read = row_count
+        rows = iter(rows)
+        while True:
+            # Time the reader separately from the consumer of the rows
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            row = next(rows, None)
+            self.ingest_wall_seconds += time.perf_counter() - wall_start
+            self.ingest_cpu_seconds += time.process_time() - cpu_start
+            if row is None:
+                break
+
+            row_count += 1
+            self.rows_read = row_count
+            yield row
+
+            # Progress logging
+            if row_count == 6:
+                logger.info("Processing rows...")
+            if row_count % 1000 == 0:
+                logger.info(f"Processed {row_count} rows")
+
+            # Debug limit
+            if self.config.debug_test_1000_rows and row_count >= 1000:
+                logger.info("Debug mode: stopping at 1000 rows")
+                break
+
+    def _process_rows_parallel(
+        self,
+        rows: Iterator[Tuple],
+        th_en_data: Dict,
+        th_pron_en_data: Dict,
+        th_pron_merge_en_data: Dict,
+        en_th_data: Dict
+    ) -> int:
+        """Process rows in batches across worker processes and merge the results.
+
+        Batches are merged in submission order, so headword order and the order
+        of definitions per headword match the serial path exactly.
+        """
+        jobs = self.config.jobs
+        batch_size = self.config.job_batch_size
+        logger.info(f"Processing rows with {jobs} worker processes (batch size {batch_size})")
+
+        processed_count = 0
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(Config(dictionary=self.config), self.schema)) as executor:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if batch:
+                    pending.append(executor.submit(_process_row_batch, batch))
+                # Keep a bounded number of batches in flight so memory stays flat
+                while pending and (len(pending) >= jobs * 2 or not batch):
+                    count, partial = pending.popleft().result()
+                    processed_count += count
+                    self._merge_partial_results(partial, th_en_data, th_pron_en_data,
+                                                th_pron_merge_en_data, en_th_data)
+                if not batch:
+                    break
+        return processed_count
+
+    def _process_rows_columnar(
+        self,
+        rows: Iterator[Tuple],
+        th_en_data: Dict,
+        th_pron_en_data: Dict,
+        th_pron_merge_en_data: Dict,
+        en_th_data: Dict
+    ) -> int:
+        """Process rows in blocks, formatting the pronunciation, classifier and synonym columns in batch calls.
+
+        Each column of a block is deduplicated and formatted with one
+        ``TextFormatter`` batch call (spread over ``jobs`` worker processes
+        when ``jobs`` > 1); ``_process_row`` then assembles the entries from
+        the precomputed values.
+        """
+        block_size = self.config.columnar_block_size
+        paiboon = self.config.paiboon
+        clean = self.formatter.clean_text
+        extract = self.schema.extract
+        logger.info(f"Processing rows in columnar blocks of {block_size}")
+
+        executor = self.formatter.create_batch_executor(self.config.jobs) if self.config.jobs > 1 else None
+        processed_count = 0
+        try:
+            while block := list(islice(rows, block_size)):
+                fields = [extract(row) for row in block]
+                prons = self.formatter.transliterate_batch(
+                    [clean(f[_THAIPHON]).lower() for f in fields], executor)
+                classifiers = self.formatter.split_and_format_classifiers_batch(
+                    [clean(f[_CLASSIF]) for f in fields], paiboon, executor)
+                synonyms = self.formatter.split_and_format_classifiers_batch(
+                    [clean(f[_SYN]) for f in fields], paiboon, executor)
+                for row, formatted in zip(block, zip(prons, classifiers, synonyms)):
+                    if self._process_row(row, th_en_data, th_pron_en_data, th_pron_merge_en_data,
+                                         en_th_data, formatted):
+                        processed_count += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return processed_count
+
+    def _process_rows_partial(self, rows: Iterable[Tuple]) -> Tuple[int, Dict[str, Dict]]:
+        """Process rows into fresh partial maps, return (processed count, partial maps).
+
+        The partial maps refer to the entries of their own ``EntryStore``,
+        returned under ``'entries'``.
+        """
+        entries = EntryStore()
+        th_en_data = defaultdict(list)
+        th_pron_en_data = defaultdict(list)
+        th_pron_merge_en_data = defaultdict(list)
+        en_th_data = defaultdict(lambda: defaultdict(list))
+
+        processed_count = 0
+        for row in rows:
+            if self._process_row(row, th_en_data, th_pron_en_data,
+                                 th_pron_merge_en_data, en_th_data, entries=entries):
+                processed_count += 1
+
+        # Plain dicts so the result can be pickled
+        partial = {
+            'entries': entries,
+            'th_en': dict(th_en_data),
+            'th_pron_en': dict(th_pron_en_data),
+            'th_pron_merge_en': dict(th_pron_merge_en_data),
+            'en_th': {k: dict(v) for k, v in en_th_data.items()},
+        }
+        return processed_count, partial
+
+    def _process_rows_incremental(
+        self,
+        rows: Iterator[Tuple],
+        th_en_data: Dict,
+        th_pron_en_data: Dict,
+        th_pron_merge_en_data: Dict,
+        en_th_data: Dict
+    ) -> int:
+        """Process only new or changed rows, replaying stored fragments for the rest.
+
+        The row store maps a content hash of each row to its ``RowFragment``
+        (None for rows _process_row skips). Fragments are replayed in sheet
+        order straight into ``self.entries`` and the aggregated maps, so these
+        are identical to a full rebuild while rows are only formatted when
+        they are not in the store. Rows that disappeared from the sheet are
+        dropped from the store when it is saved. Every row is still read,
+        hashed and replayed, so the run stays O(total rows).
+        """
+        store = self._load_row_store()
+        new_store = {}
+        processed_count = 0
+        reused_count = 0
+
+        for row in rows:
+            key = self._row_hash(row)
+            if key in new_store:
+                fragment = new_store[key]
+                reused_count += 1
+            elif key in store:
+                fragment = new_store[key] = store[key]
+                reused_count += 1
+            else:
+                fragment = new_store[key] = self._row_fragment(row, self.entries)
+
+            if fragment is not None:
+                self._add_row_fragment(fragment, th_en_data, th_pron_en_data,
+                                       th_pron_merge_en_data, en_th_data, self.entries)
+                processed_count += 1
+
+        changed_count = len(new_store.keys() - store.keys())
+        removed_count = len(store.keys() - new_store.keys())
+        logger.info(f"Incremental build: {changed_count} new or changed rows processed, "
+                    f"{reused_count} rows reused, {removed_count} rows removed")
+        self._save_row_store(new_store)
+        return processed_count
+
+    def _row_hash(self, row: Tuple) -> bytes:
+        """Hash the used cells of a row the way _process_row sees them."""
+        cells = '\x1f'.join(str(value) if value else '' for value in self.schema.extract(row))
+        return hashlib.blake2b(cells.encode('utf-8'), digest_size=16).digest()
+
+    def _row_store_fingerprint(self) -> str:
+        """Fingerprint of the settings that change what _process_row produces."""
+        settings = (
+            self.ROW_STORE_VERSION,
+            self.config.paiboon,
+            self.config.th_pron_incl_translation_in_headword,
+            self.config.th_pron_max_headword_length,
+            self.config.th_pron_merge,
+            repr(self.config.patterns),
+        )
+        return hashlib.md5(repr(settings).encode()).hexdigest()
+
+    def _load_row_store(self) -> Dict[bytes, Optional[RowFragment]]:
+        """Load the row fragments of the previous build if they match the current settings."""
+        try:
+            if not self.config.row_store_file.exists():
+                return {}
+
+            with open(self.config.row_store_file, 'rb') as f:
+                stored = pickle.load(f)
+
+            if stored.get('fingerprint') == self._row_store_fingerprint():
+                logger.info(f"Loaded {len(stored['rows'])} rows from row store")
+                return stored['rows']
+            logger.info("Row store was built with other settings, rebuilding all rows")
+            return {}
+
+        except Exception as e:
+            logger.warning(f"Failed to load row store: {e}")
+            return {}
+
+    def _save_row_store(self, rows: Dict[bytes, Optional[RowFragment]]) -> None:
+        """Save the row fragments of this build for the next incremental run."""
+        try:
+            self.config.row_store_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.config.row_store_file, 'wb') as f:
+                pickle.dump({'fingerprint': self._row_store_fingerprint(), 'rows': rows},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            logger.info(f"Saved row store: {self.config.row_store_file}")
+        except Exception as e:
+            logger.warning(f"Failed to save row store: {e}")
+
+    def _merge_partial_results(
+        self,
+        partial: Dict[str, Dict],
+        th_en_data: Dict,
+        th_pron_en_data: Dict,
+        th_pron_merge_en_data: Dict,
+        en_th_data: Dict
+    ) -> None:
+        """Append one batch's entries to ``self.entries`` and its partial maps to the aggregated maps.
+
+        Entry IDs are shifted past the entries already stored, and level and
+        word type codes are replaced by those of the merged entries.
+        """
+        offset = self.entries.extend(partial['entries'])
+        levels = self.entries.level
+        types = self.entries.type_word
+        for key, entry_ids in partial['th_en'].items():
+            th_en_data[key].extend(offset + entry_id for entry_id in entry_ids)
+        for key, entry_ids in partial['th_pron_en'].items():
+            th_pron_en_data[key].extend(offset + entry_id for entry_id in entry_ids)
+        for key, items in partial['th_pron_merge_en'].items():
+            th_pron_merge_en_data[key].extend(
+                (thai, eng, levels[offset + entry_id], offset + entry_id) for thai, eng, _, entry_id in items)
+        for key, type_groups in partial['en_th'].items():
+            for entry_ids in type_groups.values():
+                type_code = types[offset + entry_ids[0]]
+                en_th_data[key][type_code].extend(offset + entry_id for entry_id in entry_ids)
+
+    def _log_column_mapping(self, header_row: Tuple) -> None:
+        """Log how the header row columns are used by _process_row."""
+        mapping_lines = []
+        for i, col in enumerate(header_row):
+            col_clean = str(col).replace('\n', ' ')
+            mapping_lines.append(f"{i}: {col_clean} -> {self.schema.field_for_column(i) or 'unused'}")
+        logger.info("Column mapping:\n" + "\n".join(mapping_lines))
+
     def _process_mock_data(self) -> None:
         """Process mock data for demonstration when openpyxl is not available."""
         logger.info("Processing mock dictionary data for demonstration")
@@ -194,6 +669,7 @@ class DictionaryProcessor:
         # Save to cache
         if self.config.use_cache:
             cache_data = {
+                'entries': self.entries,
                 'th_en': dict(th_en_data),
                 'th_pron_en': dict(th_pron_en_data),
                 'en_th': {k: dict(v) for k, v in en_th_data.items()}
@@ -202,17 +678,26 @@ class DictionaryProcessor:
 
         logger.info("Mock processing completed - 5 sample entries created")
 
-    def _open_output_files(self) -> Dict[str, any]:
-        """Open all output files."""
+    def _open_output_files(self, budget: Optional[SpillBudget] = None) -> Dict[str, BufferedLineWriter]:
+        """Open all output files; under a memory budget the write buffers of all files fit in it.
+
+        Pre-sorted markers of earlier runs are removed until the files are written.
+        """
         base_path = self.config.output_folder
+        buffer_size = self.config.write_buffer_mb * 1024 * 1024
+        if budget is not None:
+            write_bytes = budget.limit_bytes - budget.merge_bytes
+            buffer_size = min(buffer_size, write_bytes // (WRITE_BUFFER_BYTES_PER_CHAR * len(OUTPUT_FILES)))
 
         files = {
-            'th_en': open(base_path / "volubilis_th-en.txt", "w", encoding='utf-8'),
-            'th_pron_en': open(base_path / "volubilis_th-pr-en.txt", "w", encoding='utf-8'),
-            'en_th': open(base_path / "volubilis_en-th.txt", "w", encoding='utf-8'),
+            'th_en': BufferedLineWriter(base_path / "volubilis_th-en.txt", buffer_size),
+            'th_pron_en': BufferedLineWriter(base_path / "volubilis_th-pr-en.txt", buffer_size),
+            'en_th': BufferedLineWriter(base_path / "volubilis_en-th.txt", buffer_size),
         }
         if self.config.th_pron_merge:
-            files['th_pron_merge_en'] = open(base_path / "volubilis_th-pr-merge-en.txt", "w", encoding='utf-8')
+            files['th_pron_merge_en'] = BufferedLineWriter(base_path / "volubilis_th-pr-merge-en.txt", buffer_size)
+        for f in files.values():
+            presorted_marker(Path(f.name)).unlink(missing_ok=True)
         return files
 
     def _process_row(
@@ -221,26 +706,56 @@ class DictionaryProcessor:
         th_en_data: Dict,
         th_pron_en_data: Dict,
         th_pron_merge_en_data: Dict,
-        en_th_data: Dict
+        en_th_data: Dict,
+        formatted: Optional[Tuple[Transliteration, str, str]] = None,
+        entries: Optional[EntryStore] = None
     ) -> bool:
-        """Process a single row from the Excel file."""
-        # Validate required columns
-        if len(row) < 5 or not row[4] or not row[3]:  # English and Thai required
+        """Process a single row from the Excel file.
+
+        The row's entry is added to ``entries`` (``self.entries`` by default)
+        and the maps are given its ID; see _row_fragment and _add_row_fragment.
+        """
+        if entries is None:
+            entries = self.entries
+        fragment = self._row_fragment(row, entries, formatted)
+        if fragment is None:
             return False
+        self._add_row_fragment(fragment, th_en_data, th_pron_en_data, th_pron_merge_en_data, en_th_data, entries)
+        return True
 
-        # Extract column values
-        thai_romanized = self.formatter.clean_text(row[0] if len(row) > 0 else "")
-        easythai = self.formatter.clean_text(row[1] if len(row) > 1 else "")
-        thaiphon = self.formatter.clean_text(row[2] if len(row) > 2 else "")
-        thai = self.formatter.clean_text(row[3])
-        english = self.formatter.clean_text(row[4])
+    def _row_fragment(
+        self,
+        row: Tuple,
+        entries: EntryStore,
+        formatted: Optional[Tuple[Transliteration, str, str]] = None
+    ) -> Optional[RowFragment]:
+        """Format a row into its entry and map keys, or None if the row is skipped.
+
+        Low-cardinality cells are cleaned through the value tables of
+        ``entries``. ``formatted`` holds the row's transliteration and
+        formatted classifiers and synonyms when they were computed for a whole
+        block in columnar mode.
+        """
+        (thai_romanized, easythai, thaiphon, thai, english, type_word, usage,
+         scient, dom, classif, syn, level, note) = self.schema.extract(row)
+
+        # Validate required columns
+        if not english or not thai:  # English and Thai required
+            return None
+
+        # Clean column values
+        thai_romanized = self.formatter.clean_text(thai_romanized)
+        easythai = self.formatter.clean_text(easythai)
+        thaiphon = self.formatter.clean_text(thaiphon)
+        thai = self.formatter.clean_text(thai)
+        english = self.formatter.clean_text(english)
 
         # Split synonyms
         thai_synonyms = [s.strip() for s in re.split(r'[;=]', thai) if s.strip()]
         english_synonyms = [s.strip() for s in re.split(r'[;=]', english) if s.strip()]
 
         # Extract additional synonyms from SYN column (Thai words in parentheses)
-        syn = self.formatter.clean_text(row[11] if len(row) > 11 else "")
+        syn = self.formatter.clean_text(syn)
         if syn:
             bracketed_matches = re.findall(r'\((.*?)\)', syn)
             for match in bracketed_matches:
@@ -260,19 +775,25 @@ class DictionaryProcessor:
         # Use first synonym for display in definitions
         thai_display = thai_synonyms[0] if thai_synonyms else thai
 
-        # Additional columns
-        type_word = self.formatter.clean_text(row[6] if len(row) > 6 else "")
-        usage = self.formatter.clean_text(row[7] if len(row) > 7 else "")
-        scient = self.formatter.clean_text(row[8] if len(row) > 8 else "")
-        dom = self.formatter.clean_text(row[9] if len(row) > 9 else "")
-        classif = self.formatter.clean_text(row[10] if len(row) > 10 else "")
-        syn = self.formatter.clean_text(row[11] if len(row) > 11 else "")
-        level = self.formatter.clean_text(row[12] if len(row) > 12 else "")
-        note = self.formatter.clean_text(row[13] if len(row) > 13 else "")
+        # Additional columns; the low-cardinality ones are cleaned once per distinct cell
+        tables = entries.tables
+        clean = self.formatter.clean_text
+        type_word = tables['type_word'].clean_cell(type_word, clean)
+        usage = tables['usage'].clean_cell(usage, clean)
+        scient = clean(scient)
+        dom = tables['dom'].clean_cell(dom, clean)
+        classif = clean(classif)
+        level = tables['level'].clean_cell(level, clean)
+        note = clean(note)
 
         # Format pronunciation
-        pron_formatted = self.formatter.format_tones(thaiphon.lower(), self.config.paiboon)
-        pron_search = self.formatter.format_pronunciation_search(pron_formatted, self.config.paiboon)
+        if formatted is None:
+            pron = self.formatter.transliterate(thaiphon.lower())
+            classifiers = synonyms = None
+        else:
+            pron, classifiers, synonyms = formatted
+        pron_formatted = pron.tones(self.config.paiboon)
+        pron_search = pron.search(self.config.paiboon)
 
         # Create pronunciation headword
         if self.config.th_pron_incl_translation_in_headword:
@@ -284,33 +805,54 @@ class DictionaryProcessor:
         # Truncate headword if too long
         pron_headword = pron_headword[:self.config.th_pron_max_headword_length]
 
-        # Format definition
-        definition = self._format_definition(
-            thai_display, pron_formatted, type_word, usage, classif, syn, scient, note, level, english_word, dom
+        # Pronunciation merge keys
+        merge_synonyms = ()
+        if self.config.th_pron_merge and pron_search:
+            merge_synonyms = tuple(
+                (thai_syn, english_synonyms[i] if i < len(english_synonyms) else "")
+                for i, thai_syn in enumerate(thai_synonyms)
+            )
+
+        entry = self._definition_entry(
+            thai_display, pron_formatted, type_word, usage, classif, syn, scient, note, level, english_word, dom,
+            classifiers=classifiers, synonyms=synonyms
         )
+        return RowFragment(entry, thai_word, pron_headword, pron_search, merge_synonyms, english_word)
 
-        # Collect for pron merge
-        if self.config.th_pron_merge:
-            for i, thai_syn in enumerate(thai_synonyms):
-                eng_syn = english_synonyms[i] if i < len(english_synonyms) else ""
-                base_pron = pron_search
-                if base_pron:
-                    th_pron_merge_en_data[base_pron].append((thai_syn, eng_syn, level, definition))
+    def _add_row_fragment(
+        self,
+        fragment: RowFragment,
+        th_en_data: Dict,
+        th_pron_en_data: Dict,
+        th_pron_merge_en_data: Dict,
+        en_th_data: Dict,
+        entries: EntryStore
+    ) -> None:
+        """Add a row's entry to ``entries`` and its ID to the maps.
 
-        # Add sorting prefix for Thai-English
-        sort_prefix = self._get_sort_prefix(level)
+        The merge items and en-th groups use the entry's level and word type
+        codes.
+        """
+        # Store the definition parts; the maps refer to them by ID
+        entry_id = entries.add(fragment.entry)
+
+        # Collect for pron merge
+        if fragment.merge_synonyms:
+            level_code = entries.level[entry_id]
+            merge_items = th_pron_merge_en_data[fragment.base_pron]
+            for thai_syn, eng_syn in fragment.merge_synonyms:
+                merge_items.append((thai_syn, eng_syn, level_code, entry_id))
 
         # Thai to English entries
-        th_en_data[thai_word].append(sort_prefix + definition)
+        th_en_data[fragment.thai_word].append(entry_id)
 
         # Thai with pronunciation to English
-        if pron_headword:
-            th_pron_en_data[pron_headword].append(sort_prefix + definition)
+        if fragment.pron_headword:
+            th_pron_en_data[fragment.pron_headword].append(entry_id)
 
             # English to Thai entries
-            self._add_english_to_thai_entries(english_word, definition, type_word, en_th_data)
-
-        return True
+            self._add_english_to_thai_entries(fragment.english_word, entry_id, entries.type_word[entry_id],
+                                              en_th_data)
 
     def _convert_defaultdict_to_dict(self, d):
         """Recursively convert defaultdict structures to regular dicts for pickling."""
@@ -327,7 +869,8 @@ class DictionaryProcessor:
             mtime = 0
 
         # Create a hash of relevant configuration
-        config_str = f"{self.config.columns}_{self.config.paiboon}_{self.config.debug_test_1000_rows}_{mtime}"
+        config_str = (f"{self.CACHE_VERSION}_{self.config.columns}_{self.config.paiboon}_"
+                      f"{self.config.debug_test_1000_rows}_{mtime}")
         return hashlib.md5(config_str.encode()).hexdigest()
 
     def _save_to_cache(self, data: Dict[str, Any]) -> None:
@@ -369,6 +912,7 @@ class DictionaryProcessor:
 
     def _write_cached_data_to_files(self, data: Dict[str, Any]) -> None:
         """Write cached data to output files."""
+        self.entries = data['entries']
         th_en_data = data['th_en']
         th_pron_en_data = data['th_pron_en']
         en_th_data = data['en_th']
@@ -377,14 +921,38 @@ class DictionaryProcessor:
         # Open output files
         output_files = self._open_output_files()
 
-        try:
-            # Write the processed data to files
-            self._write_output_files(output_files, th_en_data, th_pron_en_data,
-                                   th_pron_merge_en_data, en_th_data)
-        finally:
-            # Close all files
-            for f in output_files.values():
-                f.close()
+        self._write_outputs(output_files, th_en_data, th_pron_en_data,
+                            th_pron_merge_en_data, en_th_data)
+
+    def _write_outputs(self, output_files, th_en_data, th_pron_en_data, th_pron_merge_en_data,
+                       en_th_data, entry_count: int = 0) -> None:
+        """Write and close the output files, recording the write stage.
+
+        Files written in StarDict order get a ``presorted_marker`` next to
+        them, so the txt files themselves carry no extra line.
+        """
+        with self.metrics.stage("write") as stage:
+            try:
+                self._write_output_files(output_files, th_en_data, th_pron_en_data,
+                                         th_pron_merge_en_data, en_th_data)
+            finally:
+                # Close all files
+                for f in output_files.values():
+                    f.close()
+            if self.config.stardict_order:
+                for f in output_files.values():
+                    presorted_marker(Path(f.name)).touch()
+            stage.rows = entry_count
+            self._record_output_stats(output_files)
+            stage.bytes_written = sum(f.bytes_written for f in output_files.values())
+
+    def _record_output_stats(self, output_files: Dict[str, BufferedLineWriter]) -> None:
+        """Log the bytes and lines written to each output file and add them to the run metrics."""
+        stats = {name: f.stats() for name, f in output_files.items()}
+        for name, file_stats in stats.items():
+            logger.info(f"Wrote {file_stats['lines']} lines ({file_stats['bytes'] / 1024 / 1024:.1f} MB) "
+                        f"to {Path(file_stats['path']).name}")
+        self.metrics.counters['output_files'] = stats
 
     def _format_definition(
         self,
@@ -398,160 +966,217 @@ class DictionaryProcessor:
         note: str,
         level: str,
         english: str,
-        dom: str = ""
+        dom: str = "",
+        classifiers: Optional[str] = None,
+        synonyms: Optional[str] = None
     ) -> str:
-        """Format a complete definition string with standard HTML and CSS classes."""
-        definition = f'<span class="thai"><strong>{thai}</strong></span> '
+        """Format a complete definition string with standard HTML and CSS classes.
 
-        # Add pronunciation
-        if pron_formatted:
-            if self.config.paiboon:
-                definition += f'<span class="pron">[{self.formatter.format_final_pronunciation(pron_formatted, self.config.paiboon)}]</span> '
-            else:
-                definition += f'<span class="pron">[{self.formatter.format_final_pronunciation(pron_formatted, self.config.paiboon)}]</span> '
+        ``classifiers`` and ``synonyms`` are the already formatted ``classif``
+        and ``syn`` values, if the caller has them.
+        """
+        return self.html_renderer.render(self._definition_entry(
+            thai, pron_formatted, type_word, usage, classif, syn, scient, note, level, english, dom,
+            classifiers=classifiers, synonyms=synonyms
+        ))
 
-        # Add type and usage
-        type_usage = f"{type_word.lower()} {usage}".strip()
-        if type_usage:
-            definition += f'<span class="type">{type_usage}</span> '
+    def _definition_entry(
+        self,
+        thai: str,
+        pron_formatted: str,
+        type_word: str,
+        usage: str,
+        classif: str,
+        syn: str,
+        scient: str,
+        note: str,
+        level: str,
+        english: str,
+        dom: str = "",
+        classifiers: Optional[str] = None,
+        synonyms: Optional[str] = None
+    ) -> Entry:
+        """Format the parts of a definition; see _format_definition."""
+        # Pronunciation
+        pron = None
+        if pron_formatted:
+            pron = self.formatter.format_final_pronunciation(pron_formatted, self.config.paiboon)
 
-        # Add classifier
+        # Classifier
         if classif:
-            classifiers = self.formatter.split_and_format_classifiers(classif, self.config.paiboon)
-            if classifiers.strip():
-                definition += f'<span class="clf">classifier: {classifiers}</span> '
-
-        # Add definition
-        english_formatted = english.replace("|", ", ").replace(";", ", ")
-        definition += f'<br><span class="def">{english_formatted}</span><br>'
+            if classifiers is None:
+                classifiers = self.formatter.split_and_format_classifiers(classif, self.config.paiboon)
+        if not classif or not classifiers.strip():
+            classifiers = ""
 
-        # Add synonyms
+        # Synonyms
         if syn:
-            synonyms = self.formatter.split_and_format_synonyms(syn, self.config.paiboon)
-            if synonyms.strip():
-                definition += f'<span class="syn">syn: {synonyms}</span><br>'
-
-        # Add scientific name
-        if scient and scient.strip():
-            definition += f'<span class="science">scient: {scient.replace("|", ", ")}</span><br>'
-
-        # Add level
-        level_info = self._format_level_info(level, dom)
-        if level_info:
-            definition += level_info
-            definition += '<br>'
-
-        # Add note
-        if note and note.strip():
-            definition += f'<span class="note">note: {note}</span><br>'
-
-        return definition
+            if synonyms is None:
+                synonyms = self.formatter.split_and_format_synonyms(syn, self.config.paiboon)
+        if not syn or not synonyms.strip():
+            synonyms = ""
+
+        return Entry(
+            thai=thai,
+            pron=pron,
+            type_word=type_word,
+            usage=usage,
+            classifiers=classifiers,
+            english=english.replace("|", ", ").replace(";", ", "),
+            synonyms=synonyms,
+            scient=scient.replace("|", ", ") if scient and scient.strip() else "",
+            level=level,
+            dom=dom,
+            note=note if note and note.strip() else "",
+        )
 
+    def _renderer(self, output: str) -> DefinitionRenderer:
+        """Renderer of the flavor selected for an output file."""
+        return get_renderer(self.config.output_flavors.get(output, self.config.definition_flavor))
+
+    def _entry_sort_key(self, entry_id: int, by_level: bool = False) -> Tuple[str, ...]:
+        """Sort key of an entry: its Thai headword in collation order, after its level when ``by_level``."""
+        thai_key = thai_collation_key(self.entries.thai[entry_id])
+        if by_level:
+            return self._level_code_sort_prefix(self.entries.level[entry_id]), thai_key
+        return (thai_key,)
+
+    def _sorted_definitions(self, entry_ids: Iterable[int], renderer: DefinitionRenderer,
+                            by_level: bool = False) -> List[str]:
+        """Definitions of entries rendered with ``renderer``, in output order.
+
+        Entries sort by ``_entry_sort_key``; entries with equal keys sort by
+        their default (HTML) rendering, so every flavor lists them in the same
+        order. The HTML is only rendered for such ties.
+        """
+        keyed = sorted((self._entry_sort_key(entry_id, by_level), entry_id) for entry_id in entry_ids)
+        definitions = []
+        for _, group in groupby(keyed, key=itemgetter(0)):
+            entries = [self.entries.get(entry_id) for _, entry_id in group]
+            if len(entries) > 1:
+                entries.sort(key=self.html_renderer.render)
+            definitions.extend(map(renderer.render, entries))
+        return definitions
 
     def _get_sort_prefix(self, level: str) -> str:
         """Get sorting prefix based on level."""
-        if len(level) > 1:
-            return level[:2]
-        elif len(level) == 1:
-            return level + " "
-        return "  "
+        return level_sort_prefix(level)
+
+    def _level_value(self, level_code: int) -> str:
+        """Level string of an encoded level."""
+        return self.entries.tables['level'].values[level_code]
+
+    def _level_code_sort_prefix(self, level_code: int) -> str:
+        """Sorting prefix of an encoded level."""
+        return level_sort_prefix(self.entries.tables['level'].values[level_code])
 
     def _format_level_info(self, level: str, dom: str) -> str:
         """Format level and domain information with standard HTML."""
-        parts = []
-        if level:
-            parts.append(f"Level: {level}")
-        if level and dom:
-            parts.append(" - ")
-        if dom:
-            parts.append(f"Category: {dom.lower()}")
-
-        if parts:
-            return f'<span class="level">{"".join(parts)}</span>'
+        text = level_text(level, dom)
+        if text:
+            return f'<span class="level">{text}</span>'
         return ""
 
     def _add_english_to_thai_entries(
         self,
         english: str,
-        definition: str,
-        type_word: str,
+        entry_id: int,
+        type_code: int,
         en_th_data: Dict
     ) -> None:
-        """Add entries to English to Thai data structure."""
-
-
-        # Set description to full ENG field for complete meaning context, replace | with ,
-        definition = re.sub(r'<span class="description">.*?</span>', f'<span class="description">{english.replace("|", ", ")}</span>', definition)
-
+        """Add an entry to the English to Thai data structure under each English term, grouped by word type code."""
         english_terms = [term.strip() for term in english.split("|") if term.strip()]
 
         for term in english_terms:
-            en_th_data[term][type_word].append(definition)
+            en_th_data[term][type_code].append(entry_id)
 
     def _write_output_files(self, files, th_en_data, th_pron_en_data, th_pron_merge_en_data, en_th_data):
-        """Write all processed data to output files."""
-        # Thai to English
-        for thai_word, definitions in th_en_data.items():
-            definitions.sort()
-            for definition in definitions:
-                files['th_en'].write(f"{thai_word}\t{definition[2:]}\n")
-
-        # Thai pronunciation to English
+        """Write all processed data to output files, rendering each entry as its line is written.
+
+        Each output file is written by its own task; with ``write_threads`` above
+        1 the tasks run concurrently in a thread pool. Headwords are written in
+        StarDict order unless ``stardict_order`` is off.
+        """
+        th_en_order, th_pron_en_order, th_pron_merge_en_order, en_th_order = self._headword_orders()
+        tasks = [(self._write_th_en, files['th_en'], th_en_data, th_en_order, self._renderer('th_en'))]
         if self.config.th_pron:
-            for pron_word, definitions in th_pron_en_data.items():
-                definitions.sort()
-                key = self.config.th_pron_prefix + pron_word if self.config.th_pron_prefix else pron_word
-                for definition in definitions:
-                    if self.config.th_pron_incl_translation_in_headword:
-                        # Extract English from definition or use full
-                        # For simplicity, use the definition as is, but perhaps modify pron_headword to include eng
-                        # Wait, currently pron_entry is pron - thai, definition is the full def
-                        # To include eng, perhaps change pron_entry to pron - thai (eng)
-                        # But since eng is in definition, maybe keep as is, or adjust
-                        # For now, since definition includes eng, just write as is
-                        files['th_pron_en'].write(f"{key}\t{definition[2:]}\n")
-                    else:
-                        # Remove eng from definition? But complicated.
-                        # For now, assume if not incl, just thai
-                        # But to keep simple, always include for now
-                        files['th_pron_en'].write(f"{key}\t{definition[2:]}\n")
-
-        # Thai pronunciation merge to English
+            tasks.append((self._write_th_pron_en, files['th_pron_en'], th_pron_en_data, th_pron_en_order,
+                          self._renderer('th_pron_en')))
         if self.config.th_pron_merge and 'th_pron_merge_en' in files:
-            for base_pron, items in th_pron_merge_en_data.items():
-                # Sort items by thai, then level
-                sorted_items = self.formatter.sort_thai_words_by_tone_and_level(items, self._get_sort_prefix)
-                key = self.config.th_pron_merge_prefix + base_pron if self.config.th_pron_merge_prefix else base_pron
-                key = key[:self.config.th_pron_merge_max_headword_length]
-                thai_list = []
-                for thai, eng, _, _ in sorted_items:
-                    if self.config.th_pron_merge_incl_translation_in_headword and eng:
-                        thai_list.append(f"{thai} ({eng})")
-                    else:
-                        thai_list.append(thai)
-                headword_part = ", ".join(thai_list)
-                key = self.config.th_pron_merge_prefix + base_pron + " - " + headword_part
-                key = key[:self.config.th_pron_merge_max_headword_length]
-                # Merge all definitions with <br><br> separator
-                definitions = [item[3] for item in sorted_items if item[3]]
-                value = "<br><br>".join(definitions) if definitions else ""
-                files['th_pron_merge_en'].write(f"{key}\t{value}\n")
-
-        # English to Thai
-        import re
-        for english_word, type_groups in en_th_data.items():
-            # Sort types
-            sorted_types = sorted(type_groups.items())
-
-            type_entries = []
-            for word_type, definitions in sorted_types:
-                definitions.sort()
-                #definitions = [d[:-4] if d.endswith('<br>') else d for d in definitions]
-                def_text = " ".join(definitions)
-                if word_type.strip():
-                    type_entries.append(f'<span class="word_type">{word_type}</span><br>{def_text}')
+            tasks.append((self._write_th_pron_merge_en, files['th_pron_merge_en'], th_pron_merge_en_data,
+                          th_pron_merge_en_order, self._renderer('th_pron_merge_en')))
+        tasks.append((self._write_en_th, files['en_th'], en_th_data, en_th_order, self._renderer('en_th')))
+
+        def run(write, f, data, key_order, renderer):
+            write(f, self._headword_items(data, key_order), renderer)
+
+        threads = min(self.config.write_threads, len(tasks))
+        if threads > 1:
+            with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="volubilis-write") as pool:
+                futures = [pool.submit(run, *task) for task in tasks]
+                for future in futures:
+                    future.result()
+        else:
+            for task in tasks:
+                run(*task)
+
+    def _write_th_en(self, f, th_en_items, renderer: DefinitionRenderer) -> None:
+        """Write the Thai to English file."""
+        for thai_word, entry_ids in th_en_items:
+            for definition in self._sorted_definitions(entry_ids, renderer, True):
+                f.write(f"{thai_word}\t{definition}\n")
+
+    def _write_th_pron_en(self, f, th_pron_en_items, renderer: DefinitionRenderer) -> None:
+        """Write the Thai pronunciation to English file."""
+        for pron_word, entry_ids in th_pron_en_items:
+            key = self.config.th_pron_prefix + pron_word if self.config.th_pron_prefix else pron_word
+            for definition in self._sorted_definitions(entry_ids, renderer, True):
+                if self.config.th_pron_incl_translation_in_headword:
+                    # Extract English from definition or use full
+                    # For simplicity, use the definition as is, but perhaps modify pron_headword to include eng
+                    # Wait, currently pron_entry is pron - thai, definition is the full def
+                    # To include eng, perhaps change pron_entry to pron - thai (eng)
+                    # But since eng is in definition, maybe keep as is, or adjust
+                    # For now, since definition includes eng, just write as is
+                    f.write(f"{key}\t{definition}\n")
                 else:
-                    type_entries.append(def_text)
-
-            word_definition = f'<span class="english"><strong>{english_word}</strong></span> <br>' + "<br>".join(type_entries)
-            files['en_th'].write(f"{english_word}\t{word_definition}\n")
+                    # Remove eng from definition? But complicated.
+                    # For now, assume if not incl, just thai
+                    # But to keep simple, always include for now
+                    f.write(f"{key}\t{definition}\n")
+
+    def _write_th_pron_merge_en(self, f, th_pron_merge_en_items, renderer: DefinitionRenderer) -> None:
+        """Write the merged Thai pronunciation to English file."""
+        for base_pron, items in th_pron_merge_en_items:
+            # Sort items by tone, then level, then Thai collation order
+            sorted_items = self.formatter.sort_thai_words_by_tone_and_level(items, self._level_code_sort_prefix)
+            key = self.config.th_pron_merge_prefix + base_pron if self.config.th_pron_merge_prefix else base_pron
+            key = key[:self.config.th_pron_merge_max_headword_length]
+            thai_list = []
+            for thai, eng, _, _ in sorted_items:
+                if self.config.th_pron_merge_incl_translation_in_headword and eng:
+                    thai_list.append(f"{thai} ({eng})")
+                else:
+                    thai_list.append(thai)
+            headword_part = ", ".join(thai_list)
+            key = self.config.th_pron_merge_prefix + base_pron + " - " + headword_part
+            key = key[:self.config.th_pron_merge_max_headword_length]
+            # Merge all definitions with the flavor's separator (<br><br> in HTML)
+            value = renderer.merge_article(renderer.render(self.entries.get(item[3])) for item in sorted_items)
+            f.write(f"{key}\t{value}\n")
+
+    def _write_en_th(self, f, en_th_items, renderer: DefinitionRenderer) -> None:
+        """Write the English to Thai file."""
+        # Word types are grouped by code; rank the codes once in word type order
+        type_values = self.entries.tables['type_word'].values
+        type_rank = [0] * len(type_values)
+        for rank, type_code in enumerate(sorted(range(len(type_values)), key=type_values.__getitem__)):
+            type_rank[type_code] = rank
+        for english_word, type_groups in en_th_items:
+            # Sort types
+            sorted_types = sorted(type_groups.items(), key=lambda group: type_rank[group[0]])
+            word_definition = renderer.en_th_article(english_word, (
+                (type_values[type_code],
+                 self._sorted_definitions(entry_ids, renderer))
+                for type_code, entry_ids in sorted_types))
+            f.write(f"{english_word}\t{word_definition}\n")
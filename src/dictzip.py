@@ -0,0 +1,181 @@
+"""Dictzip (.dict.dz) compression of Stardict .dict files.
+
+A dictzip file is a gzip file whose deflate stream is cut into chunks of
+``chunk_size`` uncompressed bytes, each compressed without references to
+the ones before it. The ``RA`` field of the gzip header lists the
+compressed length of every chunk, so a reader can inflate just the chunks
+an article lies in instead of the whole file. Any gzip tool still reads
+the file as a whole.
+
+Because the chunks are independent, ``compress_file`` compresses them in a
+thread pool (zlib releases the GIL while it deflates) and writes them in
+order. The chunk table is written into the header once all lengths are
+known.
+"""
+
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .exceptions import StardictError
+
+# Chunk size of the dictzip tool; even incompressible chunks of this size
+# compress to less than 64 KB, as the 16-bit chunk table requires
+DEFAULT_CHUNK_SIZE = 58315
+MAX_CHUNK_SIZE = DEFAULT_CHUNK_SIZE
+DEFAULT_LEVEL = 9
+
+# Chunks the RA field can list: its length, like the whole extra field, is 16-bit
+MAX_CHUNKS = (0xFFFF - 10) // 2
+
+_FEXTRA = 0x04
+_FNAME = 0x08
+_OS_UNIX = 3
+
+
+def chunk_count(size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Chunks a file of ``size`` bytes is cut into; an empty file still has one."""
+    return max(1, -(-size // chunk_size))
+
+
+def _compress_chunk(data: bytes, level: int, last: bool) -> bytes:
+    """Deflate one chunk on its own; only the last one ends the deflate stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_FULL_FLUSH)
+
+
+def _header(name: str, mtime: int, level: int, chunk_size: int, lengths: List[int]) -> bytes:
+    xfl = 2 if level == 9 else 4 if level == 1 else 0
+    random_access = struct.pack('<HHH', 1, chunk_size, len(lengths)) + struct.pack(f'<{len(lengths)}H', *lengths)
+    extra = b'RA' + struct.pack('<H', len(random_access)) + random_access
+    return (struct.pack('<BBBBIBB', 0x1f, 0x8b, zlib.DEFLATED, _FEXTRA | _FNAME, mtime, xfl, _OS_UNIX)
+            + struct.pack('<H', len(extra)) + extra
+            + name.encode('latin-1', 'replace') + b'\0')
+
+
+def compress_file(source: Path, destination: Optional[Path] = None, level: int = DEFAULT_LEVEL,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, threads: int = 0) -> Path:
+    """Compress ``source`` to dictzip at ``destination`` (default: ``source`` + '.dz').
+
+    Chunks are compressed by ``threads`` threads (0: one per CPU) and the
+    output does not depend on the thread count. The source is left in place.
+    """
+    if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"Dictzip chunk size must be between 1 and {MAX_CHUNK_SIZE}")
+    destination = destination or source.with_name(source.name + '.dz')
+    stat = source.stat()
+    count = chunk_count(stat.st_size, chunk_size)
+    if count > MAX_CHUNKS:
+        raise StardictError(f"{source.name} is too large for dictzip with {chunk_size} byte chunks "
+                            f"({count} chunks, at most {MAX_CHUNKS})")
+    threads = threads or os.cpu_count() or 1
+    name = source.name
+    mtime = int(stat.st_mtime) & 0xFFFFFFFF
+
+    lengths: List[int] = []
+    crc = 0
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        # Placeholder header; the chunk table is filled in at the end
+        dst.write(_header(name, mtime, level, chunk_size, [0] * count))
+
+        def chunks() -> Iterator[bytes]:
+            nonlocal crc
+            for _ in range(count):
+                data = src.read(chunk_size)
+                crc = zlib.crc32(data, crc)
+                yield data
+
+        def write(compressed: bytes) -> None:
+            lengths.append(len(compressed))
+            dst.write(compressed)
+
+        if threads == 1:
+            for index, data in enumerate(chunks()):
+                write(_compress_chunk(data, level, index == count - 1))
+        else:
+            with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="volubilis-dictzip") as executor:
+                # Bounded window of chunks in flight, written back in order
+                pending = deque()
+                for index, data in enumerate(chunks()):
+                    pending.append(executor.submit(_compress_chunk, data, level, index == count - 1))
+                    if len(pending) >= threads * 4:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+
+        dst.write(struct.pack('<II', crc, stat.st_size & 0xFFFFFFFF))
+        dst.seek(0)
+        dst.write(_header(name, mtime, level, chunk_size, lengths))
+    return destination
+
+
+class DictzipReader:
+    """Random access to a dictzip file through its chunk table."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.data = path.read_bytes()
+        data = self.data
+        if data[:3] != b'\x1f\x8b\x08' or len(data) < 18:
+            raise StardictError(f"{path.name} is not a gzip file")
+        flags, = struct.unpack_from('<B', data, 3)
+        if not flags & _FEXTRA:
+            raise StardictError(f"{path.name} has no dictzip chunk table")
+        extra_length, = struct.unpack_from('<H', data, 10)
+        extra_end = 12 + extra_length
+        pos = 12
+        self.chunk_size = 0
+        self.lengths: List[int] = []
+        while pos + 4 <= extra_end:
+            field_id = data[pos:pos + 2]
+            field_length, = struct.unpack_from('<H', data, pos + 2)
+            if field_id == b'RA':
+                version, self.chunk_size, count = struct.unpack_from('<HHH', data, pos + 4)
+                if version != 1:
+                    raise StardictError(f"{path.name}: unsupported dictzip version {version}")
+                self.lengths = list(struct.unpack_from(f'<{count}H', data, pos + 10))
+            pos += 4 + field_length
+        if not self.lengths:
+            raise StardictError(f"{path.name} has no dictzip chunk table")
+        pos = extra_end
+        for flag in (_FNAME, 0x10):  # original file name, comment
+            if flags & flag:
+                pos = data.index(b'\0', pos) + 1
+        if flags & 0x02:  # header CRC
+            pos += 2
+        # Start of every chunk in the file, plus the end of the last one
+        self.offsets = [pos]
+        for length in self.lengths:
+            self.offsets.append(self.offsets[-1] + length)
+        if self.offsets[-1] + 8 != len(data):
+            raise StardictError(f"{path.name}: chunk table does not match the file size")
+        self.crc, self.size = struct.unpack_from('<II', data, self.offsets[-1])
+
+    def chunk(self, index: int) -> bytes:
+        """Uncompressed contents of one chunk."""
+        compressed = self.data[self.offsets[index]:self.offsets[index + 1]]
+        try:
+            return zlib.decompressobj(-zlib.MAX_WBITS).decompress(compressed)
+        except zlib.error as e:
+            raise StardictError(f"{self.path.name}: chunk {index} is corrupt ({e})") from e
+
+    def read(self, offset: int, size: int) -> bytes:
+        """``size`` bytes at ``offset`` of the uncompressed file, inflating only the chunks they lie in."""
+        if size <= 0:
+            return b''
+        first = offset // self.chunk_size
+        last = (offset + size - 1) // self.chunk_size
+        data = b''.join(self.chunk(index) for index in range(first, min(last + 1, len(self.lengths))))
+        start = offset - first * self.chunk_size
+        return data[start:start + size]
+
+    def read_all(self) -> bytes:
+        """Whole uncompressed file, checked against the gzip CRC and size."""
+        data = b''.join(self.chunk(index) for index in range(len(self.lengths)))
+        if zlib.crc32(data) != self.crc or len(data) & 0xFFFFFFFF != self.size:
+            raise StardictError(f"{self.path.name}: CRC or size check failed")
+        return data
@@ -0,0 +1,165 @@
+"""Compact table of dictionary entries, addressed by integer ID.
+
+Every accepted row becomes one entry: the formatted parts its definition is
+built from, kept in one list per field. The aggregation maps of
+``DictionaryProcessor`` hold entry IDs instead of rendered definition
+strings, so a row's definition is stored once however many th-en, th-pron,
+merged and en-th headwords it appears under, and is only rendered when an
+output line is written.
+
+Fields with few distinct values (word type, usage, classifiers, level,
+category) are dictionary-encoded: each has a ``ValueTable`` of its distinct
+values, and the entry columns are arrays of their integer codes.
+"""
+
+from array import array
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class Entry(NamedTuple):
+    """Formatted parts of one definition; empty parts are left out when it is rendered."""
+
+    thai: str
+    pron: Optional[str]  # None when the row has no pronunciation
+    type_word: str
+    usage: str
+    classifiers: str
+    english: str
+    synonyms: str
+    scient: str
+    level: str
+    dom: str
+    note: str
+
+
+# Entry fields stored as codes into a ValueTable
+ENCODED_FIELDS = ('type_word', 'usage', 'classifiers', 'level', 'dom')
+
+
+class ValueTable:
+    """Distinct values of one column, numbered in first-seen order."""
+
+    __slots__ = ('values', 'codes', 'cells')
+
+    def __init__(self, values: Tuple[str, ...] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        # Raw cell text to its cleaned value, see clean_cell
+        self.cells: Dict[str, str] = {}
+        for value in values:
+            self.encode(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getstate__(self):
+        return tuple(self.values)
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state)
+
+    def encode(self, value: str) -> int:
+        """Return the code of a value, adding it to the table if it is new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def clean_cell(self, cell, clean: Callable[[str], str]) -> str:
+        """Clean a raw cell of this column, once per distinct cell text.
+
+        Rows with the same cell text share one value object, so repeated
+        values are neither cleaned nor stored again.
+        """
+        if type(cell) is not str:
+            return clean(cell)
+        value = self.cells.get(cell)
+        if value is None:
+            value = self.cells[cell] = self.values[self.encode(clean(cell))]
+        return value
+
+
+class EntryStore:
+    """Column store of ``Entry`` records; ``add`` returns the ID of the new entry."""
+
+    __slots__ = Entry._fields + ('tables',)
+
+    def __init__(self):
+        for field in Entry._fields:
+            setattr(self, field, array('I') if field in ENCODED_FIELDS else [])
+        self.tables: Dict[str, ValueTable] = {field: ValueTable() for field in ENCODED_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.thai)
+
+    def __getstate__(self):
+        return self._columns(), self.tables
+
+    def __setstate__(self, state) -> None:
+        columns, self.tables = state
+        for field, column in zip(Entry._fields, columns):
+            setattr(self, field, column)
+
+    def _columns(self) -> Tuple:
+        return (self.thai, self.pron, self.type_word, self.usage, self.classifiers, self.english,
+                self.synonyms, self.scient, self.level, self.dom, self.note)
+
+    def add(self, entry: Entry) -> int:
+        """Append an entry and return its ID."""
+        entry_id = len(self.thai)
+        tables = self.tables
+        self.thai.append(entry.thai)
+        self.pron.append(entry.pron)
+        self.type_word.append(tables['type_word'].encode(entry.type_word))
+        self.usage.append(tables['usage'].encode(entry.usage))
+        self.classifiers.append(tables['classifiers'].encode(entry.classifiers))
+        self.english.append(entry.english)
+        self.synonyms.append(entry.synonyms)
+        self.scient.append(entry.scient)
+        self.level.append(tables['level'].encode(entry.level))
+        self.dom.append(tables['dom'].encode(entry.dom))
+        self.note.append(entry.note)
+        return entry_id
+
+    def get(self, entry_id: int) -> Entry:
+        """Return the entry with the given ID."""
+        tables = self.tables
+        return Entry(
+            self.thai[entry_id],
+            self.pron[entry_id],
+            tables['type_word'].values[self.type_word[entry_id]],
+            tables['usage'].values[self.usage[entry_id]],
+            tables['classifiers'].values[self.classifiers[entry_id]],
+            self.english[entry_id],
+            self.synonyms[entry_id],
+            self.scient[entry_id],
+            tables['level'].values[self.level[entry_id]],
+            tables['dom'].values[self.dom[entry_id]],
+            self.note[entry_id],
+        )
+
+    def extend(self, other: 'EntryStore') -> int:
+        """Append the entries of another store; their IDs are shifted by the returned offset.
+
+        Codes of the other store are translated to the codes of this one.
+        """
+        offset = len(self.thai)
+        for field, column, values in zip(Entry._fields, self._columns(), other._columns()):
+            if field in ENCODED_FIELDS:
+                codes = [self.tables[field].encode(value) for value in other.tables[field].values]
+                values = [codes[code] for code in values]
+            column.extend(values)
+        return offset
+
+    def distinct_counts(self) -> Dict[str, int]:
+        """Number of distinct values of each encoded field."""
+        return {field: len(table) for field, table in self.tables.items()}
+
+    def __iter__(self) -> Iterator[Entry]:
+        return map(self.get, range(len(self)))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EntryStore):
+            return NotImplemented
+        return list(self) == list(other)
@@ -23,4 +23,14 @@ class ExcelProcessingError(DictionaryProcessorError):
 
 class ValidationError(DictionaryProcessorError):
     """Raised when data validation fails."""
-    pass
\ No newline at end of file
+    pass
+
+
+class StardictError(FileProcessingError):
+    """Raised when a Stardict dictionary cannot be written or fails verification."""
+    pass
+
+
+class StardictOrderError(StardictError):
+    """Raised when articles streamed as pre-sorted are not in Stardict order."""
+    pass
@@ -5,8 +5,11 @@ import logging
 import sys
 from pathlib import Path
 
-from .config import Config
+from .config import Config, parse_output_flavors
 from .dictionary_processor import DictionaryProcessor
+from .metrics import RunMetrics
+from .renderer import FLAVORS
+from .xlsx_reader import READERS
 
 
 def setup_logging(verbose: bool = False) -> None:
@@ -67,6 +70,97 @@ Examples:
         help='Process only first 1000 rows for debugging'
     )
 
+    parser.add_argument(
+        '--reader',
+        choices=sorted(READERS),
+        help='Excel reader backend (default: native)'
+    )
+
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help='Read rows from a columnar snapshot of the workbook, building it on first use'
+    )
+
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only reprocess rows that changed since the previous build'
+    )
+
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        metavar='MB',
+        help='Spill aggregated entries to temp files above this many MB (default: unlimited)'
+    )
+
+    parser.add_argument(
+        '--columnar',
+        action='store_true',
+        help='Format the pronunciation, classifier and synonym columns in batches of rows'
+    )
+
+    parser.add_argument(
+        '--formatter-cache',
+        type=int,
+        metavar='N',
+        help='Memoize up to N pronunciation/classifier formatting results (default: disabled)'
+    )
+
+    parser.add_argument(
+        '--transform-store',
+        action='store_true',
+        help='Reuse formatting results of previous runs from a persistent store in the output directory'
+    )
+
+    parser.add_argument(
+        '--flavor',
+        choices=sorted(FLAVORS),
+        help='Definition markup of all outputs: html, compact HTML without CSS classes, or plain text (default: html)'
+    )
+
+    parser.add_argument(
+        '--output-flavor',
+        action='append',
+        default=[],
+        metavar='OUTPUT=FLAVOR',
+        help='Definition markup of one output (th_en, th_pron_en, th_pron_merge_en, en_th); repeatable'
+    )
+
+    parser.add_argument(
+        '--write-buffer',
+        type=int,
+        metavar='MB',
+        help='Collect this many MB of output text per write call (default: 8)'
+    )
+
+    parser.add_argument(
+        '--write-threads',
+        type=int,
+        metavar='N',
+        help='Number of threads writing the output files concurrently (default: 4)'
+    )
+
+    parser.add_argument(
+        '--no-stardict-order',
+        action='store_true',
+        help='Write headwords in first-seen order instead of pre-sorted StarDict order'
+    )
+
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        help='Number of worker processes for row processing (default: 1)'
+    )
+
+    parser.add_argument(
+        '--metrics-out',
+        type=Path,
+        metavar='FILE',
+        help='Write per-stage timings, throughput and peak RSS as JSON to FILE'
+    )
+
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -114,13 +208,43 @@ def main() -> int:
         config.dictionary.debug_test_1000_rows = args.debug_1000
         config.dictionary.use_cache = not args.no_cache
         config.dictionary.force_refresh_cache = args.refresh_cache
+        if args.reader:
+            config.dictionary.reader_backend = args.reader
+        if args.jobs:
+            config.dictionary.jobs = args.jobs
+        if args.snapshot:
+            config.dictionary.use_snapshot = True
+        if args.incremental:
+            config.dictionary.incremental = True
+        if args.memory_budget is not None:
+            config.dictionary.memory_budget_mb = args.memory_budget
+        if args.columnar:
+            config.dictionary.columnar = True
+        if args.formatter_cache is not None:
+            config.dictionary.formatter_cache_size = args.formatter_cache
+        if args.transform_store:
+            config.dictionary.use_transform_store = True
+        if args.flavor:
+            config.dictionary.definition_flavor = args.flavor
+        if args.output_flavor:
+            config.dictionary.output_flavors.update(parse_output_flavors(args.output_flavor))
+        if args.write_buffer is not None:
+            config.dictionary.write_buffer_mb = args.write_buffer
+        if args.write_threads is not None:
+            config.dictionary.write_threads = args.write_threads
+        if args.no_stardict_order:
+            config.dictionary.stardict_order = False
 
         # Validate configuration
         config.validate()
 
         # Create processor and run
-        processor = DictionaryProcessor(config)
+        metrics = RunMetrics()
+        processor = DictionaryProcessor(config, metrics)
         processor.process_excel_file()
+        metrics.log_summary()
+        if args.metrics_out:
+            metrics.write_json(args.metrics_out)
 
         logging.info("Processing completed successfully")
         return 0
@@ -0,0 +1,126 @@
+"""Per-stage build metrics and the JSON run report."""
+
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MB (0.0 if unknown)."""
+    if not RESOURCE_AVAILABLE:
+        return 0.0
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return maxrss / divisor
+
+
+def total_size(paths: Iterable[Path]) -> int:
+    """Sum the sizes of the given files, ignoring missing ones and directories."""
+    return sum(path.stat().st_size for path in paths if path.is_file())
+
+
+@dataclass
+class StageMetrics:
+    """Timings and counters of one pipeline stage."""
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows: int = 0
+    bytes_written: int = 0
+    peak_rss_mb: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.wall_seconds if self.wall_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['rows_per_second'] = round(self.rows_per_second, 1)
+        return data
+
+
+@dataclass
+class RunMetrics:
+    """Collects the stages of one run in execution order.
+
+    CPU time is that of the main process; rows handled by ``--jobs`` workers
+    show up in wall time only.
+    """
+    stages: List[StageMetrics] = field(default_factory=list)
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec='seconds'))
+    # Named groups of counters reported alongside the stages, e.g. cache statistics
+    counters: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Time the enclosed block as a stage; the block may fill in rows and bytes_written."""
+        stage = StageMetrics(name)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_seconds = time.perf_counter() - wall_start
+            stage.cpu_seconds = time.process_time() - cpu_start
+            stage.peak_rss_mb = peak_rss_mb()
+            self.stages.append(stage)
+
+    def add_stage(self, name: str, wall_seconds: float, cpu_seconds: float,
+                  rows: int = 0, bytes_written: int = 0) -> StageMetrics:
+        """Record a stage whose time was measured by the caller."""
+        stage = StageMetrics(name, wall_seconds, cpu_seconds, rows, bytes_written, peak_rss_mb())
+        self.stages.append(stage)
+        return stage
+
+    def get(self, name: str) -> Optional[StageMetrics]:
+        """Return the most recent stage with the given name."""
+        for stage in reversed(self.stages):
+            if stage.name == name:
+                return stage
+        return None
+
+    def to_dict(self, success: bool = True) -> Dict[str, Any]:
+        return {
+            'version': REPORT_VERSION,
+            'started_at': self.started_at,
+            'success': success,
+            'total_wall_seconds': round(sum(s.wall_seconds for s in self.stages), 6),
+            'total_cpu_seconds': round(sum(s.cpu_seconds for s in self.stages), 6),
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': [stage.to_dict() for stage in self.stages],
+            'counters': self.counters,
+        }
+
+    def write_json(self, path: Path, success: bool = True) -> None:
+        """Write the run report as JSON."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(success), f, indent=2)
+            f.write("\n")
+        logger.info(f"Metrics report written to {path}")
+
+    def log_summary(self) -> None:
+        """Log one line per stage."""
+        for stage in self.stages:
+            logger.info(
+                f"{stage.name:<10} {stage.wall_seconds:8.2f}s wall {stage.cpu_seconds:8.2f}s cpu "
+                f"{stage.rows_per_second:10.0f} rows/s {stage.bytes_written / 1024 / 1024:8.1f} MB "
+                f"peak RSS {stage.peak_rss_mb:.1f} MB"
+            )
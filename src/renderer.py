@@ -0,0 +1,207 @@
+"""Definition renderers built from per-flavor templates.
+
+A flavor describes the markup written before and after each part of a
+definition (Thai word, pronunciation, type, classifiers, English,
+synonyms, scientific name, level, note) and around the en-th and merged
+articles. ``DefinitionRenderer`` turns a flavor once into a layout of
+(before, after, always) fragments per part and renders an ``Entry`` with a
+single ``str.join`` over the fragments of the parts it has.
+
+Flavors:
+
+- ``html``: the GoldenDict / StarDict markup with the CSS classes of
+  ``res.zip`` (the default)
+- ``compact``: HTML without CSS classes, for readers without the stylesheet
+- ``plain``: text without markup, for Kindle and MDict; entities are
+  decoded and line breaks are written as ``\\n``, the escape pyglossary's
+  Tabfile reader expects
+"""
+
+import html
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, NamedTuple, Tuple
+
+from .entries import Entry
+
+
+class Flavor(NamedTuple):
+    """Markup of one output flavor; ``parts`` maps each definition part to its (before, after) fragments."""
+
+    parts: Dict[str, Tuple[str, str]]
+    english_header: Tuple[str, str]
+    word_type_header: Tuple[str, str]
+    definition_separator: str
+    type_separator: str
+    merge_separator: str
+    markup: bool = True
+
+
+# Definition parts in output order. The Thai word, the pronunciation and the
+# English text are written even when empty, the other parts only when they
+# are not. A pronunciation of None (the row has none) is always left out.
+PARTS = ('thai', 'pron', 'type_usage', 'classifiers', 'english', 'synonyms', 'scient', 'level_info', 'note')
+ALWAYS = ('thai', 'pron', 'english')
+
+# Markup before and after each part of PARTS, and whether it is written even when empty
+Layout = Tuple[Tuple[str, str, bool], ...]
+
+FLAVORS: Dict[str, Flavor] = {
+    'html': Flavor(
+        parts={
+            'thai': ('<span class="thai"><strong>', '</strong></span> '),
+            'pron': ('<span class="pron">[', ']</span> '),
+            'type_usage': ('<span class="type">', '</span> '),
+            'classifiers': ('<span class="clf">classifier: ', '</span> '),
+            'english': ('<br><span class="def">', '</span><br>'),
+            'synonyms': ('<span class="syn">syn: ', '</span><br>'),
+            'scient': ('<span class="science">scient: ', '</span><br>'),
+            'level_info': ('<span class="level">', '</span><br>'),
+            'note': ('<span class="note">note: ', '</span><br>'),
+        },
+        english_header=('<span class="english"><strong>', '</strong></span> <br>'),
+        word_type_header=('<span class="word_type">', '</span><br>'),
+        definition_separator=' ',
+        type_separator='<br>',
+        merge_separator='<br><br>',
+    ),
+    'compact': Flavor(
+        parts={
+            'thai': ('<b>', '</b> '),
+            'pron': ('[', '] '),
+            'type_usage': ('<i>', '</i> '),
+            'classifiers': ('clf: ', ' '),
+            'english': ('<br>', '<br>'),
+            'synonyms': ('syn: ', '<br>'),
+            'scient': ('<i>', '</i><br>'),
+            'level_info': ('', '<br>'),
+            'note': ('note: ', '<br>'),
+        },
+        english_header=('<b>', '</b><br>'),
+        word_type_header=('<i>', '</i><br>'),
+        definition_separator=' ',
+        type_separator='<br>',
+        merge_separator='<br><br>',
+    ),
+    'plain': Flavor(
+        parts={
+            'thai': ('', ' '),
+            'pron': ('[', '] '),
+            'type_usage': ('(', ') '),
+            'classifiers': ('classifier: ', ' '),
+            'english': ('\\n', '\\n'),
+            'synonyms': ('syn: ', '\\n'),
+            'scient': ('scient: ', '\\n'),
+            'level_info': ('', '\\n'),
+            'note': ('note: ', '\\n'),
+        },
+        english_header=('', '\\n'),
+        word_type_header=('', '\\n'),
+        definition_separator='\\n',
+        type_separator='\\n',
+        merge_separator='\\n\\n',
+        markup=False,
+    ),
+}
+
+DEFAULT_FLAVOR = 'html'
+
+_MARKUP = re.compile(r'<[^>]*>')
+_CHARACTER_REFERENCE = re.compile(r'&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);')
+# Tabfile escapes of the characters a decoded reference may produce
+_TABFILE_ESCAPES = str.maketrans({'\\': '\\\\', '\n': '\\n', '\t': '\\t'})
+
+
+@lru_cache(maxsize=None)
+def level_text(level: str, dom: str) -> str:
+    """Level and category line of a definition, e.g. 'Level: A1 - Category: animal'."""
+    parts = []
+    if level:
+        parts.append(f"Level: {level}")
+    if level and dom:
+        parts.append(" - ")
+    if dom:
+        parts.append(f"Category: {dom.lower()}")
+    return "".join(parts)
+
+
+def strip_markup(text: str) -> str:
+    """Remove HTML tags from a value rendered in a flavor without markup and decode its entities.
+
+    A decoded backslash, such as the ``&#x5c;`` of a non-Paiboon falling
+    tone, is written as the Tabfile escape ``\\\\``.
+    """
+    if '<' in text:
+        text = _MARKUP.sub('', text)
+    if '&' in text:
+        text = _CHARACTER_REFERENCE.sub(lambda match: html.unescape(match.group()).translate(_TABFILE_ESCAPES), text)
+    return text
+
+
+def _layout(flavor: Flavor) -> Layout:
+    """Fragments of every definition part of a flavor, in the order of PARTS."""
+    return tuple((*flavor.parts[part], part in ALWAYS) for part in PARTS)
+
+
+def _part_values(entry: Entry) -> Tuple:
+    """Values of the definition parts of an entry, in the order of PARTS."""
+    thai, pron, type_word, usage, classifiers, english, synonyms, scient, level, dom, note = entry
+    return (thai, pron, f'{type_word.lower()} {usage}'.strip(), classifiers, english, synonyms, scient,
+            level_text(level, dom), note)
+
+
+def _renderer(flavor: Flavor) -> Callable[[Entry], str]:
+    """Render function of a flavor: one join over the fragments of the parts an entry has."""
+    layout = _layout(flavor)
+
+    def render(entry: Entry) -> str:
+        fragments = []
+        for (before, after, always), value in zip(layout, _part_values(entry)):
+            if value is not None and (always or value):
+                fragments += (before, value, after)
+        return ''.join(fragments)
+
+    def render_text(entry: Entry) -> str:
+        fragments = []
+        for (before, after, always), value in zip(layout, _part_values(entry)):
+            if value is not None and (always or value):
+                fragments += (before, strip_markup(value), after)
+        return ''.join(fragments)
+
+    return render if flavor.markup else render_text
+
+
+class DefinitionRenderer:
+    """Renders entries, en-th articles and merged articles in one flavor."""
+
+    def __init__(self, flavor: str = DEFAULT_FLAVOR):
+        if flavor not in FLAVORS:
+            raise ValueError(f"Unknown definition flavor: {flavor} (expected one of {', '.join(FLAVORS)})")
+        self.name = flavor
+        self.flavor = FLAVORS[flavor]
+        self.render: Callable[[Entry], str] = _renderer(self.flavor)
+        self._text = (lambda text: text) if self.flavor.markup else strip_markup
+
+    def en_th_article(self, english_word: str, type_groups: Iterable[Tuple[str, Iterable[str]]]) -> str:
+        """Article of an en-th headword from (word type, rendered definitions) groups in output order."""
+        flavor = self.flavor
+        blocks = []
+        for word_type, definitions in type_groups:
+            text = flavor.definition_separator.join(definitions)
+            if word_type.strip():
+                before, after = flavor.word_type_header
+                blocks.append(f"{before}{self._text(word_type)}{after}{text}")
+            else:
+                blocks.append(text)
+        before, after = flavor.english_header
+        return f"{before}{self._text(english_word)}{after}{flavor.type_separator.join(blocks)}"
+
+    def merge_article(self, definitions: Iterable[str]) -> str:
+        """Article of a merged pronunciation headword from its rendered definitions."""
+        return self.flavor.merge_separator.join(definitions)
+
+
+@lru_cache(maxsize=None)
+def get_renderer(flavor: str = DEFAULT_FLAVOR) -> DefinitionRenderer:
+    """Shared renderer of a flavor, built on first use."""
+    return DefinitionRenderer(flavor)
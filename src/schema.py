@@ -0,0 +1,111 @@
+"""Header-derived column schema for the Volubilis worksheet."""
+
+import logging
+import re
+from operator import itemgetter
+from typing import Dict, FrozenSet, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fields read by DictionaryProcessor._process_row, in extraction order,
+# with the header names that identify their column
+FIELD_HEADERS: Dict[str, Tuple[str, ...]] = {
+    'thai_romanized': ('THAIROM',),
+    'easythai': ('EASYTHAI',),
+    'thaiphon': ('THAIPHON',),
+    'thai': ('THA', 'THAI'),
+    'english': ('ENG', 'ENGLISH'),
+    'type': ('TYPE',),
+    'usage': ('USAGE',),
+    'scient': ('SCIENT',),
+    'dom': ('DOM',),
+    'classif': ('CLASSIF',),
+    'syn': ('SYN',),
+    'level': ('LEVEL',),
+    'note': ('NOTE',),
+}
+
+# Column positions of the current vol_mundo layout, used when a header is missing
+DEFAULT_POSITIONS: Dict[str, int] = {
+    'thai_romanized': 0,
+    'easythai': 1,
+    'thaiphon': 2,
+    'thai': 3,
+    'english': 4,
+    'type': 6,
+    'usage': 7,
+    'scient': 8,
+    'dom': 9,
+    'classif': 10,
+    'syn': 11,
+    'level': 12,
+    'note': 13,
+}
+
+
+def normalize_header(cell) -> str:
+    """Reduce a header cell like 'SCIENT/abbrev.' or 'ENG\\n(english)' to 'SCIENT' / 'ENG'."""
+    if cell is None:
+        return ""
+    return re.split(r"[\s/(.]", str(cell).strip().upper(), maxsplit=1)[0]
+
+
+class RowSchema:
+    """Column positions of the used fields plus a compiled extractor for them.
+
+    ``extract(row)`` returns the field values in ``FIELD_HEADERS`` order,
+    padding rows that are shorter than the last used column with ``None``.
+    """
+
+    def __init__(self, positions: Optional[Dict[str, int]] = None):
+        self.positions = dict(positions or DEFAULT_POSITIONS)
+        indexes = [self.positions[name] for name in FIELD_HEADERS]
+        self.max_column = max(indexes) + 1
+        self.columns: FrozenSet[int] = frozenset(indexes)
+
+        getter = itemgetter(*indexes)
+        width = self.max_column
+        padding = (None,) * width
+
+        def extract(row: Sequence) -> Tuple:
+            if len(row) < width:
+                row = tuple(row) + padding[len(row):]
+            return getter(row)
+
+        self.extract = extract
+
+    @classmethod
+    def from_header(cls, header_row: Sequence) -> 'RowSchema':
+        """Resolve field positions from the header row, falling back to the defaults."""
+        found: Dict[str, int] = {}
+        for index, cell in enumerate(header_row):
+            name = normalize_header(cell)
+            for field_name, headers in FIELD_HEADERS.items():
+                if name in headers and field_name not in found:
+                    found[field_name] = index
+
+        if not found:
+            logger.warning("Header row not recognised - using default column positions")
+        else:
+            missing = [name for name in FIELD_HEADERS if name not in found]
+            if missing:
+                logger.warning(f"Columns not found in header, using default positions: {', '.join(missing)}")
+
+        return cls({**DEFAULT_POSITIONS, **found})
+
+    def field_for_column(self, index: int) -> Optional[str]:
+        """Name of the field read from a column, or None if the column is unused."""
+        for name, position in self.positions.items():
+            if position == index:
+                return name
+        return None
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RowSchema) and self.positions == other.positions
+
+    def __repr__(self) -> str:
+        return f"RowSchema({self.positions!r})"
+
+    def __reduce__(self):
+        # The compiled extractor is a closure, rebuild it instead of pickling it
+        return (RowSchema, (self.positions,))
@@ -0,0 +1,149 @@
+"""Columnar binary snapshot of the workbook for fast re-runs.
+
+A snapshot stores the used columns of every sheet row as one UTF-8 blob per
+column plus an array of row offsets into that blob. The file is memory
+mapped when read, so re-runs with different output options skip XML
+decoding entirely. Snapshots are keyed by the SHA-256 of the xlsx content.
+
+File layout (little endian)::
+
+    magic (8 bytes) | row count (Q) | column count (Q)
+    per column: offsets position (Q) | blob position (Q) | blob length (Q)
+    per column: (row count + 1) offsets (Q) followed by the UTF-8 blob
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .xlsx_reader import RowReader
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"VSNAP\x00\x01\x00"
+HEADER = struct.Struct("<QQ")
+COLUMN_ENTRY = struct.Struct("<QQQ")
+SNAPSHOT_SUFFIX = ".vsnap"
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_path(excel_file: Path, snapshot_dir: Path) -> Path:
+    """Path of the snapshot for the given workbook content."""
+    return snapshot_dir / f"{file_digest(excel_file)}{SNAPSHOT_SUFFIX}"
+
+
+def write_snapshot(rows: Iterable[Tuple], path: Path, columns: int) -> int:
+    """Write the first ``columns`` cells of every row to a snapshot file.
+
+    Cells are stored as text: empty or falsy values become "" and everything
+    else ``str(value)``, which is what ``TextFormatter.clean_text`` and the
+    required-column checks in ``_process_row`` see. Returns the row count.
+    """
+    blobs = [bytearray() for _ in range(columns)]
+    offsets = [array("Q", [0]) for _ in range(columns)]
+    row_count = 0
+
+    for row in rows:
+        row_count += 1
+        width = len(row)
+        for i in range(columns):
+            value = row[i] if i < width else None
+            if value:
+                blobs[i] += str(value).encode("utf-8")
+            offsets[i].append(len(blobs[i]))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(row_count, columns))
+
+        position = len(MAGIC) + HEADER.size + COLUMN_ENTRY.size * columns
+        for i in range(columns):
+            offsets_position = position
+            blob_position = offsets_position + len(offsets[i]) * offsets[i].itemsize
+            f.write(COLUMN_ENTRY.pack(offsets_position, blob_position, len(blobs[i])))
+            position = blob_position + len(blobs[i])
+
+        for i in range(columns):
+            f.write(offsets[i].tobytes())
+            f.write(blobs[i])
+    os.replace(tmp_path, path)
+
+    logger.info(f"Wrote snapshot {path} ({row_count} rows, {columns} columns, "
+                f"{path.stat().st_size / 1024 / 1024:.1f} MB)")
+    return row_count
+
+
+class SnapshotReader(RowReader):
+    """Reads row tuples from a memory-mapped columnar snapshot.
+
+    ``excel_file`` stays the workbook the snapshot was taken from; the rows
+    are read from ``snapshot_file``.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, snapshot_file: Path, excel_file: Path, jobs: int = 1):
+        super().__init__(excel_file, jobs)
+        self.snapshot_file = Path(snapshot_file)
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._rows: Optional[Iterator[Tuple]] = None
+
+    def iter_rows(self) -> Iterator[Tuple]:
+        self._file = open(self.snapshot_file, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a Volubilis snapshot: {self.snapshot_file}")
+        row_count, columns = HEADER.unpack_from(self._map, len(MAGIC))
+
+        view = memoryview(self._map)
+        column_offsets: List[memoryview] = []
+        column_blobs: List[memoryview] = []
+        for i in range(columns):
+            offsets_position, blob_position, blob_length = COLUMN_ENTRY.unpack_from(
+                self._map, len(MAGIC) + HEADER.size + COLUMN_ENTRY.size * i)
+            column_offsets.append(view[offsets_position:blob_position].cast("Q"))
+            column_blobs.append(view[blob_position:blob_position + blob_length])
+
+        view.release()
+        self._rows = self._iter_columns(row_count, column_offsets, column_blobs)
+        return self._rows
+
+    @staticmethod
+    def _iter_columns(row_count: int, column_offsets: List[memoryview],
+                      column_blobs: List[memoryview]) -> Iterator[Tuple]:
+        """Assemble row tuples from the column blobs."""
+        columns = list(zip(column_offsets, column_blobs))
+        for row in range(row_count):
+            yield tuple(
+                str(blob[offsets[row]:offsets[row + 1]], "utf-8")
+                for offsets, blob in columns
+            )
+
+    def close(self) -> None:
+        if self._rows is not None:
+            # Drops the column views so the map can be closed
+            self._rows.close()
+            self._rows = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,339 @@
+"""Disk-spilling aggregation maps for bounded-memory builds.
+
+``SpillingAggregator`` stands in for the ``defaultdict(list)`` maps that
+``DictionaryProcessor._process_row`` fills. Values are buffered as
+``(ordinal, sort key, sequence, sub key, payload)`` records; when the shared
+``SpillBudget`` is exceeded, every buffer is sorted and written to a temp
+file as a run. ``items()`` k-way merges the runs, so headwords come out in
+first-seen order with their values already in output order. With a
+``key_order``, headwords come out sorted by it instead.
+
+Merging holds one chunk of every run in memory. Runs are pickled in
+chunks sized so that the merges of all aggregators together fit in half
+the budget (the output write buffers get the other half), and once an
+aggregator has ``MAX_MERGE_RUNS`` runs they are merged into one on disk, so
+memory at write time stays within the budget however often the buffers
+spilled.
+
+``SpillingEntryStore`` is the entry table of a budgeted build: its text
+fields are buffered under the same budget and appended to a temp file when
+it is exceeded, so only the encoded fields stay in memory.
+"""
+
+import heapq
+import logging
+import marshal
+import mmap
+import pickle
+import shutil
+import sys
+import tempfile
+from array import array
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .entries import ENCODED_FIELDS, Entry, EntryStore
+
+logger = logging.getLogger(__name__)
+
+# Most records per pickle.dump call when writing a run
+RUN_CHUNK_SIZE = 1000
+# Runs of one aggregator merged at a time
+MAX_MERGE_RUNS = 16
+# Rough per-record cost of the tuple and list slot, on top of the sort key and payload
+RECORD_OVERHEAD = 120
+
+
+class SpillBudget:
+    """Memory budget shared by the aggregators and the entry table of one build."""
+
+    def __init__(self, limit_bytes: int, spill_dir: Optional[Path] = None):
+        self.limit_bytes = limit_bytes
+        self.used_bytes = 0
+        self.spill_count = 0
+        self.aggregators: List['SpillingAggregator'] = []
+        self.entry_stores: List['SpillingEntryStore'] = []
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix="volubilis_spill_", dir=spill_dir))
+
+    @property
+    def merge_bytes(self) -> int:
+        """Share of the budget for merging runs at write time; the output write buffers get the rest."""
+        return self.limit_bytes // 2
+
+    def charge(self, size: int) -> None:
+        """Account for a buffered record and spill all buffers when over budget."""
+        self.used_bytes += size
+        if self.used_bytes > self.limit_bytes:
+            self.spill()
+
+    def spill(self) -> None:
+        """Write every aggregator's buffer to disk as a sorted run, and the buffered entries after the spilled ones."""
+        self.spill_count += 1
+        logger.debug(f"Spilling {self.used_bytes / 1024 / 1024:.1f} MB of aggregated entries to disk")
+        for aggregator in self.aggregators:
+            aggregator.spill()
+        for store in self.entry_stores:
+            store.spill()
+        self.used_bytes = 0
+
+    def close(self) -> None:
+        """Remove all spilled runs."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class SpillingAggregator:
+    """Insertion-ordered multimap whose values may live in sorted runs on disk.
+
+    ``sort_key(sub_key, value)`` gives the order of the values within one
+    headword; ties keep insertion order. With ``nested=True`` values are
+    grouped by a sub key (``agg[key][sub_key].append(value)``) and ``items()``
+    yields a dict of sub key to values, in sub key order. ``key_order(key)``,
+    if given, orders the headwords; ties keep first-seen order.
+    """
+
+    def __init__(self, budget: SpillBudget, sort_key: Callable[[Any, Any], Any], nested: bool = False,
+                 key_order: Optional[Callable[[str], Any]] = None):
+        self.budget = budget
+        self.sort_key = sort_key
+        self.nested = nested
+        self.key_order = key_order
+        self._ordinals: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._buffer: List[Tuple] = []
+        self._runs: List[Path] = []
+        self._run_count = 0
+        self._sequence = 0
+        self._charged_bytes = 0
+        budget.aggregators.append(self)
+
+    def __getitem__(self, key: str):
+        if self.nested:
+            return _SubKeyAppender(self, key)
+        return _Appender(self, key, None)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, value: Any, sub_key: Any = None) -> None:
+        """Buffer one value for a headword."""
+        ordinal = self._ordinals.get(key)
+        if ordinal is None:
+            # Records sort by ordinal first; one ordinal object is shared by all records of a headword
+            ordinal = len(self._keys)
+            if self.key_order is not None:
+                ordinal = (self.key_order(key), ordinal)
+            self._ordinals[key] = ordinal
+            self._keys.append(key)
+
+        self._sequence += 1
+        sort_key = self.sort_key(sub_key, value)
+        self._buffer.append((ordinal, sort_key, self._sequence, sub_key, value))
+        size = _payload_size(sort_key) + _payload_size(value) + RECORD_OVERHEAD
+        self._charged_bytes += size
+        self.budget.charge(size)
+
+    def spill(self) -> None:
+        """Sort the buffered records and write them to a run file."""
+        if not self._buffer:
+            return
+        self._buffer.sort()
+        self._runs.append(self._write_run(self._buffer))
+        self._buffer = []
+        if len(self._runs) >= MAX_MERGE_RUNS:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Merge all runs into one."""
+        runs = self._runs
+        self._runs = [self._write_run(heapq.merge(*(_read_run(run) for run in runs)))]
+        for run in runs:
+            run.unlink()
+
+    def _write_run(self, records: Iterable[Tuple]) -> Path:
+        """Write sorted records to a new run file."""
+        self._run_count += 1
+        run = self.budget.tmp_dir / f"run_{id(self)}_{self._run_count}.pkl"
+        records = iter(records)
+        # Chunks of all runs of all aggregators, read at once by their merges, fit in the merge budget
+        record_size = self._charged_bytes / max(1, self._sequence)
+        merge_records = self.budget.merge_bytes / (MAX_MERGE_RUNS * len(self.budget.aggregators) * record_size)
+        chunk_size = max(1, min(RUN_CHUNK_SIZE, int(merge_records)))
+        with open(run, 'wb') as f:
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return run
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Yield (headword, values) in first-seen headword order, or in ``key_order``."""
+        if self._runs:
+            # Merge from disk only, so the buffer does not stay in memory next to the run chunks
+            self.spill()
+        self._buffer.sort()
+        merged = heapq.merge(self._buffer, *(_read_run(run) for run in self._runs))
+        for ordinal, records in groupby(merged, key=lambda record: record[0]):
+            if self.nested:
+                values: Dict[Any, List] = {}
+                for record in records:
+                    values.setdefault(record[3], []).append(record[4])
+            else:
+                values = [record[4] for record in records]
+            yield self._keys[ordinal if self.key_order is None else ordinal[1]], values
+
+
+class _Appender:
+    """List-like view that appends to one headword of an aggregator."""
+
+    __slots__ = ('aggregator', 'key', 'sub_key')
+
+    def __init__(self, aggregator: SpillingAggregator, key: str, sub_key: Any):
+        self.aggregator = aggregator
+        self.key = key
+        self.sub_key = sub_key
+
+    def append(self, value: Any) -> None:
+        self.aggregator.add(self.key, value, self.sub_key)
+
+    def extend(self, values) -> None:
+        for value in values:
+            self.aggregator.add(self.key, value, self.sub_key)
+
+
+class _SubKeyAppender:
+    """Dict-like view of one headword of a nested aggregator."""
+
+    __slots__ = ('aggregator', 'key')
+
+    def __init__(self, aggregator: SpillingAggregator, key: str):
+        self.aggregator = aggregator
+        self.key = key
+
+    def __getitem__(self, sub_key: Any) -> _Appender:
+        return _Appender(self.aggregator, self.key, sub_key)
+
+
+# Entry fields kept as text, stored together as one record per entry
+TEXT_FIELDS = tuple(field for field in Entry._fields if field not in ENCODED_FIELDS)
+
+
+class SpillingEntryStore(EntryStore):
+    """EntryStore whose text fields live in a temp file once the budget is exceeded.
+
+    The encoded fields stay in memory as code arrays, four bytes per field
+    and entry. The text fields of an entry are buffered as one tuple, charged
+    to the budget; spilled tuples are marshalled to the file and read back by
+    offset. ``thai`` and the other text columns can still be indexed by ID.
+    """
+
+    __slots__ = ('budget', '_buffer', '_spilled', '_offsets', '_path', '_map')
+
+    def __init__(self, budget: SpillBudget):
+        super().__init__()
+        for index, field in enumerate(TEXT_FIELDS):
+            setattr(self, field, _TextColumn(self, index))
+        self.budget = budget
+        self._buffer: List[Tuple] = []
+        # Entries whose text fields are in the file, and where each one starts
+        self._spilled = 0
+        self._offsets = array('Q', [0])
+        self._path = budget.tmp_dir / f"entries_{id(self)}.bin"
+        self._map: Optional[mmap.mmap] = None
+        budget.entry_stores.append(self)
+
+    def __len__(self) -> int:
+        return len(self.level)
+
+    def add(self, entry: Entry) -> int:
+        """Append an entry and return its ID."""
+        entry_id = len(self.level)
+        tables = self.tables
+        self.type_word.append(tables['type_word'].encode(entry.type_word))
+        self.usage.append(tables['usage'].encode(entry.usage))
+        self.classifiers.append(tables['classifiers'].encode(entry.classifiers))
+        self.level.append(tables['level'].encode(entry.level))
+        self.dom.append(tables['dom'].encode(entry.dom))
+        texts = (entry.thai, entry.pron, entry.english, entry.synonyms, entry.scient, entry.note)
+        self._buffer.append(texts)
+        self.budget.charge(_payload_size(texts) + RECORD_OVERHEAD)
+        return entry_id
+
+    def get(self, entry_id: int) -> Entry:
+        """Return the entry with the given ID."""
+        thai, pron, english, synonyms, scient, note = self._texts(entry_id)
+        tables = self.tables
+        return Entry(
+            thai,
+            pron,
+            tables['type_word'].values[self.type_word[entry_id]],
+            tables['usage'].values[self.usage[entry_id]],
+            tables['classifiers'].values[self.classifiers[entry_id]],
+            english,
+            synonyms,
+            scient,
+            tables['level'].values[self.level[entry_id]],
+            tables['dom'].values[self.dom[entry_id]],
+            note,
+        )
+
+    def extend(self, other: EntryStore) -> int:
+        """Append the entries of another store; their IDs are shifted by the returned offset."""
+        offset = len(self)
+        for entry in other:
+            self.add(entry)
+        return offset
+
+    def spill(self) -> None:
+        """Append the buffered text fields to the file."""
+        if not self._buffer:
+            return
+        offset = self._offsets[-1]
+        with open(self._path, 'ab') as f:
+            for texts in self._buffer:
+                record = marshal.dumps(texts)
+                f.write(record)
+                offset += len(record)
+                self._offsets.append(offset)
+        self._spilled += len(self._buffer)
+        self._buffer = []
+        with open(self._path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _texts(self, entry_id: int) -> Tuple:
+        """Text fields of an entry, from the buffer or the file."""
+        if entry_id >= self._spilled:
+            return self._buffer[entry_id - self._spilled]
+        return marshal.loads(self._map[self._offsets[entry_id]:self._offsets[entry_id + 1]])
+
+
+class _TextColumn:
+    """Column view of one text field of a SpillingEntryStore."""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: SpillingEntryStore, index: int):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, entry_id: int) -> Any:
+        return self.store._texts(entry_id)[self.index]
+
+
+def _read_run(run: Path) -> Iterator[Tuple]:
+    """Stream the records of a run file."""
+    with open(run, 'rb') as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+
+def _payload_size(value: Any) -> int:
+    """Approximate memory used by a buffered value or sort key."""
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    return sys.getsizeof(value)
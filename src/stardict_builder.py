@@ -1,22 +1,468 @@
-"""Stardict format conversion and packaging utilities."""
+"""Stardict format conversion and packaging utilities.
+
+The native backend converts the txt outputs in process. ``TabfileReader``
+reads the articles of a txt file the way pyglossary's Tabfile reader does,
+and ``StardictWriter`` writes the ``.ifo``, ``.idx``, ``.dict`` and ``.syn``
+files. Files marked as pre-sorted (see ``presorted_marker``) are streamed
+straight through; others are sorted in memory first. Every dictionary is
+read back by ``StardictReader`` and checked against a digest of what was
+written. The ``pyglossary`` backend runs the pyglossary CLI instead.
+
+The optional combined package merges the Thai-English dictionaries into
+one: articles with the same definition are stored once, and the headwords
+of the copies (pronunciation headwords, mostly) become ``.syn`` keys of it.
+
+With dictzip enabled, each ``.dict`` is then compressed to ``.dict.dz``
+(see ``src/dictzip.py``), read back through its chunk table, and replaces
+the ``.dict`` in the packages.
+"""
 
+import hashlib
 import logging
+import re
 import shutil
+import struct
 import subprocess
 import sys
+from itertools import chain, islice
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .collation import presorted_marker, stardict_sort_key
+from .dictzip import DEFAULT_CHUNK_SIZE, DEFAULT_LEVEL, DictzipReader, compress_file
+from .exceptions import StardictError, StardictOrderError
 
 logger = logging.getLogger(__name__)
 
+BACKENDS = ('native', 'pyglossary')
+DEFAULT_BACKEND = 'native'
+
+# Version and description written to the .ifo of every dictionary
+DICTIONARY_VERSION = '1.0.5'
+DICTIONARY_DESCRIPTION = 'Volubilis Thai-English Dictionary v1.0.5 (data 01.11.2025)'
+
+IFO_HEADER = "StarDict's dict ifo file"
+
+# Definitions sampled to choose the sametypesequence, as pyglossary does
+FORMAT_SAMPLE_SIZE = 100
+
+# Language codes recognised in txt file names for the bookname, e.g. "(th-en)"
+LANGUAGE_CODES = ('en', 'th')
+
+# Dictionaries merged into the combined package; the first headword of a definition stays its headword
+COMBINED_NAME = 'volubilis_th-en-combined'
+COMBINED_SOURCES = ('volubilis_th-en', 'volubilis_th-pr-en', 'volubilis_th-pr-merge-en')
+
+# Markup that makes pyglossary treat a definition as HTML or XDXF
+_HTML_DEFINITION = re.compile(
+    r"<font[ >]|<br\s*/?\s*>|<i[ >]|<b[ >]|<p[ >]|<hr\s*/?\s*>|<a |<div[ >]|<span[ >]|<img[ >]|<table[ >]"
+    r"|<sup[ >]|<u[ >]|<ul[ >]|<ol[ >]|<li[ >]|<h[1-6][ >]|<audio[ >]|&[a-z]{2,8};|&#x?[0-9]{2,5};",
+    re.IGNORECASE,
+)
+_XDXF_DEFINITION = re.compile("^<k>[^<>]*</k>", re.DOTALL | re.IGNORECASE)
+
+# Tabfile escapes: \n, \t and \\ in definitions, also \| in headwords
+_ESCAPES = {'\\': '\\', 'n': '\n', 't': '\t', '|': '|'}
+_DEFINITION_ESCAPE = re.compile(r'\\([\\nt])')
+_HEADWORD_TOKEN = re.compile(r'\\([\\nt|])|\|')
+
+# An article: its terms (headword first, then alternates) and its definition
+Article = Tuple[List[str], str]
+
+
+def unescape_definition(text: str) -> str:
+    """Undo the \\n, \\t and \\\\ escapes of a Tabfile definition."""
+    if '\\' not in text:
+        return text
+    return _DEFINITION_ESCAPE.sub(lambda match: _ESCAPES[match.group(1)], text)
+
+
+def split_headword(headword: str) -> List[str]:
+    """Terms of a Tabfile headword, split at every "|" that is not escaped as \\|."""
+    if '\\' not in headword:
+        return headword.split('|')
+    terms: List[str] = []
+    parts: List[str] = []
+    pos = 0
+    for match in _HEADWORD_TOKEN.finditer(headword):
+        parts.append(headword[pos:match.start()])
+        if match.group(1) is None:
+            terms.append(''.join(parts))
+            parts = []
+        else:
+            parts.append(_ESCAPES[match.group(1)])
+        pos = match.end()
+    parts.append(headword[pos:])
+    terms.append(''.join(parts))
+    return terms
+
+
+def clean_article(terms: List[str], definition: str) -> Optional[Article]:
+    """Apply pyglossary's default entry filters to an article; None if it is dropped.
+
+    Terms and definition are stripped, trailing <br> tags and carriage
+    returns are removed from the definition, and empty or repeated
+    alternates are dropped. Articles without a headword or a definition
+    are skipped.
+    """
+    terms = [term.strip().replace('\r', '') for term in terms]
+    definition = definition.strip()
+    while definition.endswith(('<br>', '<BR>')):
+        definition = definition[:-4]
+    definition = definition.replace('\r', '')
+    if len(terms) > 1:
+        terms = list(dict.fromkeys(term for term in terms if term))
+    if not terms or not terms[0] or not definition:
+        return None
+    return terms, definition
+
+
+def definition_format(definition: str) -> str:
+    """Stardict type of a definition: 'x' for XDXF, 'h' for HTML, 'm' for plain text."""
+    if _XDXF_DEFINITION.match(definition):
+        return 'x'
+    if _HTML_DEFINITION.search(definition):
+        return 'h'
+    return 'm'
+
+
+def same_type_sequence(definitions: Iterable[str]) -> str:
+    """sametypesequence of a dictionary from a sample of its definitions.
+
+    'm' when nearly all are plain text, 'h' when most are HTML, otherwise ''
+    and every definition is stored with its own type.
+    """
+    formats = [definition_format(definition) for definition in definitions]
+    if not formats:
+        return ''
+    if formats.count('m') / len(formats) > 0.97:
+        return 'm'
+    if formats.count('h') / len(formats) > 0.5:
+        return 'h'
+    return ''
+
+
+def combine_articles(sources: Iterable[Iterable[Article]]) -> List[Article]:
+    """Articles of several dictionaries with every definition stored once.
+
+    Articles with the same definition become one article, whose headword is
+    the one seen first; the headwords and alternates of the others are
+    added to its alternates, so they are written as synonyms of it.
+    """
+    combined: Dict[str, Dict[str, None]] = {}
+    for articles in sources:
+        for terms, definition in articles:
+            known = combined.get(definition)
+            if known is None:
+                combined[definition] = dict.fromkeys(terms)
+            else:
+                known.update(dict.fromkeys(terms))
+    return [(list(terms), definition) for definition, terms in combined.items()]
+
+
+def stardict_bookname(txt_file: Path, info: Dict[str, str]) -> str:
+    """Bookname of a converted txt file, as pyglossary names it.
+
+    The name info line, else the file name, followed by the source and
+    target language found in the file name unless the name already shows
+    them: ``volubilis_th-pr-en.txt (th-en)``.
+    """
+    bookname = info.get('name') or txt_file.name
+    codes = [word for word in re.findall(r'[a-z]+', txt_file.stem.lower()) if word in LANGUAGE_CODES]
+    if len(codes) >= 2:
+        langs = f"{codes[0]}-{codes[1]}"
+        if langs not in bookname.lower():
+            bookname = f"{bookname} ({langs})"
+    return bookname
+
+
+class TabfileReader:
+    """Articles of a tab-separated txt output, read like pyglossary's Tabfile reader.
+
+    Leading lines whose headword starts with "#" are info lines, collected
+    in ``info``; every other line is one article. Iterating opens the file
+    again, so the articles can be read more than once.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.info: Dict[str, str] = {}
+        for headword, definition in self._lines():
+            terms = split_headword(headword)
+            if not terms[0].startswith('#'):
+                break
+            key = terms[0].lstrip('#')
+            if key and definition:
+                self.info[key] = unescape_definition(definition)
+
+    @property
+    def presorted(self) -> bool:
+        """Whether the file is marked as written in Stardict order."""
+        return presorted_marker(self.path).exists()
+
+    def _lines(self) -> Iterator[Tuple[str, str]]:
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                headword, tab, definition = line.partition('\t')
+                if not tab:
+                    logger.warning(f"Skipping line without a tab in {self.path.name}: {line[:10]!r}")
+                    continue
+                yield headword, definition
+
+    def __iter__(self) -> Iterator[Article]:
+        in_header = True
+        for headword, definition in self._lines():
+            terms = split_headword(headword)
+            if in_header:
+                if terms[0].startswith('#'):
+                    continue
+                in_header = False
+            article = clean_article(terms, unescape_definition(definition))
+            if article is not None:
+                yield article
+
+
+class StardictDigest(NamedTuple):
+    """Counts and content hash of a written dictionary, checked when it is read back."""
+    word_count: int
+    synonym_count: int
+    digest: str
+
+
+def _stardict_path(base_path: Path, suffix: str) -> Path:
+    return base_path.with_name(base_path.name + suffix)
+
+
+class StardictWriter:
+    """Writes one Stardict dictionary: ``<base>.ifo``, ``.idx``, ``.dict`` and ``.syn``.
+
+    Articles are (terms, definition) pairs, from a ``TabfileReader`` or
+    straight from memory. The first term is the headword; the others are
+    written to the ``.syn`` file as synonyms of it. ``.idx`` offsets are
+    32-bit until the ``.dict`` outgrows them, then the index is widened to
+    64-bit offsets (``idxoffsetbits=64``).
+    """
+
+    # Largest .dict offset of an index with 32-bit offsets
+    offset_limit = 0xFFFFFFFF
+
+    def __init__(self, base_path: Path, bookname: str, version: str = DICTIONARY_VERSION,
+                 description: str = DICTIONARY_DESCRIPTION):
+        self.base_path = base_path
+        self.bookname = bookname
+        self.version = version
+        self.description = description
+
+    def path(self, suffix: str) -> Path:
+        """Path of one of the dictionary's files, e.g. path('.idx')."""
+        return _stardict_path(self.base_path, suffix)
+
+    def write(self, articles: Iterable[Article], presorted: bool = False) -> StardictDigest:
+        """Write the dictionary and return its digest.
+
+        With ``presorted`` the articles are streamed in the order given and a
+        ``StardictOrderError`` is raised at the first one out of Stardict
+        order. Otherwise they are sorted in memory first.
+        """
+        if not presorted:
+            articles = sorted(articles, key=lambda article: stardict_sort_key(article[0][0]))
+        articles = iter(articles)
+        sample = list(islice(articles, FORMAT_SAMPLE_SIZE))
+        type_sequence = same_type_sequence(definition for _, definition in sample)
+
+        for suffix in ('.syn', '.dict.dz', '.syn.dz', '.idx.oft', '.syn.oft'):
+            self.path(suffix).unlink(missing_ok=True)
+
+        digest = hashlib.blake2b(digest_size=16)
+        synonyms: List[Tuple[bytes, int]] = []
+        offset_format = '>I'
+        offset = 0
+        word_count = 0
+        previous_key = None
+        dict_file = open(self.path('.dict'), 'wb')
+        idx_file = open(self.path('.idx'), 'wb')
+        try:
+            for terms, definition in chain(sample, articles):
+                word = terms[0].encode('utf-8')
+                key = (word.lower(), word)
+                if previous_key is not None and key < previous_key:
+                    raise StardictOrderError(f"{self.base_path.name}: {terms[0]!r} is out of Stardict order")
+                previous_key = key
+
+                data = definition.encode('utf-8')
+                if not type_sequence:
+                    data = definition_format(definition).encode('ascii') + data + b'\0'
+                if offset > self.offset_limit and offset_format == '>I':
+                    idx_file.close()
+                    self._widen_index()
+                    idx_file = open(self.path('.idx'), 'ab')
+                    offset_format = '>Q'
+                dict_file.write(data)
+                record = word + b'\0' + struct.pack(offset_format, offset) + struct.pack('>I', len(data))
+                idx_file.write(record)
+                digest.update(word + b'\0' + data)
+
+                for alternate in terms[1:]:
+                    synonyms.append((alternate.encode('utf-8'), word_count))
+                offset += len(data)
+                word_count += 1
+        finally:
+            dict_file.close()
+            idx_file.close()
+
+        if synonyms:
+            synonyms.sort(key=lambda synonym: (synonym[0].lower(), synonym[0]))
+            with open(self.path('.syn'), 'wb') as syn_file:
+                for alternate, index in synonyms:
+                    record = alternate + b'\0' + struct.pack('>I', index)
+                    syn_file.write(record)
+                    digest.update(record)
+
+        self._write_ifo(word_count, len(synonyms), type_sequence, 64 if offset_format == '>Q' else 32)
+        return StardictDigest(word_count, len(synonyms), digest.hexdigest())
+
+    def _widen_index(self) -> None:
+        """Rewrite the .idx written so far with 64-bit offsets."""
+        logger.info(f"{self.base_path.name}: .dict exceeds 4 GB, switching to 64-bit .idx offsets")
+        idx_path = self.path('.idx')
+        entries = list(_read_index(idx_path.read_bytes(), 32))
+        with open(idx_path, 'wb') as idx_file:
+            for word, offset, size in entries:
+                idx_file.write(word + b'\0' + struct.pack('>QI', offset, size))
+
+    def _write_ifo(self, word_count: int, synonym_count: int, type_sequence: str, offset_bits: int) -> None:
+        fields = {
+            'version': self.version,
+            'bookname': self.bookname.replace('\n', ' '),
+            'wordcount': str(word_count),
+            'idxfilesize': str(self.path('.idx').stat().st_size),
+        }
+        if offset_bits == 64:
+            fields['idxoffsetbits'] = '64'
+        if type_sequence:
+            fields['sametypesequence'] = type_sequence
+        if synonym_count:
+            fields['synwordcount'] = str(synonym_count)
+        fields['description'] = self.description.replace('\n', '<br>')
+        with open(self.path('.ifo'), 'w', encoding='utf-8', newline='\n') as ifo_file:
+            ifo_file.write(f"{IFO_HEADER}\n")
+            ifo_file.writelines(f"{key}={value}\n" for key, value in fields.items())
+
+
+def _read_index(data: bytes, offset_bits: int) -> Iterator[Tuple[bytes, int, int]]:
+    """(word, offset, size) records of .idx contents."""
+    record = struct.Struct('>QI' if offset_bits == 64 else '>II')
+    pos = 0
+    while pos < len(data):
+        end = data.find(b'\0', pos)
+        if end < 0 or end + 1 + record.size > len(data):
+            raise StardictError(f"Truncated .idx record at byte {pos}")
+        offset, size = record.unpack_from(data, end + 1)
+        yield data[pos:end], offset, size
+        pos = end + 1 + record.size
+
+
+def _read_synonyms(data: bytes) -> Iterator[Tuple[bytes, int]]:
+    """(synonym, word index) records of .syn contents."""
+    pos = 0
+    while pos < len(data):
+        end = data.find(b'\0', pos)
+        if end < 0 or end + 5 > len(data):
+            raise StardictError(f"Truncated .syn record at byte {pos}")
+        yield data[pos:end], struct.unpack_from('>I', data, end + 1)[0]
+        pos = end + 5
+
+
+class StardictReader:
+    """Reads a Stardict dictionary back to verify it; a ``.dict.dz`` is read instead of the ``.dict``."""
+
+    def __init__(self, ifo_path: Path):
+        self.base_path = ifo_path.with_suffix('')
+        lines = ifo_path.read_text(encoding='utf-8').splitlines()
+        if not lines or lines[0] != IFO_HEADER:
+            raise StardictError(f"{ifo_path.name} is not a Stardict .ifo file")
+        self.info: Dict[str, str] = dict(line.split('=', 1) for line in lines[1:] if '=' in line)
+
+    def path(self, suffix: str) -> Path:
+        return _stardict_path(self.base_path, suffix)
+
+    def verify(self, expected: Optional[StardictDigest] = None) -> StardictDigest:
+        """Check the files against each other and, if given, against the digest of the writer.
+
+        Raises ``StardictError`` on the first problem found: sizes and counts
+        that differ from the .ifo, records out of Stardict order, definitions
+        outside the .dict, synonyms of missing words, or different contents.
+        """
+        name = self.base_path.name
+        info = self.info
+        idx_data = self.path('.idx').read_bytes()
+        if int(info.get('idxfilesize', -1)) != len(idx_data):
+            raise StardictError(f"{name}: idxfilesize {info.get('idxfilesize')} != {len(idx_data)}")
+        type_sequence = info.get('sametypesequence', '')
+
+        digest = hashlib.blake2b(digest_size=16)
+        word_count = 0
+        previous_key = None
+        dictzip_path = self.path('.dict.dz')
+        if dictzip_path.exists():
+            dict_data = DictzipReader(dictzip_path).read_all()
+        else:
+            dict_data = self.path('.dict').read_bytes()
+        for word, offset, size in _read_index(idx_data, int(info.get('idxoffsetbits', 32))):
+            key = (word.lower(), word)
+            if previous_key is not None and key < previous_key:
+                raise StardictError(f"{name}: .idx is not in Stardict order at {word!r}")
+            previous_key = key
+            if offset + size > len(dict_data):
+                raise StardictError(f"{name}: definition of {word!r} lies outside the .dict")
+            data = dict_data[offset:offset + size]
+            if not type_sequence and (not data.endswith(b'\0') or data[:1] not in (b'h', b'm', b'x')):
+                raise StardictError(f"{name}: definition of {word!r} has no type")
+            digest.update(word + b'\0' + data)
+            word_count += 1
+        if int(info.get('wordcount', -1)) != word_count:
+            raise StardictError(f"{name}: wordcount {info.get('wordcount')} != {word_count}")
+
+        synonym_count = 0
+        syn_path = self.path('.syn')
+        if syn_path.exists():
+            previous_key = None
+            for synonym, index in _read_synonyms(syn_path.read_bytes()):
+                key = (synonym.lower(), synonym)
+                if previous_key is not None and key < previous_key:
+                    raise StardictError(f"{name}: .syn is not in Stardict order at {synonym!r}")
+                previous_key = key
+                if index >= word_count:
+                    raise StardictError(f"{name}: synonym {synonym!r} points to missing word {index}")
+                digest.update(synonym + b'\0' + struct.pack('>I', index))
+                synonym_count += 1
+        if int(info.get('synwordcount', 0)) != synonym_count:
+            raise StardictError(f"{name}: synwordcount {info.get('synwordcount', 0)} != {synonym_count}")
+
+        found = StardictDigest(word_count, synonym_count, digest.hexdigest())
+        if expected is not None and found != expected:
+            raise StardictError(f"{name}: read back {found}, wrote {expected}")
+        return found
+
 
 class StardictBuilder:
     """Handles conversion to Stardict format and packaging."""
 
-    def __init__(self, txt_dir: Path, stardict_dir: Path):
+    def __init__(self, txt_dir: Path, stardict_dir: Path, backend: str = DEFAULT_BACKEND, dictzip: bool = True,
+                 dictzip_level: int = DEFAULT_LEVEL, dictzip_chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 dictzip_threads: int = 0, combined: bool = False):
         self.txt_dir = txt_dir
         self.stardict_dir = stardict_dir
         self.unzipped_dir = stardict_dir / "unzipped"
+        self.backend = backend
+        self.dictzip = dictzip
+        self.dictzip_level = dictzip_level
+        self.dictzip_chunk_size = dictzip_chunk_size
+        self.dictzip_threads = dictzip_threads
+        self.combined = combined
 
     def convert_to_stardict(self) -> None:
         """Convert all txt files to Stardict format."""
@@ -27,7 +473,31 @@ class StardictBuilder:
             raise FileNotFoundError(f"No txt files found in {self.txt_dir}")
 
         for txt_file in txt_files:
-            self._convert_single_file(txt_file)
+            written = None
+            if self.backend == 'native':
+                written = self._convert_single_file_native(txt_file)
+            else:
+                self._convert_single_file(txt_file)
+            if self.dictzip:
+                self._compress_dict(self.unzipped_dir / f"{txt_file.stem}.ifo", written)
+
+        if self.combined:
+            self._convert_combined()
+
+    def _convert_combined(self) -> None:
+        """Write the combined Thai-English dictionary from the txt files of its sources."""
+        txt_files = [self.txt_dir / f"{name}.txt" for name in COMBINED_SOURCES]
+        txt_files = [txt_file for txt_file in txt_files if txt_file.exists()]
+        if not txt_files:
+            logger.warning(f"No txt files for {COMBINED_NAME} found in {self.txt_dir}")
+            return
+        output_file = self.unzipped_dir / f"{COMBINED_NAME}.ifo"
+        logger.info(f"Combining {', '.join(f.name for f in txt_files)} into {output_file}")
+
+        written = write_combined_stardict(txt_files, output_file)
+        logger.info(f"Wrote {written.word_count} words and {written.synonym_count} synonyms to {output_file.name}")
+        if self.dictzip:
+            self._compress_dict(output_file, written)
 
     def convert_to_mobi(self) -> None:
         """Convert all txt files to MOBI format for Kindle."""
@@ -44,8 +514,51 @@ class StardictBuilder:
         for txt_file in txt_files:
             self._convert_single_file_to_mobi(txt_file, mobi_dir)
 
+    def _convert_single_file_native(self, txt_file: Path) -> Optional[StardictDigest]:
+        """Convert a single txt file to Stardict format in process, falling back to pyglossary on failure.
+
+        Returns the digest of the written dictionary, or None if pyglossary converted it.
+        """
+        output_file = self.unzipped_dir / f"{txt_file.stem}.ifo"
+        logger.info(f"Converting {txt_file} to {output_file}")
+
+        try:
+            written = write_stardict(txt_file, output_file)
+        except (StardictError, UnicodeDecodeError) as e:
+            if not shutil.which("pyglossary"):
+                raise
+            logger.warning(f"Native conversion of {txt_file.name} failed ({e}), falling back to pyglossary")
+            self._convert_single_file(txt_file)
+            return None
+
+        logger.info(f"Wrote {written.word_count} words and {written.synonym_count} synonyms to {output_file.name}")
+        return written
+
+    def _compress_dict(self, ifo_file: Path, expected: Optional[StardictDigest] = None) -> None:
+        """Replace the .dict of a dictionary by a .dict.dz, once the .dict.dz reads back as ``expected``.
+
+        Without a digest of the written dictionary, the .dict is read for one first.
+        """
+        reader = StardictReader(ifo_file)
+        dict_file = reader.path('.dict')
+        if not dict_file.exists():
+            return  # already compressed by pyglossary
+        if expected is None:
+            expected = reader.verify()
+
+        dictzip_file = compress_file(dict_file, level=self.dictzip_level, chunk_size=self.dictzip_chunk_size,
+                                     threads=self.dictzip_threads)
+        try:
+            StardictReader(ifo_file).verify(expected)
+        except StardictError:
+            dictzip_file.unlink()
+            raise
+        dict_file.unlink()
+        logger.info(f"Compressed {dict_file.name} to {dictzip_file.name} "
+                    f"({dictzip_file.stat().st_size / 1024:.0f} KB)")
+
     def _convert_single_file(self, txt_file: Path) -> None:
-        """Convert a single txt file to Stardict format."""
+        """Convert a single txt file to Stardict format with pyglossary."""
         # Use the txt file stem as the output name
         output_name = txt_file.stem
         logger.debug(f"Processing file: {txt_file.name}, output: {output_name}")
@@ -118,9 +631,9 @@ class StardictBuilder:
         updated_lines = []
         for line in lines:
             if line.startswith('version='):
-                updated_lines.append('version=1.0.5')
+                updated_lines.append(f'version={DICTIONARY_VERSION}')
             elif line.startswith('description='):
-                updated_lines.append('description=Volubilis Thai-English Dictionary v1.0.5 (data 01.11.2025)')
+                updated_lines.append(f'description={DICTIONARY_DESCRIPTION}')
             else:
                 updated_lines.append(line)
 
@@ -133,8 +646,8 @@ class StardictBuilder:
 
         # Find all related files
         files_to_zip = []
-        for ext in [".ifo", ".idx", ".dict"]:
-            f = ifo_file.with_suffix(ext)
+        for ext in [".ifo", ".idx", ".dict", ".dict.dz", ".syn"]:
+            f = ifo_file.with_name(base_name + ext)
             if f.exists():
                 files_to_zip.append(f)
 
@@ -184,7 +697,40 @@ class StardictBuilder:
         with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as zf:
             for file_path in files_to_zip:
                 arcname = file_path.name
-                zf.write(file_path, arcname)
+                # A .dict.dz is compressed already and is stored as is, so readers can use it in place
+                compress_type = zipfile.ZIP_STORED if file_path.suffix == '.dz' else None
+                zf.write(file_path, arcname, compress_type)
                 logger.debug(f"Added {file_path} as {arcname}")
 
-        return zip_file
\ No newline at end of file
+        return zip_file
+
+
+def write_stardict(txt_file: Path, ifo_file: Path) -> StardictDigest:
+    """Convert a txt output to a Stardict dictionary at ``ifo_file`` and verify it by reading it back.
+
+    A file marked as pre-sorted is streamed; if it turns out not to be in
+    Stardict order, it is converted again sorted in memory.
+    """
+    reader = TabfileReader(txt_file)
+    writer = StardictWriter(ifo_file.with_suffix(''), stardict_bookname(txt_file, reader.info))
+    try:
+        written = writer.write(reader, presorted=reader.presorted)
+    except StardictOrderError as e:
+        logger.warning(f"{e}; sorting {txt_file.name} in memory")
+        written = writer.write(reader)
+    StardictReader(ifo_file).verify(written)
+    return written
+
+
+def write_combined_stardict(txt_files: List[Path], ifo_file: Path) -> StardictDigest:
+    """Combine txt outputs into one Stardict dictionary at ``ifo_file`` and verify it by reading it back.
+
+    See ``combine_articles``: the articles of the first file keep their
+    headwords, later articles with the same definition are only reachable
+    through the ``.syn`` file.
+    """
+    readers = [TabfileReader(txt_file) for txt_file in txt_files]
+    writer = StardictWriter(ifo_file.with_suffix(''), stardict_bookname(ifo_file.with_suffix('.txt'), {}))
+    written = writer.write(combine_articles(readers))
+    StardictReader(ifo_file).verify(written)
+    return written
@@ -1,17 +1,436 @@
 """Text formatting utilities for dictionary processing."""
 
+import functools
 import re
-from typing import Dict, List, Tuple
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, repeat
+from typing import Any, Dict, Hashable, List, Optional, Pattern, Sequence, Tuple
 
+from .collation import thai_collation_key, tone_priority
 from .config import RegexPatterns
+from .transform_store import TransformStore, patterns_fingerprint
+from .transliteration import ThaiphonEngine, Transliteration
+
+
+# Characters that make a pattern (outside a character class) more than a literal
+_METACHARS = frozenset('.^$*+?{}[]|()')
+# Escapes that stand for a single character; other escaped letters are classes or references
+_CHAR_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'f': '\f', 'v': '\v', 'a': '\a'}
+_HEX_ESCAPES = {'x': 2, 'u': 4, 'U': 8}
+
+
+def _read_char(pattern: str, i: int) -> Optional[Tuple[str, int]]:
+    """Read one literal character (possibly escaped) at ``i``; None if it is not literal."""
+    ch = pattern[i]
+    if ch != '\\':
+        return ch, i + 1
+    if i + 1 == len(pattern):
+        return None
+    ch = pattern[i + 1]
+    if ch in _CHAR_ESCAPES:
+        return _CHAR_ESCAPES[ch], i + 2
+    if ch in _HEX_ESCAPES:
+        digits = pattern[i + 2:i + 2 + _HEX_ESCAPES[ch]]
+        if len(digits) != _HEX_ESCAPES[ch] or not all(c in '0123456789abcdefABCDEF' for c in digits):
+            return None
+        return chr(int(digits, 16)), i + 2 + len(digits)
+    if ch.isalnum():
+        return None
+    return ch, i + 2
+
+
+def literal_sources(pattern: str) -> Optional[Tuple[str, ...]]:
+    """The strings a pattern matches, if it is a plain literal or a set of literal characters.
+
+    ``"ē"`` gives ``("ē",)`` and ``"[()]"`` gives ``("(", ")")``; anything
+    with anchors, quantifiers, groups, ranges or class escapes gives None.
+    """
+    if len(pattern) > 2 and pattern[0] == '[' and pattern[-1] == ']':
+        chars = []
+        i = 1
+        while i < len(pattern) - 1:
+            if pattern[i] in '[]^' or (pattern[i] == '-' and 1 < i < len(pattern) - 2):
+                return None
+            read = _read_char(pattern, i)
+            if read is None:
+                return None
+            ch, i = read
+            chars.append(ch)
+        return tuple(dict.fromkeys(chars)) if i == len(pattern) - 1 else None
+
+    chars = []
+    i = 0
+    while i < len(pattern):
+        if pattern[i] in _METACHARS:
+            return None
+        read = _read_char(pattern, i)
+        if read is None:
+            return None
+        ch, i = read
+        chars.append(ch)
+    return (''.join(chars),)
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """True if an occurrence of ``a`` and one of ``b`` can share characters."""
+    if a in b or b in a:
+        return True
+    return any(a.endswith(b[:k]) for k in range(1, len(b))) or \
+        any(b.endswith(a[:k]) for k in range(1, len(a)))
+
+
+# Below this many sources a literal group runs as str.replace calls rather than one regex
+MIN_FUSED_SOURCES = 3
+
+# A compiled step: (None, old, new) runs text.replace(old, new), (pattern, _, new) runs pattern.sub(new, text)
+Step = Tuple[Optional[Pattern], str, str]
+
+
+class _LiteralGroup:
+    """Consecutive literal rules with one replacement that can be applied in a single pass.
+
+    A rule joins when none of its sources can overlap a source of the group
+    (so matches never compete) or be formed by the replacement of an
+    earlier rule, alone or together with the text around it; an empty
+    replacement only admits single-character sources, which cannot span
+    the gap it leaves.
+    """
+
+    def __init__(self, replacement: str):
+        self.replacement = replacement
+        self.sources: List[str] = []
+
+    def accepts(self, sources: Tuple[str, ...], replacement: str) -> bool:
+        if replacement != self.replacement:
+            return False
+        for source in sources:
+            if not replacement and len(source) > 1:
+                return False
+            for earlier in self.sources:
+                if _overlaps(source, earlier):
+                    return False
+            if replacement and _overlaps(source, replacement):
+                return False
+        return True
+
+    def add(self, sources: Tuple[str, ...]) -> None:
+        self.sources.extend(sources)
+
+    def steps(self) -> List[Step]:
+        """One str.replace per source for small groups, otherwise one character class or alternation."""
+        replacement = self.replacement
+        sequential_ok = not replacement or not any(_overlaps(source, replacement) for source in self.sources[1:])
+        if len(self.sources) < MIN_FUSED_SOURCES and sequential_ok:
+            return [(None, source, replacement) for source in self.sources]
+        if all(len(source) == 1 for source in self.sources):
+            pattern = '[' + ''.join(map(re.escape, self.sources)) + ']'
+        else:
+            pattern = '|'.join(map(re.escape, sorted(self.sources, key=len, reverse=True)))
+        return [(re.compile(pattern), '', replacement)]
+
+
+def _compile_steps(rules: Tuple[Tuple[str, str], ...]) -> Tuple[Step, ...]:
+    """Compile rules into steps, merging runs of literal rules that share a replacement."""
+    steps: List[Step] = []
+    group: Optional[_LiteralGroup] = None
+    for pattern, replacement in rules:
+        sources = literal_sources(pattern) if '\\' not in replacement else None
+        if group is not None and (sources is None or not group.accepts(sources, replacement)):
+            steps.extend(group.steps())
+            group = None
+        if sources is None:
+            steps.append((re.compile(pattern), '', replacement))
+            continue
+        if group is None:
+            group = _LiteralGroup(replacement)
+        group.add(sources)
+    if group is not None:
+        steps.extend(group.steps())
+    return tuple(steps)
+
+
+@dataclass(frozen=True)
+class RegexPipeline:
+    """Ordered, immutable sequence of (pattern, replacement) rules.
+
+    Rules are compiled into ``steps`` on creation. True regexes run through
+    ``re.sub``; literal rules (plain strings, or sets of literal characters,
+    with a replacement free of group references) run through
+    ``str.replace``, and runs of them that share a replacement are merged
+    into one character class or alternation wherever that gives the same
+    result as applying them in order.
+    """
+
+    rules: Tuple[Tuple[str, str], ...] = ()
+    steps: Tuple[Step, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'steps', _compile_steps(self.rules))
+
+    @classmethod
+    def compile(cls, *groups: Dict[str, str]) -> 'RegexPipeline':
+        """Compile pattern groups in order, skipping empty patterns like replace_multi does."""
+        return cls(tuple(
+            (pattern, replacement)
+            for group in groups
+            for pattern, replacement in group.items()
+            if pattern
+        ))
+
+    def __add__(self, other: 'RegexPipeline') -> 'RegexPipeline':
+        return RegexPipeline(self.rules + other.rules)
+
+    def __call__(self, text: str) -> str:
+        for pattern, old, new in self.steps:
+            if pattern is None:
+                text = text.replace(old, new)
+            else:
+                text = pattern.sub(new, text)
+        return text
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+
+@dataclass(frozen=True)
+class TransformPipelines:
+    """The TextFormatter transforms, each compiled into a single pipeline.
+
+    Transforms that depend on ``paiboon`` have one pipeline per setting.
+    """
+
+    definition: RegexPipeline
+    tones: RegexPipeline
+    tones_paiboon: RegexPipeline
+    final_pron: RegexPipeline
+    classifier: RegexPipeline
+    classifier_paiboon: RegexPipeline
+    search: RegexPipeline
+    search_paiboon: RegexPipeline
+    spaces_workaround_dictbox: RegexPipeline
+
+    @classmethod
+    def compile(cls, patterns: RegexPatterns) -> 'TransformPipelines':
+        tones = RegexPipeline.compile(patterns.default, patterns.remove_starting_brackets,
+                                      patterns.pron, patterns.pron2)
+        paiboon = RegexPipeline.compile(patterns.type_friendly_1, patterns.to_paiboon)
+        classifier = RegexPipeline.compile(patterns.classifier) + tones
+        return cls(
+            definition=RegexPipeline.compile(patterns.default),
+            tones=tones,
+            tones_paiboon=tones + paiboon,
+            final_pron=RegexPipeline.compile(patterns.final_pron),
+            classifier=classifier,
+            classifier_paiboon=classifier + paiboon,
+            search=RegexPipeline.compile(patterns.remove_brackets, patterns.type_friendly_1,
+                                         patterns.type_friendly_2),
+            search_paiboon=RegexPipeline.compile(patterns.remove_brackets, patterns.type_friendly_2),
+            spaces_workaround_dictbox=RegexPipeline.compile(patterns.spaces_workaround_dictbox),
+        )
+
+
+class TransformCache:
+    """Size-bounded LRU of transform results with hit/miss/eviction counters."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries, keeping the counters."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_MISSING = object()
+# Separates the fields of a Transliteration in the persistent store
+FIELD_SEPARATOR = '\x1f'
+
+
+def _encode_transliteration(result: Transliteration) -> Optional[str]:
+    if any(FIELD_SEPARATOR in field for field in result):
+        return None
+    return FIELD_SEPARATOR.join(result)
+
+
+def _decode_transliteration(stored: str) -> Transliteration:
+    return Transliteration(*stored.split(FIELD_SEPARATOR))
+
+
+def _memoized(transform: str, encode=None, decode=None):
+    """Serve a transform from the formatter's TransformCache and TransformStore.
+
+    Both are keyed by (transform, text, paiboon). ``encode`` and ``decode``
+    convert results that are not strings for the persistent store.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, text, *args, **kwargs):
+            cache = self.cache
+            store = self.store
+            if cache is None and store is None:
+                return method(self, text, *args, **kwargs)
+            key = (transform, text, bool(args[0] if args else kwargs.get('paiboon', False)))
+            if cache is not None:
+                result = cache.get(key, _MISSING)
+                if result is not _MISSING:
+                    return result
+            if store is not None:
+                stored = store.get(key)
+                if stored is not None:
+                    result = decode(stored) if decode else stored
+                    if cache is not None:
+                        cache.put(key, result)
+                    return result
+            result = method(self, text, *args, **kwargs)
+            if cache is not None:
+                cache.put(key, result)
+            if store is not None:
+                stored = encode(result) if encode else result
+                if stored is not None:
+                    store.put(key, stored)
+            return result
+        return wrapper
+    return decorator
+
+
+# Batches with fewer unique values than this are formatted in-process even when given an executor
+PARALLEL_BATCH_MIN = 5000
+# Unique values per task sent to a batch worker
+BATCH_CHUNK_SIZE = 2000
+
+_batch_formatter: Optional['TextFormatter'] = None
+
+
+def _init_batch_worker(patterns: RegexPatterns) -> None:
+    """Create the per-process TextFormatter used by _format_chunk."""
+    global _batch_formatter
+    _batch_formatter = TextFormatter(patterns)
+
+
+def _format_chunk(method: str, texts: List[str], args: Tuple) -> List[Any]:
+    """Apply a TextFormatter method to a chunk of texts in a batch worker."""
+    transform = getattr(_batch_formatter, method)
+    return [transform(text, *args) for text in texts]
 
 
 class TextFormatter:
-    """Handles text formatting and regex transformations for dictionary entries."""
+    """Handles text formatting and regex transformations for dictionary entries.
 
-    def __init__(self, patterns: RegexPatterns):
+    The ``RegexPatterns`` groups are compiled into ``self.pipelines`` whenever
+    ``patterns`` is assigned. With the default patterns, pronunciations go
+    through the single-pass ``ThaiphonEngine``. A ``cache_size`` above 0
+    memoizes the pronunciation and classifier transforms in an LRU cache,
+    which is cleared when ``patterns`` is replaced; after changing a
+    RegexPatterns instance in place, assign it again. A ``TransformStore``
+    attached with ``attach_store`` persists the same results across runs.
+    """
+
+    def __init__(self, patterns: RegexPatterns, cache_size: int = 0):
+        self.cache = TransformCache(cache_size) if cache_size > 0 else None
+        self.store: Optional[TransformStore] = None
         self.patterns = patterns
 
+    @property
+    def patterns(self) -> RegexPatterns:
+        return self._patterns
+
+    @patterns.setter
+    def patterns(self, patterns: RegexPatterns) -> None:
+        self._patterns = patterns
+        self.pipelines = TransformPipelines.compile(patterns)
+        self.engine = ThaiphonEngine() if patterns == RegexPatterns() else None
+        if self.cache is not None:
+            self.cache.clear()
+        if self.store is not None and self.store.fingerprint != patterns_fingerprint(patterns):
+            self.store = None
+
+    def attach_store(self, store: TransformStore) -> None:
+        """Look up and record transform results in ``store``, which must match the patterns."""
+        if store.fingerprint != patterns_fingerprint(self.patterns):
+            raise ValueError("Transform store was opened for other patterns")
+        self.store = store
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Counters of the memoization cache, or None if it is disabled."""
+        return self.cache.stats() if self.cache is not None else None
+
+    def create_batch_executor(self, jobs: int) -> ProcessPoolExecutor:
+        """Worker pool for the ``*_batch`` methods, each worker with a formatter for these patterns."""
+        return ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                                   initargs=(self.patterns,))
+
+    def _map_unique(self, method: str, texts: Sequence[str], args: Tuple = (),
+                    executor: Optional[Executor] = None) -> List[Any]:
+        """Apply a method once per unique text and scatter the results back in input order.
+
+        With an executor, large batches are split into chunks for its
+        workers; their results bypass the memo cache and transform store.
+        """
+        unique = list(dict.fromkeys(texts))
+        if executor is not None and len(unique) >= PARALLEL_BATCH_MIN:
+            chunks = [unique[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(unique), BATCH_CHUNK_SIZE)]
+            results = chain.from_iterable(executor.map(_format_chunk, repeat(method), chunks, repeat(args)))
+        else:
+            transform = getattr(self, method)
+            results = [transform(text, *args) for text in unique]
+        lookup = dict(zip(unique, results))
+        return [lookup[text] for text in texts]
+
+    def format_tones_batch(self, texts: Sequence[str], paiboon: bool = False,
+                           executor: Optional[Executor] = None) -> List[str]:
+        """format_tones for a whole column."""
+        return self._map_unique('format_tones', texts, (paiboon,), executor)
+
+    def format_pronunciation_search_batch(self, texts: Sequence[str], paiboon: bool = False,
+                                          executor: Optional[Executor] = None) -> List[str]:
+        """format_pronunciation_search for a whole column."""
+        return self._map_unique('format_pronunciation_search', texts, (paiboon,), executor)
+
+    def transliterate_batch(self, texts: Sequence[str],
+                            executor: Optional[Executor] = None) -> List[Transliteration]:
+        """transliterate for a whole column."""
+        return self._map_unique('transliterate', texts, (), executor)
+
+    def split_and_format_classifiers_batch(self, texts: Sequence[str], paiboon: bool = False,
+                                           executor: Optional[Executor] = None) -> List[str]:
+        """split_and_format_classifiers (and so split_and_format_synonyms) for a whole column."""
+        return self._map_unique('split_and_format_classifiers', texts, (paiboon,), executor)
+
     def replace_multi(self, text: str, replacements: Dict[str, str], debug: bool = False) -> str:
         """Apply multiple regex replacements to text."""
         result = text
@@ -22,50 +441,55 @@ class TextFormatter:
                     print(f"{pattern} -> {text} {result}")
         return result
 
+    @_memoized('tones')
     def format_tones(self, text: str, paiboon: bool = False) -> str:
         """Format tone marks in pronunciation text."""
-        text = self.replace_multi(text, self.patterns.default)
-        text = self.replace_multi(text, self.patterns.remove_starting_brackets)
-        text = self.replace_multi(text, self.patterns.pron)
-        text = self.replace_multi(text, self.patterns.pron2)
+        if self.engine is not None:
+            result = self.engine.transliterate(text)
+            if result is not None:
+                return result.tones(paiboon)
         if paiboon:
-            text = self.replace_multi(text, self.patterns.type_friendly_1)
-            text = self.replace_multi(text, self.patterns.to_paiboon)
-        return text
+            return self.pipelines.tones_paiboon(text)
+        return self.pipelines.tones(text)
+
+    @_memoized('transliterate', _encode_transliteration, _decode_transliteration)
+    def transliterate(self, text: str) -> Transliteration:
+        """Return format_tones and its pronunciation search key, with and without Paiboon."""
+        if self.engine is not None:
+            result = self.engine.transliterate(text)
+            if result is not None:
+                return result
+        plain = self.pipelines.tones(text)
+        paiboon = self.pipelines.tones_paiboon(text)
+        return Transliteration(plain, paiboon, self.pipelines.search(plain), self.pipelines.search_paiboon(paiboon))
 
     def format_definition(self, text: str) -> str:
         """Format definition text."""
-        return self.replace_multi(text, self.patterns.default)
+        return self.pipelines.definition(text)
 
     def format_final_pronunciation(self, text: str, paiboon: bool = False) -> str:
         """Format final pronunciation text."""
         if not paiboon:
-            text = self.replace_multi(text, self.patterns.final_pron)
+            text = self.pipelines.final_pron(text)
         return text
 
+    @_memoized('classifier')
     def format_classifier(self, text: str, paiboon: bool = False) -> str:
         """Format classifier text."""
-        text = self.replace_multi(text, self.patterns.classifier)
-        text = self.replace_multi(text, self.patterns.default)
-        text = self.replace_multi(text, self.patterns.remove_starting_brackets)
-        text = self.replace_multi(text, self.patterns.pron)
-        text = self.replace_multi(text, self.patterns.pron2)
         if paiboon:
-            text = self.replace_multi(text, self.patterns.type_friendly_1)
-            text = self.replace_multi(text, self.patterns.to_paiboon)
-        return text
+            return self.pipelines.classifier_paiboon(text)
+        return self.pipelines.classifier(text)
 
     def spaces_workaround_dictbox(self, text: str) -> str:
         """Apply Dictbox spaces workaround."""
-        return self.replace_multi(text, self.patterns.spaces_workaround_dictbox)
+        return self.pipelines.spaces_workaround_dictbox(text)
 
+    @_memoized('search')
     def format_pronunciation_search(self, text: str, paiboon: bool = False) -> str:
         """Format text for pronunciation search."""
-        text = self.replace_multi(text, self.patterns.remove_brackets)
-        if not paiboon:
-            text = self.replace_multi(text, self.patterns.type_friendly_1)
-        text = self.replace_multi(text, self.patterns.type_friendly_2)
-        return text
+        if paiboon:
+            return self.pipelines.search_paiboon(text)
+        return self.pipelines.search(text)
 
     def clean_text(self, text: str) -> str:
         """General text cleaning."""
@@ -73,6 +497,7 @@ class TextFormatter:
             return ""
         return str(text).strip()
 
+    @_memoized('classifiers')
     def split_and_format_classifiers(self, classifiers: str, paiboon: bool = False) -> str:
         """Split classifier string by semicolon and format each part."""
         if not classifiers:
@@ -88,17 +513,8 @@ class TextFormatter:
 
     def get_tone_priority(self, thai: str) -> int:
         """Get tone priority for sorting: 0 mid, 1 low, 2 falling, 3 high, 4 rising."""
-        if '\u0e48' in thai:  # ่ low
-            return 1
-        elif '\u0e49' in thai:  # ้ falling
-            return 2
-        elif '\u0e4a' in thai:  # ๊ high
-            return 3
-        elif '\u0e4b' in thai:  # ๋ rising
-            return 4
-        else:
-            return 0  # mid
+        return tone_priority(thai)
 
     def sort_thai_words_by_tone_and_level(self, items: List[Tuple[str, str, str, str]], get_sort_prefix) -> List[Tuple[str, str, str, str]]:
-        """Sort list of (thai_word, eng, level) by tone priority then level prefix."""
-        return sorted(items, key=lambda x: (self.get_tone_priority(x[0]), get_sort_prefix(x[2])))
\ No newline at end of file
+        """Sort list of (thai_word, eng, level, ...) by tone priority, level prefix, then Thai collation order."""
+        return sorted(items, key=lambda x: (tone_priority(x[0]), get_sort_prefix(x[2]), thai_collation_key(x[0])))
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""Persistent store of TextFormatter results, reused across runs.
+
+Results are kept in a sqlite file keyed by ``(fingerprint, transform, text,
+paiboon)``, where the fingerprint identifies the ``RegexPatterns`` they were
+computed with. Several fingerprints (config variants, older releases of the
+patterns) can share one file. On open, the rows of the current fingerprint
+are loaded into a dict, so lookups during a build cost no queries; new
+results and the keys that were used are written back on ``close``.
+
+Each ``close`` starts a new generation. Rows remember the generation that
+last used them, and when the file holds more than ``max_entries`` rows the
+least recently used ones are deleted and the file is vacuumed.
+"""
+
+import hashlib
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .config import RegexPatterns
+
+logger = logging.getLogger(__name__)
+
+# Bump when the meaning of stored results changes without a pattern change
+STORE_VERSION = 1
+
+StoreKey = Tuple[str, str, bool]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transforms (
+    fingerprint TEXT NOT NULL,
+    transform TEXT NOT NULL,
+    text TEXT NOT NULL,
+    paiboon INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (fingerprint, transform, text, paiboon)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def patterns_fingerprint(patterns: RegexPatterns) -> str:
+    """Identify the results a RegexPatterns instance produces."""
+    return hashlib.md5(repr((STORE_VERSION, patterns)).encode()).hexdigest()
+
+
+class TransformStore:
+    """sqlite-backed map of (transform, text, paiboon) to the formatted result."""
+
+    def __init__(self, path: Path, fingerprint: str, max_entries: int = 500000):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[StoreKey, str] = {}
+        self._new: Dict[StoreKey, str] = {}
+        self._used: Set[StoreKey] = set()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._generation = 0
+
+    @classmethod
+    def open(cls, path: Path, patterns: RegexPatterns, max_entries: int = 500000) -> 'TransformStore':
+        """Open (or create) the store and load the results for ``patterns``."""
+        store = cls(path, patterns_fingerprint(patterns), max_entries)
+        store._load()
+        return store
+
+    def _load(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript(SCHEMA)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        self._generation = (row[0] if row else 0) + 1
+        cursor = self._conn.execute(
+            "SELECT transform, text, paiboon, result FROM transforms WHERE fingerprint = ?",
+            (self.fingerprint,))
+        self._entries = {(transform, text, bool(paiboon)): result
+                         for transform, text, paiboon, result in cursor}
+        logger.info(f"Loaded {len(self._entries)} stored transform results from {self.path}")
+
+    def get(self, key: StoreKey) -> Optional[str]:
+        """Return the stored result for ``key``, or None."""
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.add(key)
+        return result
+
+    def put(self, key: StoreKey, result: str) -> None:
+        """Remember a result computed in this run."""
+        self._entries[key] = result
+        self._new[key] = result
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'loaded': len(self._entries) - len(self._new),
+            'hits': self.hits,
+            'misses': self.misses,
+            'written': len(self._new),
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Write new results and usage back, compacting the file if it is over the limit."""
+        if self._conn is None:
+            return
+        conn = self._conn
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO transforms VALUES (?, ?, ?, ?, ?, ?)",
+                    ((self.fingerprint, transform, text, int(paiboon), result, self._generation)
+                     for (transform, text, paiboon), result in self._new.items()))
+                conn.executemany(
+                    "UPDATE transforms SET last_used = ? "
+                    "WHERE fingerprint = ? AND transform = ? AND text = ? AND paiboon = ?",
+                    ((self._generation, self.fingerprint, transform, text, int(paiboon))
+                     for transform, text, paiboon in self._used))
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (self._generation,))
+            self._compact()
+        finally:
+            conn.close()
+            self._conn = None
+
+    def _compact(self) -> None:
+        """Delete the least recently used rows above ``max_entries`` and vacuum."""
+        count = self._conn.execute("SELECT COUNT(*) FROM transforms").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM transforms WHERE rowid IN "
+                "(SELECT rowid FROM transforms ORDER BY last_used LIMIT ?)", (excess,))
+        self._conn.execute("VACUUM")
+        logger.info(f"Compacted transform store: removed {excess} least recently used results")
@@ -0,0 +1,123 @@
+"""Single-pass transliteration of thaiphon tone notation.
+
+``ThaiphonEngine`` reproduces what the default ``RegexPatterns`` chain does
+to a pronunciation - ``format_tones`` with and without Paiboon, followed by
+``format_pronunciation_search`` - in one traversal of the text instead of
+some twenty regex passes. It only covers the default patterns and the
+characters the notation uses; ``transliterate`` returns None for anything
+else so the caller can fall back to the regex pipelines.
+"""
+
+from typing import NamedTuple, Optional
+
+# Tone markers of the thaiphon notation and the Paiboon accent each one becomes
+PAIBOON_ACCENTS = {'¯': '\u0301', '\\': '\u0302', '/': '\u030c', '_': '\u0300'}
+# remove_starting_brackets: a space after one of these is dropped before [a-zɔ]
+TONE_MARKERS = frozenset('-_\\/¯')
+SPACE_JOIN_LETTERS = frozenset('abcdefghijklmnopqrstuvwxyzɔ')
+# to_paiboon: marker, consonants, then the vowel that takes the accent
+CONSONANTS = frozenset('bcdfghjklmnpqrstvwxyz')
+# Characters rewritten by pron/pron2 and type_friendly_1: (format_tones form, type-friendly form)
+VOWEL_FORMS = {
+    'ø': ('ɔ\u0305', 'ɔɔ'),
+    'ǿ': ('ɔ', 'ɔ'),
+    'ā': ('ā', 'aa'),
+    'ē': ('ē', 'ee'),
+    'ī': ('ī', 'ii'),
+    'ū': ('ū', 'uu'),
+    'ō': ('ō', 'oo'),
+}
+VOWELS = frozenset('aeiouɔ') | frozenset(VOWEL_FORMS)
+# format_pronunciation_search as one translate table: remove_brackets (plus the
+# accents added by to_paiboon) and the single-character rules of type_friendly_2
+SEARCH_TABLE = str.maketrans({
+    **{ch: None for ch in '….()\u0300\u0301\u0302\u030c'},
+    **{ch: ' ' for ch in TONE_MARKERS},
+    'ñ': 'n',
+    'ɔ': 'o',
+})
+
+# Printable ASCII plus the notation letters; anything else goes through the regex chain
+SAFE_CHARS = frozenset(map(chr, range(0x20, 0x7f))) | frozenset('¯øǿɔēāīūōñ…')
+
+
+class Transliteration(NamedTuple):
+    """All forms of one pronunciation."""
+    plain: str
+    paiboon: str
+    search_plain: str
+    search_paiboon: str
+
+    def tones(self, paiboon: bool) -> str:
+        """The ``format_tones`` result."""
+        return self.paiboon if paiboon else self.plain
+
+    def search(self, paiboon: bool) -> str:
+        """The ``format_pronunciation_search`` result for the ``format_tones`` output."""
+        return self.search_paiboon if paiboon else self.search_plain
+
+
+def _search_key(text: str) -> str:
+    """type_friendly_2 on a ``format_tones`` result whose long vowels are already doubled."""
+    text = text.translate(SEARCH_TABLE).lstrip(' ')
+    while '  ' in text:
+        text = text.replace('  ', ' ')
+    # ([tkp])h, left to right like re.sub
+    return text.replace('th', 't').replace('kh', 'k').replace('ph', 'p')
+
+
+class ThaiphonEngine:
+    """Tokenizes thaiphon text once and emits every output form."""
+
+    def transliterate(self, text: str) -> Optional[Transliteration]:
+        """Transliterate ``text``, or return None if it needs the regex chain."""
+        if not SAFE_CHARS.issuperset(text):
+            return None
+
+        # default and the bracket rules of remove_starting_brackets
+        s = text.strip(' ').replace('[', '(').replace(']', ')')
+        if len(s) >= 2 and s[0] == '(' and s[-1] == ')':
+            s = s[1:-1]
+
+        plain = []
+        friendly = []
+        paiboon = []
+        accent_at = -1
+        accent = ''
+        n = len(s)
+
+        for i, ch in enumerate(s):
+            if ch == ' ' and i and s[i - 1] in TONE_MARKERS and i + 1 < n and s[i + 1] in SPACE_JOIN_LETTERS:
+                continue
+
+            tones, doubled = VOWEL_FORMS.get(ch, (ch, ch))
+            plain.append(tones)
+            friendly.append(doubled)
+
+            if ch in PAIBOON_ACCENTS:
+                # Look past the space rule above and the consonants for a vowel
+                j = i + 1
+                if j + 1 < n and s[j] == ' ' and s[j + 1] in SPACE_JOIN_LETTERS:
+                    j += 1
+                while j < n and s[j] in CONSONANTS:
+                    j += 1
+                if j < n and s[j] in VOWELS:
+                    accent_at = j
+                    accent = PAIBOON_ACCENTS[ch]
+                    doubled = '-'
+            elif i == accent_at:
+                doubled = doubled[0] + accent + doubled[1:]
+            paiboon.append(doubled)
+
+        # The last two to_paiboon rules: ^- and ([\(\[])-
+        paiboon_text = ''.join(paiboon)
+        if paiboon_text.startswith('-'):
+            paiboon_text = paiboon_text[1:]
+        paiboon_text = paiboon_text.replace('(-', '(')
+
+        return Transliteration(
+            ''.join(plain),
+            paiboon_text,
+            _search_key(''.join(friendly)),
+            _search_key(paiboon_text),
+        )
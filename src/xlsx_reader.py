@@ -0,0 +1,595 @@
+"""Row reader backends for the Volubilis Excel workbook."""
+
+import logging
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Type
+from xml.etree.ElementTree import iterparse
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    load_workbook = None
+
+try:
+    from python_calamine import CalamineWorkbook
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+    CalamineWorkbook = None
+
+
+logger = logging.getLogger(__name__)
+
+# SpreadsheetML namespaces
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW_TAG = f"{{{MAIN_NS}}}row"
+CELL_TAG = f"{{{MAIN_NS}}}c"
+VALUE_TAG = f"{{{MAIN_NS}}}v"
+FORMULA_TAG = f"{{{MAIN_NS}}}f"
+INLINE_STRING_TAG = f"{{{MAIN_NS}}}is"
+TEXT_TAG = f"{{{MAIN_NS}}}t"
+RUN_TAG = f"{{{MAIN_NS}}}r"
+STRING_ITEM_TAG = f"{{{MAIN_NS}}}si"
+SHEET_DATA_TAG = f"{{{MAIN_NS}}}sheetData"
+
+# Raw byte patterns used to split the sheet XML without parsing it
+WORKSHEET_START = re.compile(rb"<((?:[\w.-]+:)?)worksheet\b[^>]*>")
+SHEET_DATA_START = re.compile(rb"<((?:[\w.-]+:)?)sheetData\b[^>]*?(/?)>")
+
+# OOXML escape for characters XML cannot hold, e.g. _x000D_; _x005F_ is a literal underscore
+ESCAPED_CHAR = re.compile(r"_x([0-9A-Fa-f]{4})_")
+
+
+class RowProjection:
+    """The set of 0-based columns to decode; ``None`` decodes every column.
+
+    The row parser re-reads it for every row, so a projection set after the
+    header rows applies to the data rows that follow.
+    """
+
+    def __init__(self, columns: Optional[Iterable[int]] = None):
+        self.set(columns)
+
+    def set(self, columns: Optional[Iterable[int]]) -> None:
+        """Replace the projected columns."""
+        self.columns = None if columns is None else frozenset(columns)
+        # 1-based column numbers, matching the cell references
+        self.cell_columns = None if columns is None else frozenset(c + 1 for c in self.columns)
+        self.last_column = max(self.cell_columns, default=0) if self.cell_columns is not None else 0
+
+
+class RowReader:
+    """Base class for workbook readers that stream the active sheet as row tuples.
+
+    Rows follow the ``openpyxl`` read-only ``ws.values`` conventions: empty
+    cells are ``None``, rows are only as wide as their last cell and missing
+    rows are yielded empty.
+    """
+
+    name = ""
+
+    def __init__(self, excel_file: Path, jobs: int = 1):
+        self.excel_file = Path(excel_file)
+        self.jobs = jobs
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether the dependencies of this backend are installed."""
+        return True
+
+    def iter_rows(self) -> Iterator[Tuple]:
+        """Yield the rows of the active sheet, header rows included."""
+        raise NotImplementedError
+
+    def project(self, columns: FrozenSet[int]) -> None:
+        """Only decode the given 0-based columns in the rows still to be read.
+
+        Cells outside the projection come back as ``None`` and rows stop at
+        the last projected column. Backends that cannot skip cells ignore it.
+        """
+
+    def close(self) -> None:
+        """Release any open file handles."""
+
+    def __enter__(self) -> 'RowReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class OpenpyxlReader(RowReader):
+    """Reads rows through openpyxl in read-only mode."""
+
+    name = "openpyxl"
+
+    def __init__(self, excel_file: Path, jobs: int = 1):
+        super().__init__(excel_file, jobs)
+        self._workbook = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return OPENPYXL_AVAILABLE
+
+    def iter_rows(self) -> Iterator[Tuple]:
+        self._workbook = load_workbook(self.excel_file, read_only=True)
+        logger.info(f"Sheet names: {self._workbook.sheetnames}")
+
+        ws = self._workbook.active
+        ws.reset_dimensions()
+        return iter(ws.values)
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+
+class NativeXlsxReader(RowReader):
+    """Reads rows straight from the xlsx zip archive with ``iterparse``.
+
+    The shared string table is parsed once into a list and the sheet XML is
+    streamed row by row, so memory stays flat regardless of sheet size.
+    Number cells are returned as ``int``/``float``; date styles are not
+    applied (the dictionary workbook has no date columns).
+    """
+
+    name = "native"
+
+    def __init__(self, excel_file: Path, jobs: int = 1):
+        super().__init__(excel_file, jobs)
+        self._archive: Optional[zipfile.ZipFile] = None
+        self._projection = RowProjection()
+
+    def iter_rows(self) -> Iterator[Tuple]:
+        self._archive = zipfile.ZipFile(self.excel_file)
+        shared_strings = self._read_shared_strings()
+        sheet_path = self._active_sheet_path()
+        logger.debug(f"Reading {sheet_path} with {len(shared_strings)} shared strings")
+        return self._iter_sheet_rows(sheet_path, shared_strings)
+
+    def close(self) -> None:
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def _read_shared_strings(self) -> List[str]:
+        """Parse xl/sharedStrings.xml into a list indexed by string id."""
+        if "xl/sharedStrings.xml" not in self._archive.namelist():
+            return []
+
+        strings = []
+        with self._archive.open("xl/sharedStrings.xml") as src:
+            for _, element in iterparse(src):
+                if element.tag == STRING_ITEM_TAG:
+                    strings.append(_unescape(_element_text(element)))
+                    element.clear()
+        return strings
+
+    def _active_sheet_path(self) -> str:
+        """Resolve the archive path of the workbook's active sheet."""
+        _, sheet_rel_id = active_sheet(self._archive, self.excel_file)
+
+        targets = {}
+        with self._archive.open("xl/_rels/workbook.xml.rels") as src:
+            for _, element in iterparse(src):
+                if element.tag == f"{{{PKG_REL_NS}}}Relationship":
+                    targets[element.get("Id")] = element.get("Target")
+
+        target = targets[sheet_rel_id]
+        if target.startswith("/"):
+            return target.lstrip("/")
+        return posixpath.normpath(posixpath.join("xl", target))
+
+    def _iter_sheet_rows(self, sheet_path: str, shared_strings: List[str]) -> Iterator[Tuple]:
+        """Stream row tuples from a worksheet XML part."""
+        with self._archive.open(sheet_path) as src:
+            yield from parse_sheet_rows(src, shared_strings, self._projection)
+
+    def project(self, columns: FrozenSet[int]) -> None:
+        self._projection.set(columns)
+
+
+class ParallelXlsxReader(NativeXlsxReader):
+    """Parses the sheet XML in row-aligned byte ranges across worker processes.
+
+    The worksheet part is extracted to a temporary file once and split into
+    byte ranges that start on ``<row>`` tags. Each range is parsed in a
+    worker against the shared string table, which the workers receive once
+    at start-up, and the rows are yielded in their original order. A
+    projection applies to the ranges submitted after it is set.
+    """
+
+    name = "native-parallel"
+
+    # Ranges per worker, so a slow range does not stall the whole pool
+    RANGES_PER_JOB = 4
+    # Smallest range worth shipping to a worker
+    MIN_RANGE_BYTES = 256 * 1024
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, excel_file: Path, jobs: int = 1):
+        super().__init__(excel_file, jobs)
+        self._sheet_file: Optional[Path] = None
+        self._rows: Optional[Iterator[Tuple]] = None
+
+    def iter_rows(self) -> Iterator[Tuple]:
+        if self.jobs <= 1:
+            return super().iter_rows()
+
+        self._archive = zipfile.ZipFile(self.excel_file)
+        shared_strings = self._read_shared_strings()
+        sheet_path = self._active_sheet_path()
+
+        fd, name = tempfile.mkstemp(prefix="volubilis_sheet_", suffix=".xml")
+        self._sheet_file = Path(name)
+        with os.fdopen(fd, "wb") as dst, self._archive.open(sheet_path) as src:
+            while chunk := src.read(1024 * 1024):
+                dst.write(chunk)
+
+        ranges, wrapper_open, wrapper_close = self._split_sheet(self._sheet_file)
+        logger.info(f"Parsing {sheet_path} in {len(ranges)} ranges with {self.jobs} worker processes")
+        self._rows = fill_row_gaps(self._iter_ranges(ranges, shared_strings, wrapper_open, wrapper_close))
+        return self._rows
+
+    def close(self) -> None:
+        if self._rows is not None:
+            # Shuts down the worker pool if the caller stopped early
+            self._rows.close()
+            self._rows = None
+        if self._sheet_file is not None:
+            self._sheet_file.unlink(missing_ok=True)
+            self._sheet_file = None
+        super().close()
+
+    def _iter_ranges(
+        self,
+        ranges: List[Tuple[int, int]],
+        shared_strings: List[str],
+        wrapper_open: bytes,
+        wrapper_close: bytes
+    ) -> Iterator[Tuple[Optional[int], Tuple]]:
+        """Parse the byte ranges in worker processes and yield their rows in order."""
+        initargs = (str(self._sheet_file), shared_strings, wrapper_open, wrapper_close)
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_range_worker,
+                                 initargs=initargs) as executor:
+            pending = deque()
+            remaining = iter(ranges)
+            for start, end in remaining:
+                pending.append(executor.submit(_parse_sheet_range, start, end, self._projection.columns))
+                if len(pending) >= self.jobs * 2:
+                    break
+            while pending:
+                rows = pending.popleft().result()
+                for start, end in islice(remaining, 1):
+                    pending.append(executor.submit(_parse_sheet_range, start, end, self._projection.columns))
+                yield from rows
+
+    def _split_sheet(self, sheet_file: Path) -> Tuple[List[Tuple[int, int]], bytes, bytes]:
+        """Split the <sheetData> body into byte ranges that start on <row> tags.
+
+        Returns the ranges plus the opening and closing XML needed to make
+        each range a well-formed document with the sheet's namespaces.
+        """
+        size = sheet_file.stat().st_size
+        with open(sheet_file, "rb") as f:
+            head = b""
+            match = None
+            while match is None:
+                chunk = f.read(self.READ_SIZE)
+                if not chunk:
+                    raise ValueError(f"No sheetData element in {sheet_file}")
+                head += chunk
+                match = SHEET_DATA_START.search(head)
+            if match.group(2):  # <sheetData/>: the sheet has no rows
+                return [], b"", b""
+
+            prefix = match.group(1)
+            root = WORKSHEET_START.search(head)
+            wrapper_open = root.group(0) + match.group(0)
+            wrapper_close = b"</" + prefix + b"sheetData></" + root.group(1) + b"worksheet>"
+            data_start = match.end()
+
+            closing_tag = b"</" + prefix + b"sheetData>"
+            tail_size = self.READ_SIZE
+            while True:
+                tail_start = max(data_start, size - tail_size)
+                f.seek(tail_start)
+                position = f.read(size - tail_start).rfind(closing_tag)
+                if position >= 0:
+                    data_end = tail_start + position
+                    break
+                if tail_start == data_start:
+                    raise ValueError(f"Unterminated sheetData element in {sheet_file}")
+                tail_size *= 2
+
+            parts = max(1, min(self.jobs * self.RANGES_PER_JOB,
+                               (data_end - data_start) // self.MIN_RANGE_BYTES))
+            row_start = re.compile(b"<" + re.escape(prefix) + rb"row[\s>/]")
+            boundaries = [data_start]
+            for i in range(1, parts):
+                target = max(data_start + (data_end - data_start) * i // parts, boundaries[-1] + 1)
+                boundary = self._find_row_start(f, row_start, target, data_end)
+                if boundary is not None and boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+            boundaries.append(data_end)
+
+        return list(zip(boundaries, boundaries[1:])), wrapper_open, wrapper_close
+
+    def _find_row_start(self, f, row_start, offset: int, limit: int) -> Optional[int]:
+        """Return the offset of the first <row> tag at or after offset, before limit."""
+        # Overlap reads by the tag length so a tag split across reads is still found
+        overlap = 16
+        while offset < limit:
+            f.seek(offset)
+            chunk = f.read(min(self.READ_SIZE, limit - offset))
+            match = row_start.search(chunk)
+            if match:
+                return offset + match.start()
+            if offset + len(chunk) >= limit:
+                return None
+            offset += len(chunk) - overlap
+        return None
+
+
+# Worker state for ParallelXlsxReader, set once per process by _init_range_worker
+_range_worker_state: Optional[Tuple[str, List[str], bytes, bytes]] = None
+
+
+def _init_range_worker(sheet_file: str, shared_strings: List[str], wrapper_open: bytes, wrapper_close: bytes) -> None:
+    """Store the sheet location and shared strings for _parse_sheet_range."""
+    global _range_worker_state
+    _range_worker_state = (sheet_file, shared_strings, wrapper_open, wrapper_close)
+
+
+def _parse_sheet_range(start: int, end: int,
+                       columns: Optional[FrozenSet[int]]) -> List[Tuple[Optional[int], Tuple]]:
+    """Parse the rows in one byte range of the extracted sheet XML, decoding only ``columns``."""
+    sheet_file, shared_strings, wrapper_open, wrapper_close = _range_worker_state
+    with open(sheet_file, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    source = BytesIO(wrapper_open + data + wrapper_close)
+    return list(parse_numbered_rows(source, shared_strings, RowProjection(columns)))
+
+
+def parse_sheet_rows(source, shared_strings: List[str],
+                     projection: Optional[RowProjection] = None) -> Iterator[Tuple]:
+    """Parse worksheet XML from a binary file object into row tuples."""
+    return fill_row_gaps(parse_numbered_rows(source, shared_strings, projection))
+
+
+def fill_row_gaps(numbered_rows: Iterable[Tuple[Optional[int], Tuple]], first_row: int = 1) -> Iterator[Tuple]:
+    """Turn (row number, values) pairs into row tuples, yielding skipped rows empty.
+
+    Rows without cells are left out of the XML; openpyxl yields them empty.
+    A row number of ``None`` means the row had no ``r`` attribute and follows
+    the previous one.
+    """
+    expected_row = first_row
+    for row_number, values in numbered_rows:
+        if row_number is None:
+            row_number = expected_row
+        while expected_row < row_number:
+            expected_row += 1
+            yield ()
+        expected_row = row_number + 1
+        yield values
+
+
+def parse_numbered_rows(source, shared_strings: List[str],
+                        projection: Optional[RowProjection] = None) -> Iterator[Tuple[Optional[int], Tuple]]:
+    """Parse worksheet XML into (row number or None, values) pairs.
+
+    Cells outside ``projection`` are skipped without being decoded.
+    """
+    column_cache: Dict[str, int] = {}
+    sheet_data = None
+    if projection is None:
+        projection = RowProjection()
+
+    for event, element in iterparse(source, events=("start", "end")):
+        if event == "start":
+            if element.tag == SHEET_DATA_TAG:
+                sheet_data = element
+            continue
+        if element.tag != ROW_TAG:
+            continue
+
+        row_attr = element.get("r")
+        row_number = int(float(row_attr)) if row_attr else None
+
+        wanted = projection.cell_columns
+        last_column = projection.last_column
+
+        values: List = []
+        col_counter = 0
+        for cell in element.iter(CELL_TAG):
+            ref = cell.get("r")
+            if ref:
+                letters = ref.rstrip("0123456789")
+                column = column_cache.get(letters)
+                if column is None:
+                    column = _column_index(letters)
+                    column_cache[letters] = column
+            else:
+                column = col_counter + 1
+            col_counter = column
+
+            if wanted is not None and column not in wanted:
+                if column > last_column:
+                    break
+                continue
+            if column > len(values):
+                values.extend([None] * (column - len(values)))
+            values[column - 1] = _cell_value(cell, shared_strings)
+
+        yield row_number, tuple(values)
+
+        element.clear()
+        if sheet_data is not None:
+            # Drop processed rows so the tree never grows
+            sheet_data.clear()
+
+
+def active_sheet(archive: zipfile.ZipFile, excel_file: Path) -> Tuple[str, str]:
+    """Return the name and relationship id of the workbook's active sheet."""
+    with archive.open("xl/workbook.xml") as src:
+        active_tab = 0
+        sheets = []
+        for _, element in iterparse(src):
+            if element.tag == f"{{{MAIN_NS}}}workbookView":
+                active_tab = int(element.get("activeTab", 0))
+            elif element.tag == f"{{{MAIN_NS}}}sheet":
+                sheets.append((element.get("name"), element.get(f"{{{REL_NS}}}id")))
+
+    if not sheets:
+        raise ValueError(f"No worksheets found in {excel_file}")
+    return sheets[min(active_tab, len(sheets) - 1)]
+
+
+def _column_index(letters: str) -> int:
+    """Convert a column reference like 'A' or 'AF' to a 1-based index."""
+    index = 0
+    for char in letters:
+        index = index * 26 + (ord(char) - 64)
+    return index
+
+
+def _element_text(element) -> str:
+    """Concatenate the plain and rich-text runs of a string item, skipping phonetics."""
+    snippets = []
+    for child in element:
+        if child.tag == TEXT_TAG:
+            snippets.append(child.text or "")
+        elif child.tag == RUN_TAG:
+            text = child.find(TEXT_TAG)
+            if text is not None:
+                snippets.append(text.text or "")
+    return "".join(snippets)
+
+
+def _unescape(text: str) -> str:
+    """Decode the ``_xHHHH_`` character escapes of a string item, like openpyxl's ``unescape``."""
+    if "_x" in text:
+        text = ESCAPED_CHAR.sub(lambda match: chr(int(match.group(1), 16)), text)
+    return text
+
+
+def _cell_value(cell, shared_strings: List[str]):
+    """Decode a single <c> element the way openpyxl does (without date styles)."""
+    data_type = cell.get("t", "n")
+
+    formula = cell.find(FORMULA_TAG)
+    if formula is not None and formula.text:
+        return f"={formula.text}"
+
+    if data_type == "inlineStr":
+        inline = cell.find(INLINE_STRING_TAG)
+        return _element_text(inline) if inline is not None else None
+
+    value = cell.findtext(VALUE_TAG) or None
+    if value is None:
+        return None
+    if data_type == "s":
+        return shared_strings[int(value)]
+    if data_type == "n":
+        if "." in value or "E" in value or "e" in value:
+            return float(value)
+        return int(value)
+    if data_type == "b":
+        return bool(int(value))
+    return value
+
+
+class CalamineReader(RowReader):
+    """Reads rows with the optional Rust-based ``python-calamine`` package."""
+
+    name = "calamine"
+
+    def __init__(self, excel_file: Path, jobs: int = 1):
+        super().__init__(excel_file, jobs)
+        self._workbook = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return CALAMINE_AVAILABLE
+
+    def iter_rows(self) -> Iterator[Tuple]:
+        # calamine has no notion of the active sheet, so look it up in the workbook part
+        with zipfile.ZipFile(self.excel_file) as archive:
+            sheet_name, _ = active_sheet(archive, self.excel_file)
+        self._workbook = CalamineWorkbook.from_path(str(self.excel_file))
+        logger.info(f"Sheet names: {self._workbook.sheet_names}")
+        return self._iter_sheet_rows(self._workbook.get_sheet_by_name(sheet_name))
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def _iter_sheet_rows(self, sheet) -> Iterator[Tuple]:
+        """Yield the rows of a calamine sheet from cell A1 on.
+
+        calamine pads the rows above its used range but starts every row at
+        the first used column, so the columns before it are put back.
+        """
+        if sheet.start is None:  # the sheet has no cells
+            return
+        first_row, first_column = sheet.start
+        leading = [None] * first_column
+        for row_number, row in enumerate(sheet.iter_rows()):
+            yield self._normalize_row(leading + row if row_number >= first_row else row)
+
+    @staticmethod
+    def _normalize_row(row: List) -> Tuple:
+        """Map calamine's '' for empty cells and floats for integers to openpyxl values."""
+        values = []
+        for value in row:
+            if value == "":
+                value = None
+            elif isinstance(value, float) and value.is_integer():
+                value = int(value)
+            values.append(value)
+        while values and values[-1] is None:
+            values.pop()
+        return tuple(values)
+
+
+READERS: Dict[str, Type[RowReader]] = {
+    OpenpyxlReader.name: OpenpyxlReader,
+    NativeXlsxReader.name: NativeXlsxReader,
+    ParallelXlsxReader.name: ParallelXlsxReader,
+    CalamineReader.name: CalamineReader,
+}
+
+
+def available_readers() -> List[str]:
+    """Names of the reader backends whose dependencies are installed."""
+    return [name for name, reader in READERS.items() if reader.is_available()]
+
+
+def create_reader(name: str, excel_file: Path, jobs: int = 1) -> RowReader:
+    """Create a reader backend by name, falling back to the native reader if unavailable."""
+    if name not in READERS:
+        raise ValueError(f"Unknown reader backend: {name} (choose from {', '.join(READERS)})")
+
+    reader_class = READERS[name]
+    if not reader_class.is_available():
+        logger.warning(f"Reader backend '{name}' is not installed - using '{NativeXlsxReader.name}'")
+        reader_class = NativeXlsxReader
+    return reader_class(excel_file, jobs)
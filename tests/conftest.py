@@ -55,6 +55,27 @@ def sample_excel_data():
     ]
 
 
+@pytest.fixture
+def sample_workbook(temp_dir):
+    """Write a small workbook with gaps, numbers and rich cell types."""
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Volubilis", None, None])
+    ws.append(["THAIROM", "EASYTHAI", "THAIPHON", "THA", "ENG"])
+    ws.append([None, None, "¯maa", "มา", "come", None, None, 1, 2.5])
+    # Row 4 left empty on purpose
+    ws.cell(row=5, column=4, value="ม้า")
+    ws.cell(row=5, column=5, value="horse")
+    ws.cell(row=5, column=7, value=True)
+    # Another sheet ahead of the active one
+    wb.create_sheet("other", 0).append(["ignored"])
+    wb.active = ws
+    path = temp_dir / "sample.xlsx"
+    wb.save(path)
+    return path
+
+
 @pytest.fixture
 def mock_openpyxl():
     """Mock openpyxl for testing without actual Excel files."""
@@ -74,5 +95,5 @@ def mock_openpyxl():
 
     import sys
     from unittest.mock import patch
-    with patch('src.dictionary_processor.load_workbook', mock_load):
+    with patch('src.xlsx_reader.load_workbook', mock_load):
         yield mock_load
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""Tests for Thai collation and tone keys."""
+
+from src.collation import level_sort_prefix, stardict_headword_key, stardict_sort_key, thai_collation_key, tone_level_key, tone_priority
+
+
+class TestThaiCollation:
+    """Test cases for thai_collation_key."""
+
+    def test_leading_vowels_sort_by_consonant(self):
+        """Test that words with a leading vowel sort under the consonant that follows it."""
+        words = ["ข", "เก", "กา", "ไก่", "แกะ", "กก"]
+        assert sorted(words, key=thai_collation_key) == ["กก", "กา", "เก", "แกะ", "ไก่", "ข"]
+        # Code point order puts every leading vowel after ข
+        assert sorted(words) == ["กก", "กา", "ข", "เก", "แกะ", "ไก่"]
+
+    def test_tone_marks_only_break_ties(self):
+        """Test that tone marks are ignored until the letters are equal."""
+        assert sorted(["กาก", "ก่า", "กา"], key=thai_collation_key) == ["กา", "ก่า", "กาก"]
+        assert sorted(["ก้า", "ก่า", "กา"], key=thai_collation_key) == ["กา", "ก่า", "ก้า"]
+
+    def test_key_is_total(self):
+        """Test that different words never get equal keys."""
+        assert thai_collation_key("ก่า") != thai_collation_key("กา")
+        assert thai_collation_key("") < thai_collation_key("ก")
+
+
+class TestStardictOrder:
+    """Test cases for stardict_sort_key."""
+
+    def test_ascii_case_folded_first(self):
+        """Test that ASCII case is ignored first and only breaks ties, upper case first."""
+        words = ["b", "B", "a", "ab", "A"]
+        assert sorted(words, key=stardict_sort_key) == ["A", "a", "ab", "B", "b"]
+
+    def test_non_ascii_by_utf8_bytes(self):
+        """Test that non-ASCII letters compare by their UTF-8 bytes and are not case folded."""
+        assert sorted(["ก", "é", "z", "É"], key=stardict_sort_key) == ["z", "É", "é", "ก"]
+        assert stardict_sort_key("É") != stardict_sort_key("é")
+
+    def test_headword_ordered_by_first_term(self):
+        """Test that alternates after "|" do not take part in the order of a headword."""
+        headwords = ["a|z", "ab", "a|b"]
+        assert sorted(headwords, key=stardict_headword_key) == ["a|z", "a|b", "ab"]
+        # The whole string would put "ab" first, since "b" < "|"
+        assert sorted(headwords, key=stardict_sort_key) == ["ab", "a|b", "a|z"]
+
+
+class TestToneAndLevel:
+    """Test cases for the tone and level keys."""
+
+    def test_tone_priority(self):
+        """Test tone priorities, with the first mark in low-falling-high-rising order winning."""
+        assert tone_priority("กา") == 0
+        assert tone_priority("ก่า") == 1
+        assert tone_priority("ก้า") == 2
+        assert tone_priority("ก๊า") == 3
+        assert tone_priority("ก๋า") == 4
+        assert tone_priority("ก้าก่") == 1
+
+    def test_level_sort_prefix(self):
+        """Test that levels become two-character prefixes."""
+        assert level_sort_prefix("") == "  "
+        assert level_sort_prefix("1") == "1 "
+        assert level_sort_prefix("12") == "12"
+        assert level_sort_prefix("123") == "12"
+
+    def test_tone_level_key_order(self):
+        """Test ordering by tone, then level, then Thai collation order."""
+        items = [("ไก่", "2"), ("ข", "1"), ("เก", "1"), ("ก่", "1"), ("กา", "")]
+        ordered = sorted(items, key=lambda item: tone_level_key(*item))
+        assert ordered == [("กา", ""), ("เก", "1"), ("ข", "1"), ("ก่", "1"), ("ไก่", "2")]
@@ -3,7 +3,7 @@
 import pytest
 from pathlib import Path
 
-from src.config import Config, DictionaryConfig, RegexPatterns
+from src.config import Config, DictionaryConfig, RegexPatterns, parse_output_flavors
 
 
 class TestRegexPatterns:
@@ -85,6 +85,86 @@ class TestDictionaryConfig:
         with pytest.raises(ValueError, match="Column mapping references column"):
             config.validate()
 
+    def test_definition_flavor_validation(self, temp_dir):
+        """Test that unknown flavors and output names are rejected."""
+        config = Config()
+        config.dictionary.excel_file = temp_dir / "test.xlsx"
+        config.dictionary.excel_file.touch()  # Create dummy file
+        config.dictionary.output_flavors = parse_output_flavors(["en_th=plain", "th_en = compact"])
+        assert config.dictionary.output_flavors == {'en_th': 'plain', 'th_en': 'compact'}
+        config.validate()
+
+        config.dictionary.output_flavors = {'en_th': 'rtf'}
+        with pytest.raises(ValueError, match="Unknown definition flavor"):
+            config.validate()
+
+        config.dictionary.output_flavors = {'fr_th': 'plain'}
+        with pytest.raises(ValueError, match="Unknown output"):
+            config.validate()
+
+        with pytest.raises(ValueError, match="OUTPUT=FLAVOR"):
+            parse_output_flavors(["plain"])
+
+    def test_write_options_validation(self, temp_dir):
+        """Test that the write buffer and thread count must be positive."""
+        config = Config()
+        config.dictionary.excel_file = temp_dir / "test.xlsx"
+        config.dictionary.excel_file.touch()  # Create dummy file
+        config.dictionary.write_buffer_mb = 0
+
+        with pytest.raises(ValueError, match="Write buffer size must be positive"):
+            config.validate()
+
+        config.dictionary.write_buffer_mb = 8
+        config.dictionary.write_threads = 0
+        with pytest.raises(ValueError, match="Write threads must be positive"):
+            config.validate()
+
+    def test_reader_backend_validation(self, temp_dir):
+        """Test that the reader backend must be one of the registered readers."""
+        config = Config()
+        config.dictionary.excel_file = temp_dir / "test.xlsx"
+        config.dictionary.excel_file.touch()  # Create dummy file
+        assert config.dictionary.reader_backend == "openpyxl"
+        config.dictionary.reader_backend = "native-parallel"
+        config.validate()
+
+        config.dictionary.reader_backend = "natve"
+        with pytest.raises(ValueError, match="Unknown reader backend"):
+            config.validate()
+
+    def test_stardict_backend_validation(self, temp_dir):
+        """Test that the Stardict backend must be native or pyglossary."""
+        config = Config()
+        config.dictionary.excel_file = temp_dir / "test.xlsx"
+        config.dictionary.excel_file.touch()  # Create dummy file
+        config.dictionary.stardict_backend = "pyglossary"
+        config.validate()
+
+        config.dictionary.stardict_backend = "mdict"
+        with pytest.raises(ValueError, match="Unknown Stardict backend"):
+            config.validate()
+
+    def test_dictzip_options_validation(self, temp_dir):
+        """Test the dictzip level, chunk size and thread count limits."""
+        config = Config()
+        config.dictionary.excel_file = temp_dir / "test.xlsx"
+        config.dictionary.excel_file.touch()  # Create dummy file
+        config.dictionary.dictzip_level = 0
+
+        with pytest.raises(ValueError, match="Dictzip level must be between 1 and 9"):
+            config.validate()
+
+        config.dictionary.dictzip_level = 9
+        config.dictionary.dictzip_chunk_size = 65535
+        with pytest.raises(ValueError, match="Dictzip chunk size must be between 1 and 58315"):
+            config.validate()
+
+        config.dictionary.dictzip_chunk_size = 58315
+        config.dictionary.dictzip_threads = -1
+        with pytest.raises(ValueError, match="Dictzip threads must not be negative"):
+            config.validate()
+
     def test_column_mapping_keys(self):
         """Test that all expected column mapping keys exist."""
         config = DictionaryConfig()
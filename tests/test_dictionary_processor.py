@@ -5,6 +5,8 @@ from unittest.mock import patch, MagicMock
 from pathlib import Path
 
 from src.dictionary_processor import DictionaryProcessor
+from src.entries import EntryStore
+from src.renderer import get_renderer
 
 
 class TestDictionaryProcessor:
@@ -67,6 +69,62 @@ class TestDictionaryProcessor:
         assert processor._get_sort_prefix("A1") == "A1"
         assert processor._get_sort_prefix("ABC") == "AB"
 
+    def test_sorted_definitions(self, mock_config):
+        """Test that definitions sort by their Thai headword in collation order, th-en entries by level first."""
+        processor = DictionaryProcessor(mock_config)
+        entry_ids = [
+            processor.entries.add(processor._definition_entry(thai, "", "n.", "", "", "", "", "", level, "x"))
+            for thai, level in (("ไก่", "1"), ("ข", "1"), ("กา", "2"))
+        ]
+
+        def thai_of(definition):
+            return definition.split("<strong>")[1].split("</strong>")[0]
+
+        html = processor.html_renderer
+        en_th = processor._sorted_definitions(entry_ids, html)
+        assert [thai_of(definition) for definition in en_th] == ["กา", "ไก่", "ข"]
+        th_en = processor._sorted_definitions(entry_ids, html, by_level=True)
+        assert [thai_of(definition) for definition in th_en] == ["ไก่", "ข", "กา"]
+        assert th_en[0] == processor._format_definition("ไก่", "", "n.", "", "", "", "", "", "1", "x")
+
+    def test_sorted_definitions_break_ties_by_html(self, mock_config):
+        """Test that entries with the same headword and level sort by their HTML rendering in every flavor."""
+        processor = DictionaryProcessor(mock_config)
+        entry_ids = [
+            processor.entries.add(processor._definition_entry("กา", "", "n.", "", "", "", "", "", "1", english))
+            for english in ("crow", "boat")
+        ]
+
+        html = processor._sorted_definitions(entry_ids, processor.html_renderer)
+        plain = processor._sorted_definitions(entry_ids, get_renderer("plain"))
+        assert html[0] < html[1] and "boat" in html[0]
+        assert "boat" in plain[0] and "crow" in plain[1]
+
+    def test_output_flavors_keep_entry_order(self, mock_config, sample_excel_data):
+        """Test that a flavor selected for one output changes its markup but not its order."""
+        import io
+        processor = DictionaryProcessor(mock_config)
+        rows = [tuple(row) for row in sample_excel_data] * 2
+
+        def build():
+            processor.entries = EntryStore()
+            maps = processor._create_aggregation_maps(None)
+            for row in rows:
+                processor._process_row(row, *maps)
+            files = {name: io.StringIO() for name in ('th_en', 'th_pron_en', 'th_pron_merge_en', 'en_th')}
+            processor._write_output_files(files, *maps)
+            return {name: f.getvalue().splitlines() for name, f in files.items()}
+
+        html = build()
+        mock_config.dictionary.output_flavors = {'en_th': 'plain', 'th_en': 'compact'}
+        flavored = build()
+
+        assert flavored['th_pron_en'] == html['th_pron_en']
+        assert [line.split("\t")[0] for line in flavored['en_th']] == [line.split("\t")[0] for line in html['en_th']]
+        assert not any("<" in line for line in flavored['en_th'])
+        assert all('class="' not in line for line in flavored['th_en'])
+        assert len(flavored['th_en']) == len(html['th_en'])
+
     def test_format_level_info(self, mock_config):
         """Test level and domain information formatting."""
         processor = DictionaryProcessor(mock_config)
@@ -197,4 +255,304 @@ class TestDictionaryProcessor:
 
         assert "cat" in en_th_data
         assert "noun" in en_th_data["cat"]
-        assert len(en_th_data["cat"]["noun"]) == 1
\ No newline at end of file
+        assert len(en_th_data["cat"]["noun"]) == 1
+
+    def test_process_excel_file_single_pass(self, mock_config, mock_openpyxl):
+        """Test that the sheet is streamed through a single iterator."""
+        ws = mock_openpyxl.return_value.active
+        # A one-shot iterator fails if the rows are iterated twice
+        ws.values = iter(ws.values)
+        mock_config.dictionary.reader_backend = "openpyxl"
+        processor = DictionaryProcessor(mock_config)
+
+        processor.process_excel_file()
+
+        th_en_file = mock_config.dictionary.output_folder / "volubilis_th-en.txt"
+        content = th_en_file.read_text(encoding='utf-8')
+        assert "ขอบคุณ" in content
+        assert "แมว" in content
+        # The first two rows are headers
+        assert "สวัสดี" not in content
+
+    def test_process_excel_file_marks_presorted_files(self, mock_config, mock_openpyxl):
+        """Test that files in StarDict order get a marker file and keep no header line."""
+        from src.collation import presorted_marker
+        mock_config.dictionary.reader_backend = "openpyxl"
+        th_en_file = mock_config.dictionary.output_folder / "volubilis_th-en.txt"
+
+        DictionaryProcessor(mock_config).process_excel_file()
+
+        assert presorted_marker(th_en_file).exists()
+        assert not th_en_file.read_text(encoding='utf-8').startswith("#")
+
+        mock_config.dictionary.stardict_order = False
+        DictionaryProcessor(mock_config).process_excel_file()
+
+        assert not presorted_marker(th_en_file).exists()
+
+    def test_process_rows_parallel_matches_serial(self, mock_config, sample_excel_data):
+        """Test that worker processes produce the same maps as the serial path."""
+        from collections import defaultdict
+        mock_config.dictionary.jobs = 2
+        mock_config.dictionary.job_batch_size = 1
+        processor = DictionaryProcessor(mock_config)
+        rows = [tuple(row) for row in sample_excel_data] * 2
+
+        def new_maps():
+            processor.entries = EntryStore()
+            return (defaultdict(list), defaultdict(list), defaultdict(list),
+                    defaultdict(lambda: defaultdict(list)))
+
+        serial = new_maps()
+        for row in rows:
+            processor._process_row(row, *serial)
+        serial_entries = processor.entries
+        parallel = new_maps()
+        count = processor._process_rows_parallel(iter(rows), *parallel)
+
+        assert count == len(rows)
+        assert processor.entries == serial_entries
+        for serial_map, parallel_map in zip(serial, parallel):
+            assert processor._convert_defaultdict_to_dict(parallel_map) == \
+                processor._convert_defaultdict_to_dict(serial_map)
+            assert list(parallel_map) == list(serial_map)
+
+    def test_process_rows_columnar_matches_serial(self, mock_config):
+        """Test that columnar blocks with batch formatting produce the same maps as the serial path."""
+        from collections import defaultdict
+        from benchmarks.synthetic import generate_rows
+        mock_config.dictionary.columnar_block_size = 64
+        processor = DictionaryProcessor(mock_config)
+        rows = list(generate_rows(300, seed=3, header=False))
+
+        def new_maps():
+            processor.entries = EntryStore()
+            return (defaultdict(list), defaultdict(list), defaultdict(list),
+                    defaultdict(lambda: defaultdict(list)))
+
+        serial = new_maps()
+        serial_count = sum(processor._process_row(row, *serial) for row in rows)
+        serial_entries = processor.entries
+        columnar = new_maps()
+        count = processor._process_rows_columnar(iter(rows), *columnar)
+
+        assert count == serial_count
+        assert processor.entries == serial_entries
+        for serial_map, columnar_map in zip(serial, columnar):
+            assert processor._convert_defaultdict_to_dict(columnar_map) == \
+                processor._convert_defaultdict_to_dict(serial_map)
+            assert list(columnar_map) == list(serial_map)
+
+    def test_iter_data_rows_debug_limit(self, mock_config):
+        """Test that the debug limit stops the row stream at 1000 rows."""
+        mock_config.dictionary.debug_test_1000_rows = True
+        processor = DictionaryProcessor(mock_config)
+
+        rows = list(processor._iter_data_rows(iter([()] * 2000), 2))
+
+        assert len(rows) == 998
+        assert processor.rows_read == 1000
+
+    def test_process_rows_incremental_matches_full_rebuild(self, mock_config, sample_excel_data):
+        """Test that replaying stored row fragments gives the same maps as a full build."""
+        from collections import defaultdict
+        processor = DictionaryProcessor(mock_config)
+
+        def new_maps():
+            processor.entries = EntryStore()
+            return (defaultdict(list), defaultdict(list), defaultdict(list),
+                    defaultdict(lambda: defaultdict(list)))
+
+        first_release = [tuple(row) for row in sample_excel_data]
+        processor._process_rows_incremental(iter(first_release), *new_maps())
+
+        # Next release: one row changed, one removed, one added
+        second_release = list(first_release)
+        second_release[0] = second_release[0][:4] + ("hi",) + second_release[0][5:]
+        del second_release[1]
+        second_release.append(("", "", "bâan", "บ้าน", "house", "", "", "noun", "", "", "", "หลัง", "", "A1", ""))
+
+        full = new_maps()
+        for row in second_release:
+            processor._process_row(row, *full)
+        full_entries = processor.entries
+        incremental = new_maps()
+        with patch.object(processor, '_row_fragment', wraps=processor._row_fragment) as row_fragment:
+            count = processor._process_rows_incremental(iter(second_release), *incremental)
+
+        assert count == len(second_release)
+        assert row_fragment.call_count == 2  # only the changed and the added row
+        assert processor.entries == full_entries
+        for full_map, incremental_map in zip(full, incremental):
+            assert processor._convert_defaultdict_to_dict(incremental_map) == \
+                processor._convert_defaultdict_to_dict(full_map)
+            assert list(incremental_map) == list(full_map)
+
+    def test_row_store_discarded_when_settings_change(self, mock_config, sample_excel_data):
+        """Test that fragments built with other settings are not reused."""
+        from collections import defaultdict
+        processor = DictionaryProcessor(mock_config)
+        rows = [tuple(row) for row in sample_excel_data]
+        processor._process_rows_incremental(iter(rows), defaultdict(list), defaultdict(list),
+                                            defaultdict(list), defaultdict(lambda: defaultdict(list)))
+
+        assert len(processor._load_row_store()) == len(rows)
+        mock_config.dictionary.paiboon = not mock_config.dictionary.paiboon
+        assert processor._load_row_store() == {}
+
+    def test_spilled_aggregation_matches_in_memory(self, mock_config, sample_excel_data):
+        """Test that a spilling build writes the same output as the in-memory maps."""
+        import io
+        from src.spill import SpillBudget
+        mock_config.dictionary.th_pron_merge = True
+        processor = DictionaryProcessor(mock_config)
+        rows = [tuple(row) for row in sample_excel_data] * 3
+
+        def build(budget):
+            processor.entries = processor._create_entry_store(budget)
+            maps = processor._create_aggregation_maps(budget)
+            for row in rows:
+                processor._process_row(row, *maps)
+            files = {name: io.StringIO() for name in ('th_en', 'th_pron_en', 'th_pron_merge_en', 'en_th')}
+            processor._write_output_files(files, *maps)
+            return {name: f.getvalue() for name, f in files.items()}
+
+        budget = SpillBudget(1)  # spill after every entry
+        try:
+            spilled = build(budget)
+        finally:
+            budget.close()
+
+        assert budget.spill_count > 0
+        assert spilled == build(None)
+
+    def test_spilled_build_memory_stays_within_budget(self, mock_config):
+        """Test that a budgeted build keeps its entries, maps and write buffers within the budget."""
+        import tracemalloc
+        from src.spill import SpillBudget
+        mock_config.dictionary.th_pron_merge = False
+        mock_config.dictionary.formatter_cache_size = 100
+        mock_config.dictionary.output_folder.mkdir()
+        processor = DictionaryProcessor(mock_config)
+        limit = 1024 * 1024
+
+        def rows():
+            # 80 headwords with 80 entries each, every entry with its own note
+            for i in range(6400):
+                yield ("", "", "mɛɛw", f"แมว{i % 80}", f"cat {i % 80}", "", "noun", "", "", "", "", "", "A1",
+                       f"note {i} " + "x" * 200)
+
+        def build(budget):
+            processor.entries = processor._create_entry_store(budget)
+            maps = processor._create_aggregation_maps(budget)
+            tracemalloc.start()
+            try:
+                baseline = tracemalloc.get_traced_memory()[0]
+                for row in rows():
+                    processor._process_row(row, *maps)
+                if budget is not None:
+                    budget.spill()  # as process_excel_file does before writing
+                processor._write_outputs(processor._open_output_files(budget), *maps)
+                return tracemalloc.get_traced_memory()[1] - baseline
+            finally:
+                tracemalloc.stop()
+
+        budget = SpillBudget(limit)
+        try:
+            spilled_peak = build(budget)
+        finally:
+            budget.close()
+
+        assert budget.spill_count > 0
+        assert build(None) > 3 * limit
+        assert spilled_peak < 2 * limit
+
+    def test_process_excel_file_records_stages(self, mock_config, mock_openpyxl):
+        """Test that ingest, process and write stages are recorded."""
+        from src.metrics import RunMetrics
+        mock_config.dictionary.reader_backend = "openpyxl"
+        metrics = RunMetrics()
+        processor = DictionaryProcessor(mock_config, metrics)
+
+        processor.process_excel_file()
+
+        assert [stage.name for stage in metrics.stages] == ["ingest", "process", "write"]
+        assert metrics.get("ingest").rows == processor.rows_read
+        assert metrics.get("write").bytes_written > 0
+
+    def test_process_excel_file_reports_output_files(self, mock_config, mock_openpyxl):
+        """Test that the bytes and lines of each output file are added to the metrics."""
+        from src.metrics import RunMetrics
+        mock_config.dictionary.reader_backend = "openpyxl"
+        metrics = RunMetrics()
+        processor = DictionaryProcessor(mock_config, metrics)
+
+        processor.process_excel_file()
+
+        stats = metrics.counters['output_files']
+        assert set(stats) == {'th_en', 'th_pron_en', 'th_pron_merge_en', 'en_th'}
+        for file_stats in stats.values():
+            path = Path(file_stats['path'])
+            assert file_stats['bytes'] == path.stat().st_size
+            assert file_stats['lines'] == len(path.read_text(encoding='utf-8').splitlines())
+        assert metrics.get("write").bytes_written == sum(file_stats['bytes'] for file_stats in stats.values())
+
+    def test_concurrent_writes_match_serial(self, mock_config, sample_excel_data):
+        """Test that writing the outputs in a thread pool gives the same files as one thread."""
+        import io
+        processor = DictionaryProcessor(mock_config)
+        maps = processor._create_aggregation_maps(None)
+        for row in [tuple(row) for row in sample_excel_data] * 2:
+            processor._process_row(row, *maps)
+
+        def write(threads):
+            mock_config.dictionary.write_threads = threads
+            files = {name: io.StringIO() for name in ('th_en', 'th_pron_en', 'th_pron_merge_en', 'en_th')}
+            processor._write_output_files(files, *maps)
+            return {name: f.getvalue() for name, f in files.items()}
+
+        serial = write(1)
+        assert serial['th_en']
+        assert write(4) == serial
+
+    def test_headwords_in_stardict_order(self, mock_config, sample_excel_data):
+        """Test that every file lists its headwords in StarDict order, without a header line."""
+        import io
+        from src.collation import stardict_headword_key
+        processor = DictionaryProcessor(mock_config)
+        maps = processor._create_aggregation_maps(None)
+        rows = [tuple(row) for row in sample_excel_data]
+        rows.append(("", "", "maa", "ม้าลาย", "Zebra", "zebra", "", "noun", "", "", "animal", "", "", "", ""))
+        for row in rows:
+            processor._process_row(row, *maps)
+
+        def write():
+            files = {name: io.StringIO() for name in ('th_en', 'th_pron_en', 'th_pron_merge_en', 'en_th')}
+            processor._write_output_files(files, *maps)
+            return {name: f.getvalue().splitlines(keepends=True) for name, f in files.items()}
+
+        sorted_files = write()
+        mock_config.dictionary.stardict_order = False
+        unsorted_files = write()
+
+        for name, lines in sorted_files.items():
+            headwords = [line.split("\t")[0] for line in lines]
+            assert headwords == sorted(headwords, key=stardict_headword_key)
+            assert sorted(lines) == sorted(unsorted_files[name])
+        english = [line.split("\t")[0] for line in sorted_files['en_th']]
+        # ASCII case is folded first, so "Zebra" comes after "maew"
+        assert english.index("maew") < english.index("Zebra")
+
+    def test_process_excel_file_reports_distinct_values(self, mock_config, mock_openpyxl):
+        """Test that the distinct value counts of the encoded fields are added to the metrics."""
+        from src.metrics import RunMetrics
+        mock_config.dictionary.reader_backend = "openpyxl"
+        metrics = RunMetrics()
+        processor = DictionaryProcessor(mock_config, metrics)
+
+        processor.process_excel_file()
+
+        counts = metrics.counters['distinct_values']
+        assert counts == processor.entries.distinct_counts()
+        assert counts['level'] == 1
+        assert len(processor.entries) == 2
@@ -0,0 +1,111 @@
+"""Tests for dictzip compression."""
+
+import gzip
+import random
+import struct
+
+import pytest
+
+from src.dictzip import DictzipReader, chunk_count, compress_file
+from src.exceptions import StardictError
+
+
+def _sample(size):
+    rng = random.Random(0)
+    words = ["แมว", "หมา", "<b>cat</b>", "dog", "ม้า", "horse", "<br>"]
+    data = " ".join(rng.choice(words) for _ in range(size // 4)).encode('utf-8')
+    return data[:size]
+
+
+class TestDictzip:
+    """Test cases for compress_file and DictzipReader."""
+
+    def test_round_trip(self, temp_dir):
+        """Test that the file reads back through the chunk table and as plain gzip."""
+        source = temp_dir / "test.dict"
+        data = _sample(100000)
+        source.write_bytes(data)
+
+        dictzip_file = compress_file(source, chunk_size=4096, threads=1)
+
+        assert dictzip_file == temp_dir / "test.dict.dz"
+        assert source.exists()
+        assert gzip.decompress(dictzip_file.read_bytes()) == data
+        reader = DictzipReader(dictzip_file)
+        assert reader.chunk_size == 4096
+        assert len(reader.lengths) == chunk_count(len(data), 4096) == 25
+        assert reader.read_all() == data
+
+    def test_random_access(self, temp_dir):
+        """Test that reads across chunk boundaries only need the chunks they cover."""
+        source = temp_dir / "test.dict"
+        data = _sample(50000)
+        source.write_bytes(data)
+        reader = DictzipReader(compress_file(source, chunk_size=1000))
+
+        for offset, size in ((0, 10), (995, 10), (1000, 1000), (2500, 7000), (49990, 10), (0, 50000)):
+            assert reader.read(offset, size) == data[offset:offset + size]
+        assert reader.chunk(3) == data[3000:4000]
+
+    def test_header_chunk_table(self, temp_dir):
+        """Test the RA extra field: version 1, chunk size, count and the compressed chunk lengths."""
+        source = temp_dir / "test.dict"
+        source.write_bytes(_sample(10000))
+
+        raw = compress_file(source, chunk_size=3000).read_bytes()
+
+        assert raw[:4] == b"\x1f\x8b\x08\x0c"  # gzip, deflate, FEXTRA | FNAME
+        extra_length, = struct.unpack_from('<H', raw, 10)
+        assert raw[12:14] == b"RA"
+        field_length, version, chunk_size, count = struct.unpack_from('<HHHH', raw, 14)
+        assert (extra_length, field_length, version, chunk_size, count) == (18, 14, 1, 3000, 4)
+        lengths = struct.unpack_from('<4H', raw, 22)
+        name_end = raw.index(b"\0", 30) + 1
+        assert raw[30:name_end] == b"test.dict\0"
+        assert name_end + sum(lengths) + 8 == len(raw)
+
+    def test_threads_do_not_change_output(self, temp_dir):
+        """Test that parallel compression writes the same bytes as serial compression."""
+        source = temp_dir / "test.dict"
+        source.write_bytes(_sample(200000))
+
+        serial = compress_file(source, temp_dir / "serial.dz", level=6, chunk_size=2048, threads=1)
+        parallel = compress_file(source, temp_dir / "parallel.dz", level=6, chunk_size=2048, threads=4)
+
+        assert serial.read_bytes() == parallel.read_bytes()
+
+    def test_empty_file(self, temp_dir):
+        """Test that an empty file compresses to one empty chunk."""
+        source = temp_dir / "empty.dict"
+        source.write_bytes(b"")
+
+        dictzip_file = compress_file(source)
+
+        assert gzip.decompress(dictzip_file.read_bytes()) == b""
+        assert DictzipReader(dictzip_file).read_all() == b""
+
+    def test_invalid_chunk_size_and_too_many_chunks(self, temp_dir):
+        """Test that chunk sizes outside the 16-bit table and oversized files are rejected."""
+        source = temp_dir / "test.dict"
+        source.write_bytes(b"x" * 40000)
+
+        with pytest.raises(ValueError, match="chunk size"):
+            compress_file(source, chunk_size=65536)
+        with pytest.raises(StardictError, match="too large"):
+            compress_file(source, chunk_size=1)
+
+    def test_corruption_detected(self, temp_dir):
+        """Test that a damaged file fails the read-back checks."""
+        source = temp_dir / "test.dict"
+        source.write_bytes(_sample(20000))
+        dictzip_file = compress_file(source, chunk_size=5000)
+        raw = bytearray(dictzip_file.read_bytes())
+        raw[-8] ^= 0xFF  # CRC
+        dictzip_file.write_bytes(bytes(raw))
+
+        with pytest.raises(StardictError, match="CRC"):
+            DictzipReader(dictzip_file).read_all()
+
+        dictzip_file.write_bytes(bytes(raw[:-1]))
+        with pytest.raises(StardictError, match="file size"):
+            DictzipReader(dictzip_file)
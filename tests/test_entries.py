@@ -0,0 +1,96 @@
+"""Tests for the compact entry store."""
+
+import pickle
+
+from src.entries import Entry, EntryStore, ValueTable
+
+
+def _entry(thai, level="", type_word="v."):
+    return Entry(thai=thai, pron="kin", type_word=type_word, usage="", classifiers="", english="eat",
+                 synonyms="", scient="", level=level, dom="", note="")
+
+
+class TestValueTable:
+    """Test cases for ValueTable."""
+
+    def test_encode_numbers_values_in_first_seen_order(self):
+        """Test that each distinct value gets one code."""
+        table = ValueTable()
+
+        assert [table.encode(value) for value in ("n.", "v.", "n.", "")] == [0, 1, 0, 2]
+        assert table.values == ["n.", "v.", ""]
+        assert len(table) == 3
+
+    def test_clean_cell_shares_values(self):
+        """Test that repeated cells are cleaned once and map to one value object."""
+        table = ValueTable()
+        calls = []
+
+        def clean(cell):
+            calls.append(cell)
+            return str(cell).strip() if cell else ""
+
+        first = table.clean_cell("A1 ", clean)
+        second = table.clean_cell("A1 ", clean)
+
+        assert first == "A1"
+        assert first is second
+        assert table.clean_cell("A1", clean) is first
+        assert calls == ["A1 ", "A1"]
+        # Non-string cells are cleaned every time, so 1 and 1.0 stay distinct
+        assert table.clean_cell(1, clean) == "1"
+        assert table.clean_cell(1.0, clean) == "1.0"
+
+
+class TestEntryStore:
+    """Test cases for EntryStore."""
+
+    def test_add_returns_sequential_ids(self):
+        """Test that entries are numbered in insertion order and read back unchanged."""
+        store = EntryStore()
+
+        assert store.add(_entry("กิน")) == 0
+        assert store.add(_entry("ทาน", "A1")) == 1
+        assert len(store) == 2
+        assert store.get(1) == _entry("ทาน", "A1")
+        assert list(store.level) == [0, 1]
+        assert store.tables['level'].values == ["", "A1"]
+        assert list(store) == [_entry("กิน"), _entry("ทาน", "A1")]
+
+    def test_extend_returns_id_offset(self):
+        """Test that merging a partial store shifts its IDs by the returned offset."""
+        store = EntryStore()
+        store.add(_entry("กิน"))
+        partial = EntryStore()
+        partial_id = partial.add(_entry("ทาน"))
+
+        offset = store.extend(partial)
+
+        assert offset == 1
+        assert store.get(offset + partial_id) == _entry("ทาน")
+
+    def test_extend_translates_codes(self):
+        """Test that codes of a merged store are replaced by the codes of the target store."""
+        store = EntryStore()
+        store.add(_entry("กิน", "A1", "v."))
+        partial = EntryStore()
+        partial.add(_entry("แมว", "B2", "n."))
+        partial.add(_entry("ทาน", "A1", "v."))
+
+        offset = store.extend(partial)
+
+        assert list(store.level) == [0, 1, 0]
+        assert list(store.type_word) == [0, 1, 0]
+        assert store.get(offset) == _entry("แมว", "B2", "n.")
+        assert store.distinct_counts() == {'type_word': 2, 'usage': 1, 'classifiers': 1, 'level': 2, 'dom': 1}
+
+    def test_pickle_round_trip(self):
+        """Test that a store survives pickling, as worker results and caches require."""
+        store = EntryStore()
+        store.add(_entry("กิน"))
+        store.add(Entry("ทาน", None, "", "", "", "eat", "", "", "", "", ""))
+
+        restored = pickle.loads(pickle.dumps(store))
+
+        assert restored == store
+        assert restored.get(1).pron is None
@@ -0,0 +1,64 @@
+"""Tests for the stage metrics and run report."""
+
+import json
+
+from src.metrics import RunMetrics, StageMetrics, total_size
+
+
+class TestRunMetrics:
+    """Test cases for RunMetrics."""
+
+    def test_stage_records_timings(self):
+        """Test that a stage block is timed and keeps the counters it sets."""
+        metrics = RunMetrics()
+
+        with metrics.stage("write") as stage:
+            stage.rows = 10
+            stage.bytes_written = 2048
+
+        recorded = metrics.get("write")
+        assert recorded is stage
+        assert recorded.wall_seconds >= 0
+        assert recorded.rows == 10
+        assert recorded.peak_rss_mb >= 0
+
+    def test_stage_recorded_on_error(self):
+        """Test that a failing stage is still part of the report."""
+        metrics = RunMetrics()
+
+        try:
+            with metrics.stage("pyglossary"):
+                raise RuntimeError("conversion failed")
+        except RuntimeError:
+            pass
+
+        assert [stage.name for stage in metrics.stages] == ["pyglossary"]
+
+    def test_rows_per_second(self):
+        """Test throughput, including a zero-length stage."""
+        assert StageMetrics("ingest", wall_seconds=2.0, rows=100).rows_per_second == 50.0
+        assert StageMetrics("ingest").rows_per_second == 0.0
+
+    def test_write_json(self, temp_dir):
+        """Test the JSON report layout."""
+        metrics = RunMetrics()
+        metrics.add_stage("ingest", 1.5, 1.0, rows=300)
+        metrics.add_stage("process", 0.5, 0.5, rows=300)
+        metrics.counters["formatter_cache"] = {"hits": 3, "misses": 1}
+        report_file = temp_dir / "reports" / "metrics.json"
+
+        metrics.write_json(report_file, success=False)
+
+        report = json.loads(report_file.read_text(encoding='utf-8'))
+        assert report["success"] is False
+        assert report["total_wall_seconds"] == 2.0
+        assert [stage["name"] for stage in report["stages"]] == ["ingest", "process"]
+        assert report["stages"][0]["rows_per_second"] == 200.0
+        assert report["counters"] == {"formatter_cache": {"hits": 3, "misses": 1}}
+
+    def test_total_size(self, temp_dir):
+        """Test that sizes are summed over existing files only."""
+        (temp_dir / "a.txt").write_bytes(b"x" * 3)
+        (temp_dir / "b.txt").write_bytes(b"x" * 4)
+
+        assert total_size([temp_dir / "a.txt", temp_dir / "b.txt", temp_dir / "missing", temp_dir]) == 7
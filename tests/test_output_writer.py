@@ -0,0 +1,53 @@
+"""Tests for the buffered output writer."""
+
+import os
+
+from src.output_writer import BufferedLineWriter
+
+
+class TestBufferedLineWriter:
+    """Test cases for BufferedLineWriter."""
+
+    def test_lines_written_on_close(self, temp_dir):
+        """Test that lines below the buffer size are held until the file is closed."""
+        path = temp_dir / "out.txt"
+        writer = BufferedLineWriter(path, buffer_size=1024)
+
+        writer.write("กิน\teat\n")
+        writer.write("cat\tแมว\n")
+        assert path.read_bytes() == b""
+
+        writer.close()
+        assert path.read_text(encoding='utf-8').splitlines() == ["กิน\teat", "cat\tแมว"]
+        assert writer.closed
+
+    def test_chunks_flushed_at_buffer_size(self, temp_dir):
+        """Test that a chunk is written as soon as the pending text reaches the buffer size."""
+        path = temp_dir / "out.txt"
+        with BufferedLineWriter(path, buffer_size=8) as writer:
+            writer.write("abc\n")
+            assert path.read_bytes() == b""
+            writer.write("defg\n")
+            assert path.stat().st_size > 0
+
+    def test_counts_bytes_and_lines(self, temp_dir):
+        """Test that the encoded bytes and the lines of every chunk are counted."""
+        path = temp_dir / "out.txt"
+        with BufferedLineWriter(path, buffer_size=4) as writer:
+            writer.writelines(["ไก่\tchicken\n", "a\tb\n", "c\td\n"])
+
+        assert writer.lines_written == 3
+        assert writer.bytes_written == path.stat().st_size
+        assert writer.bytes_written == len("ไก่\tchicken\na\tb\nc\td\n".replace("\n", os.linesep).encode('utf-8'))
+        assert writer.stats() == {'path': str(path), 'bytes': writer.bytes_written, 'lines': 3}
+
+    def test_close_is_idempotent(self, temp_dir):
+        """Test that closing twice writes the pending text once."""
+        path = temp_dir / "out.txt"
+        writer = BufferedLineWriter(path)
+        writer.write("a\tb\n")
+
+        writer.close()
+        writer.close()
+
+        assert writer.lines_written == 1
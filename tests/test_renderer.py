@@ -0,0 +1,90 @@
+"""Tests for the compiled definition renderers."""
+
+import pytest
+
+from src.entries import Entry
+from src.renderer import FLAVORS, DefinitionRenderer, get_renderer, level_text
+
+FULL = Entry(thai="แมว", pron="mɛɛw", type_word="Noun", usage="common", classifiers="ตัว",
+             english="cat, kitty", synonyms="วิฬาร์", scient="Felis catus", level="A1", dom="Animal",
+             note="pet")
+MINIMAL = Entry(thai="กิน", pron=None, type_word="", usage="", classifiers="", english="eat",
+                synonyms="", scient="", level="", dom="", note="")
+
+
+class TestDefinitionRenderer:
+    """Test cases for DefinitionRenderer."""
+
+    def test_html_flavor(self):
+        """Test the default markup of a full and a minimal entry."""
+        renderer = get_renderer('html')
+
+        assert renderer.render(FULL) == (
+            '<span class="thai"><strong>แมว</strong></span> '
+            '<span class="pron">[mɛɛw]</span> '
+            '<span class="type">noun common</span> '
+            '<span class="clf">classifier: ตัว</span> '
+            '<br><span class="def">cat, kitty</span><br>'
+            '<span class="syn">syn: วิฬาร์</span><br>'
+            '<span class="science">scient: Felis catus</span><br>'
+            '<span class="level">Level: A1 - Category: animal</span><br>'
+            '<span class="note">note: pet</span><br>'
+        )
+        assert renderer.render(MINIMAL) == \
+            '<span class="thai"><strong>กิน</strong></span> <br><span class="def">eat</span><br>'
+
+    def test_empty_pronunciation_is_kept(self):
+        """Test that a pronunciation that formats to '' still gets its brackets, unlike a missing one."""
+        assert '[]' in get_renderer('html').render(MINIMAL._replace(pron=""))
+
+    def test_plain_flavor_has_no_markup(self):
+        """Test that plain text drops tags, also from values, and escapes line breaks."""
+        renderer = get_renderer('plain')
+
+        text = renderer.render(FULL._replace(pron="a<sp> </sp>b"))
+
+        assert "<" not in text and "\n" not in text
+        assert text.startswith("แมว [a b] (noun common) classifier: ตัว \\ncat, kitty\\n")
+        assert renderer.en_th_article("cat", [("Noun", [text])]) == f"cat\\nNoun\\n{text}"
+
+    def test_plain_flavor_decodes_entities(self):
+        """Test that plain text decodes the backslash of a non-Paiboon falling tone as a Tabfile escape."""
+        from src.config import RegexPatterns
+        from src.stardict_builder import unescape_definition
+        from src.text_formatter import TextFormatter
+        formatter = TextFormatter(RegexPatterns())
+        pron = formatter.format_final_pronunciation(formatter.format_tones("\\nām", paiboon=False))
+
+        text = get_renderer('plain').render(MINIMAL._replace(pron=pron, english="water &amp; ice"))
+
+        assert pron == "&#x5c;nām"
+        assert text == "กิน [\\\\nām] \\nwater & ice\\n"
+        assert unescape_definition(text) == "กิน [\\nām] \nwater & ice\n"
+
+    def test_en_th_and_merge_articles(self):
+        """Test the en-th and merged article markup of the default flavor."""
+        renderer = get_renderer('html')
+
+        article = renderer.en_th_article("eat", [("", ["a", "b"]), ("verb", ["c"])])
+
+        assert article == ('<span class="english"><strong>eat</strong></span> <br>'
+                           'a b<br><span class="word_type">verb</span><br>c')
+        assert renderer.merge_article(["a", "b"]) == "a<br><br>b"
+
+    def test_every_flavor_renders_every_part(self):
+        """Test that each flavor writes the text of every part of a full entry."""
+        for name in FLAVORS:
+            text = get_renderer(name).render(FULL)
+            for value in ("แมว", "mɛɛw", "noun common", "ตัว", "cat, kitty", "วิฬาร์", "Felis catus", "pet"):
+                assert value in text, (name, value)
+
+    def test_unknown_flavor(self):
+        """Test that an unknown flavor is rejected."""
+        with pytest.raises(ValueError, match="Unknown definition flavor"):
+            DefinitionRenderer("rtf")
+
+    def test_level_text(self):
+        """Test the level and category line."""
+        assert level_text("A1", "Animal") == "Level: A1 - Category: animal"
+        assert level_text("", "Animal") == "Category: animal"
+        assert level_text("", "") == ""
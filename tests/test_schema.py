@@ -0,0 +1,54 @@
+"""Tests for the header-derived column schema."""
+
+import pickle
+
+from src.schema import DEFAULT_POSITIONS, FIELD_HEADERS, RowSchema, normalize_header
+
+
+class TestRowSchema:
+    """Test cases for RowSchema."""
+
+    def test_normalize_header(self):
+        """Test header cell normalisation."""
+        assert normalize_header("SCIENT/abbrev.") == "SCIENT"
+        assert normalize_header(" eng\n(english)") == "ENG"
+        assert normalize_header(None) == ""
+
+    def test_from_header_resolves_positions(self):
+        """Test that shifted columns are found by their header names."""
+        header = ["THAIROM", "EASYTHAI", "THAIPHON", "THA", "THA PRON", "ENG", "FRA", "TYPE",
+                  "USAGE", "SCIENT/abbrev.", "DOM", "CLASSIF", "SYN", "LEVEL", "NOTE", "SPA"]
+
+        schema = RowSchema.from_header(header)
+
+        assert schema.positions['english'] == 5
+        assert schema.positions['note'] == 14
+        assert schema.max_column == 15
+        assert 6 not in schema.columns  # FRA is not projected
+        assert schema.field_for_column(9) == 'scient'
+
+    def test_from_header_falls_back_to_defaults(self):
+        """Test that an unrecognised header keeps the default layout."""
+        schema = RowSchema.from_header(["", "", "sà-wàt-dii", "สวัสดี"])
+
+        assert schema == RowSchema()
+        assert schema.positions == DEFAULT_POSITIONS
+
+    def test_extract_pads_short_rows(self):
+        """Test that the extractor returns every field, padding short rows."""
+        schema = RowSchema()
+
+        fields = schema.extract(["rom", "easy", "phon", "ไทย", "thai"])
+
+        assert len(fields) == len(FIELD_HEADERS)
+        assert fields[:5] == ("rom", "easy", "phon", "ไทย", "thai")
+        assert fields[5:] == (None,) * (len(FIELD_HEADERS) - 5)
+
+    def test_pickle_round_trip(self):
+        """Test that a schema can be sent to worker processes."""
+        schema = RowSchema({**DEFAULT_POSITIONS, 'english': 5})
+
+        restored = pickle.loads(pickle.dumps(schema))
+
+        assert restored == schema
+        assert restored.extract(tuple(range(20)))[4] == 5
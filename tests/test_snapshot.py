@@ -0,0 +1,62 @@
+"""Tests for the columnar workbook snapshot."""
+
+import pytest
+
+from src.dictionary_processor import DictionaryProcessor
+from src.snapshot import SnapshotReader, file_digest, snapshot_path, write_snapshot
+
+
+class TestSnapshot:
+    """Test cases for snapshot writing and reading."""
+
+    def test_round_trip(self, temp_dir):
+        """Test that rows read back as text with empty cells as ''."""
+        path = temp_dir / "rows.vsnap"
+        rows = [("a", None, 3), (), ("ม้า", "horse", 0, "ignored"), (None, 2.5, True)]
+
+        count = write_snapshot(rows, path, columns=3)
+
+        assert count == 4
+        with SnapshotReader(path, temp_dir / "rows.xlsx") as reader:
+            assert reader.excel_file == temp_dir / "rows.xlsx"
+            assert list(reader.iter_rows()) == [
+                ("a", "", "3"),
+                ("", "", ""),
+                ("ม้า", "horse", ""),
+                ("", "2.5", "True"),
+            ]
+
+    def test_rejects_other_files(self, temp_dir):
+        """Test that a file without the snapshot magic is rejected."""
+        path = temp_dir / "bogus.vsnap"
+        path.write_bytes(b"not a snapshot at all")
+
+        with pytest.raises(ValueError, match="Not a Volubilis snapshot"):
+            SnapshotReader(path, temp_dir / "bogus.xlsx").iter_rows()
+
+    def test_snapshot_path_keyed_by_content(self, temp_dir):
+        """Test that the snapshot name follows the file content, not its name."""
+        first = temp_dir / "a.xlsx"
+        second = temp_dir / "b.xlsx"
+        first.write_bytes(b"same")
+        second.write_bytes(b"same")
+
+        assert snapshot_path(first, temp_dir) == snapshot_path(second, temp_dir)
+        assert snapshot_path(first, temp_dir).name.startswith(file_digest(first))
+
+        second.write_bytes(b"changed")
+        assert snapshot_path(first, temp_dir) != snapshot_path(second, temp_dir)
+
+    def test_processor_output_matches_workbook(self, mock_config, sample_workbook):
+        """Test that building from a snapshot writes the same files as the workbook."""
+        mock_config.dictionary.excel_file = sample_workbook
+        DictionaryProcessor(mock_config).process_excel_file()
+        output = mock_config.dictionary.output_folder
+        expected = {f.name: f.read_bytes() for f in output.glob("*.txt")}
+
+        mock_config.dictionary.use_snapshot = True
+        for _ in range(2):  # build the snapshot, then reuse it
+            DictionaryProcessor(mock_config).process_excel_file()
+            assert {f.name: f.read_bytes() for f in output.glob("*.txt")} == expected
+
+        assert len(list((output / "snapshots").glob("*.vsnap"))) == 1
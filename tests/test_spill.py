@@ -0,0 +1,152 @@
+"""Tests for the disk-spilling aggregation maps."""
+
+import tracemalloc
+
+from src.entries import Entry, EntryStore
+from src.spill import MAX_MERGE_RUNS, SpillBudget, SpillingAggregator, SpillingEntryStore
+
+
+class TestSpillingAggregator:
+    """Test cases for SpillingAggregator."""
+
+    def test_items_in_first_seen_order(self, temp_dir):
+        """Test that headwords keep insertion order and values come out sorted."""
+        budget = SpillBudget(10 ** 9, temp_dir)
+        agg = SpillingAggregator(budget, lambda _, value: value)
+
+        agg["b"].append("2")
+        agg["a"].extend(["z", "y"])
+        agg["b"].append("1")
+
+        assert list(agg.items()) == [("b", ["1", "2"]), ("a", ["y", "z"])]
+        assert len(agg) == 2
+        budget.close()
+
+    def test_spilled_runs_are_merged(self, temp_dir):
+        """Test that values spilled across several runs merge back per headword."""
+        budget = SpillBudget(1, temp_dir)
+        agg = SpillingAggregator(budget, lambda _, value: value[0])
+
+        for i in range(5):
+            agg["x"].append((i % 2, f"x{i}"))
+            agg["w"].append((0, f"w{i}"))
+
+        assert budget.spill_count == 10
+        assert list(agg.items()) == [
+            ("x", [(0, "x0"), (0, "x2"), (0, "x4"), (1, "x1"), (1, "x3")]),
+            ("w", [(0, f"w{i}") for i in range(5)]),
+        ]
+        budget.close()
+        assert not budget.tmp_dir.exists()
+
+    def test_items_in_key_order(self, temp_dir):
+        """Test that a key order sorts the headwords across spilled runs."""
+        budget = SpillBudget(1, temp_dir)
+        agg = SpillingAggregator(budget, lambda _, value: value, key_order=str.lower)
+
+        agg["b"].append("2")
+        agg["C"].append("3")
+        agg["a"].append("1")
+        agg["b"].append("0")
+
+        assert list(agg.items()) == [("a", ["1"]), ("b", ["0", "2"]), ("C", ["3"])]
+        budget.close()
+
+    def test_nested_groups_by_sub_key(self, temp_dir):
+        """Test that nested aggregators yield sub keys in sorted order."""
+        budget = SpillBudget(1, temp_dir)
+        agg = SpillingAggregator(budget, lambda sub_key, value: (sub_key, value), nested=True)
+
+        agg["cat"]["verb"].append("b")
+        agg["cat"]["noun"].append("c")
+        agg["cat"]["noun"].append("a")
+
+        [(key, groups)] = agg.items()
+        assert key == "cat"
+        assert list(groups.items()) == [("noun", ["a", "c"]), ("verb", ["b"])]
+        budget.close()
+
+    def test_budget_charges_sort_keys(self, temp_dir):
+        """Test that the budget accounts for the sort key as well as the value."""
+        budget = SpillBudget(10 ** 9, temp_dir)
+        small = SpillingAggregator(budget, lambda _, value: value)
+        small["cat"].append(1)
+        small_cost = budget.used_bytes
+        large = SpillingAggregator(budget, lambda _, value: "x" * 10000)
+        large["cat"].append(1)
+        assert budget.used_bytes - small_cost > 10000
+        budget.close()
+
+    def test_runs_are_compacted(self, temp_dir):
+        """Test that an aggregator never keeps more than MAX_MERGE_RUNS runs."""
+        budget = SpillBudget(1, temp_dir)
+        agg = SpillingAggregator(budget, lambda _, value: -value)
+
+        for i in range(MAX_MERGE_RUNS * 3):
+            agg[f"k{i % 3}"].append(i)
+
+        assert len(agg._runs) < MAX_MERGE_RUNS
+        assert len(list(budget.tmp_dir.iterdir())) == len(agg._runs)
+        assert list(agg.items()) == [
+            (f"k{k}", sorted(range(k, MAX_MERGE_RUNS * 3, 3), reverse=True)) for k in range(3)
+        ]
+        budget.close()
+
+    def test_merge_memory_stays_within_budget(self, temp_dir):
+        """Test that adding and merging many spilled records keeps traced memory near the budget."""
+        limit = 256 * 1024
+        budget = SpillBudget(limit, temp_dir)
+        agg = SpillingAggregator(budget, lambda _, value: value)
+
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            for i in range(30000):
+                agg[f"headword {i % 100}"].append((f"value {i}", i))
+            count = sum(len(values) for _, values in agg.items())
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+            budget.close()
+
+        assert count == 30000
+        assert budget.spill_count > MAX_MERGE_RUNS
+        assert peak < 2 * limit
+
+
+class TestSpillingEntryStore:
+    """Test cases for SpillingEntryStore."""
+
+    @staticmethod
+    def _entry(i):
+        return Entry(thai=f"กิน{i}", pron="kin" if i % 2 else None, type_word="v.", usage="", classifiers="",
+                     english=f"eat {i}", synonyms="", scient="", level=str(i % 3), dom="", note=f"note {i}")
+
+    def test_entries_read_back_from_disk(self, temp_dir):
+        """Test that spilled and buffered entries read back unchanged, by entry and by column."""
+        budget = SpillBudget(1000, temp_dir)
+        store = SpillingEntryStore(budget)
+
+        entries = [self._entry(i) for i in range(50)]
+        ids = [store.add(entry) for entry in entries]
+
+        assert budget.spill_count > 0
+        assert ids == list(range(50))
+        assert len(store) == 50
+        assert [store.get(entry_id) for entry_id in ids] == entries
+        assert [store.thai[entry_id] for entry_id in ids] == [entry.thai for entry in entries]
+        assert store.tables['level'].values[store.level[7]] == "1"
+        budget.close()
+
+    def test_extend_shifts_ids(self, temp_dir):
+        """Test that extending with a plain store appends its entries after the existing ones."""
+        budget = SpillBudget(1, temp_dir)
+        store = SpillingEntryStore(budget)
+        store.add(self._entry(0))
+        partial = EntryStore()
+        for i in range(1, 4):
+            partial.add(self._entry(i))
+
+        assert store.extend(partial) == 1
+        assert list(store) == [self._entry(i) for i in range(4)]
+        budget.close()
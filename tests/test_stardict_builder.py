@@ -1,10 +1,15 @@
 """Tests for Stardict builder functionality."""
 
+import struct
+
 import pytest
 from unittest.mock import patch, MagicMock
 from pathlib import Path
 
-from src.stardict_builder import StardictBuilder
+from src.collation import presorted_marker
+from src.exceptions import StardictError, StardictOrderError
+from src.stardict_builder import (StardictBuilder, StardictReader, StardictWriter, TabfileReader, combine_articles,
+                                  split_headword, stardict_bookname, unescape_definition, write_stardict)
 
 
 class TestStardictBuilder:
@@ -184,6 +189,22 @@ description=test dictionary
         assert "version=1.0.5" in updated_content
         assert "description=Volubilis Thai-English Dictionary v1.0.5" in updated_content
 
+    def test_create_single_zip_stores_dictzip(self, temp_dir):
+        """Test that a .dict.dz is packaged uncompressed in place of the .dict."""
+        txt_dir = temp_dir / "txt"
+        txt_dir.mkdir()
+        (txt_dir / "volubilis_test.txt").write_text("a\tone\nb\ttwo\n", encoding='utf-8')
+        builder = StardictBuilder(txt_dir, temp_dir / "stardict")
+        builder.convert_to_stardict()
+
+        zip_file = builder._create_single_zip(builder.unzipped_dir / "volubilis_test.ifo")
+
+        import zipfile
+        with zipfile.ZipFile(zip_file, 'r') as zf:
+            assert "volubilis_test.dict" not in zf.namelist()
+            assert zf.getinfo("volubilis_test.dict.dz").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("volubilis_test.idx").compress_type == zipfile.ZIP_DEFLATED
+
     def test_create_single_zip(self, temp_dir):
         """Test creation of individual zip packages."""
         txt_dir = temp_dir / "txt"
@@ -216,4 +237,202 @@ description=test dictionary
             files = zf.namelist()
             assert "test.ifo" in files
             assert "test.idx" in files
-            assert "test.dict" in files
\ No newline at end of file
+            assert "test.dict" in files
+
+
+def _read_idx(path):
+    data = path.read_bytes()
+    words = []
+    pos = 0
+    while pos < len(data):
+        end = data.index(b'\0', pos)
+        words.append(data[pos:end].decode('utf-8'))
+        pos = end + 9
+    return words
+
+
+class TestNativeStardict:
+    """Test cases for the native Stardict writer and reader."""
+
+    def test_split_headword_and_unescape(self):
+        """Test that headwords split at unescaped bars and definitions are unescaped."""
+        assert split_headword("กิน|ทาน") == ["กิน", "ทาน"]
+        assert split_headword("a\\|b|c") == ["a|b", "c"]
+        assert split_headword("a\\\\|b") == ["a\\", "b"]
+        assert unescape_definition("line\\nnext\\ttab\\\\n") == "line\nnext\ttab\\n"
+        assert unescape_definition("<br>") == "<br>"
+
+    def test_bookname(self):
+        """Test that booknames follow pyglossary: file name plus languages unless already shown."""
+        assert stardict_bookname(Path("volubilis_th-pr-en.txt"), {}) == "volubilis_th-pr-en.txt (th-en)"
+        assert stardict_bookname(Path("volubilis_en-th.txt"), {}) == "volubilis_en-th.txt"
+        assert stardict_bookname(Path("volubilis_th-en.txt"), {'name': "Volubilis"}) == "Volubilis (th-en)"
+
+    def test_tabfile_reader(self, temp_dir):
+        """Test that info lines are read and articles are cleaned like pyglossary does."""
+        txt_file = temp_dir / "test.txt"
+        txt_file.write_text("#name\tTest\n\nnoTab\n"
+                            "b|c|b| \tdefinition<br>\nempty\t \na\tline\\none\n", encoding='utf-8')
+
+        reader = TabfileReader(txt_file)
+
+        assert not reader.presorted
+        assert reader.info == {'name': 'Test'}
+        assert list(reader) == [(["b", "c"], "definition"), (["a"], "line\none")]
+        # Iterating again reads the file again
+        assert len(list(reader)) == 2
+        presorted_marker(txt_file).touch()
+        assert reader.presorted
+
+    def test_write_and_verify(self, temp_dir):
+        """Test that a written dictionary reads back with sorted .idx and .syn files."""
+        writer = StardictWriter(temp_dir / "test", "Test")
+
+        written = writer.write([(["maew", "cat"], "<b>แมว</b>"), (["Dog"], "<b>หมา</b>"), (["ant"], "<b>มด</b>")])
+
+        assert (written.word_count, written.synonym_count) == (3, 1)
+        assert _read_idx(temp_dir / "test.idx") == ["ant", "Dog", "maew"]
+        assert (temp_dir / "test.syn").read_bytes() == b"cat\0" + struct.pack('>I', 2)
+        ifo = (temp_dir / "test.ifo").read_text(encoding='utf-8').splitlines()
+        assert ifo[0] == "StarDict's dict ifo file"
+        assert ifo[1:] == ["version=1.0.5", "bookname=Test", "wordcount=3",
+                           f"idxfilesize={(temp_dir / 'test.idx').stat().st_size}", "sametypesequence=h",
+                           "synwordcount=1", "description=Volubilis Thai-English Dictionary v1.0.5 (data 01.11.2025)"]
+        assert StardictReader(temp_dir / "test.ifo").verify(written) == written
+
+    def test_presorted_order_violation(self, temp_dir):
+        """Test that pre-sorted articles out of order raise StardictOrderError."""
+        writer = StardictWriter(temp_dir / "test", "Test")
+
+        with pytest.raises(StardictOrderError):
+            writer.write([(["b"], "x"), (["a"], "y")], presorted=True)
+
+    def test_write_stardict_sorts_unsorted_presorted_file(self, temp_dir):
+        """Test that a file wrongly marked as pre-sorted is converted sorted."""
+        txt_file = temp_dir / "test.txt"
+        txt_file.write_text("b\tx\na\ty\n", encoding='utf-8')
+        presorted_marker(txt_file).touch()
+
+        written = write_stardict(txt_file, temp_dir / "out.ifo")
+
+        assert written.word_count == 2
+        assert _read_idx(temp_dir / "out.idx") == ["a", "b"]
+        assert "sametypesequence=m" in (temp_dir / "out.ifo").read_text(encoding='utf-8')
+
+    def test_64_bit_offsets(self, temp_dir):
+        """Test that the .idx switches to 64-bit offsets once the .dict outgrows 32-bit ones."""
+        writer = StardictWriter(temp_dir / "test", "Test")
+        writer.offset_limit = 3
+
+        written = writer.write([(["a"], "one"), (["b"], "two"), (["c"], "six")])
+
+        assert "idxoffsetbits=64" in (temp_dir / "test.ifo").read_text(encoding='utf-8')
+        assert (temp_dir / "test.idx").read_bytes() == b"".join(
+            word + b"\0" + struct.pack('>QI', offset, 3) for word, offset in ((b"a", 0), (b"b", 3), (b"c", 6)))
+        assert StardictReader(temp_dir / "test.ifo").verify(written) == written
+
+    def test_verify_detects_changes(self, temp_dir):
+        """Test that verification fails when a file no longer matches what was written."""
+        writer = StardictWriter(temp_dir / "test", "Test")
+        written = writer.write([(["a", "alpha"], "one"), (["b"], "two")])
+        dict_file = temp_dir / "test.dict"
+        dict_file.write_bytes(dict_file.read_bytes().replace(b"two", b"TWO"))
+
+        with pytest.raises(StardictError, match="read back"):
+            StardictReader(temp_dir / "test.ifo").verify(written)
+
+        dict_file.write_bytes(b"one")
+        with pytest.raises(StardictError, match="outside"):
+            StardictReader(temp_dir / "test.ifo").verify()
+
+    def test_native_conversion_falls_back_to_pyglossary(self, temp_dir):
+        """Test that a failed native conversion is retried with pyglossary when it is installed."""
+        txt_dir = temp_dir / "txt"
+        txt_dir.mkdir()
+        txt_file = txt_dir / "test.txt"
+        txt_file.write_bytes(b"\xff\tbroken\n")
+        builder = StardictBuilder(txt_dir, temp_dir / "stardict")
+
+        with patch('shutil.which', return_value="/usr/bin/pyglossary"), \
+                patch.object(builder, '_convert_single_file') as fallback:
+            builder._convert_single_file_native(txt_file)
+        fallback.assert_called_once_with(txt_file)
+
+        with patch('shutil.which', return_value=None), pytest.raises(UnicodeDecodeError):
+            builder._convert_single_file_native(txt_file)
+
+    def test_convert_to_stardict_native(self, temp_dir):
+        """Test that the default backend converts every txt file without pyglossary."""
+        txt_dir = temp_dir / "txt"
+        txt_dir.mkdir()
+        (txt_dir / "volubilis_test.txt").write_text("กิน|ทาน\teat\n", encoding='utf-8')
+        presorted_marker(txt_dir / "volubilis_test.txt").touch()
+        builder = StardictBuilder(txt_dir, temp_dir / "stardict")
+
+        with patch('subprocess.run') as mock_subprocess:
+            builder.convert_to_stardict()
+
+        mock_subprocess.assert_not_called()
+        assert sorted(path.name for path in builder.unzipped_dir.iterdir()) == [
+            "volubilis_test.dict.dz", "volubilis_test.idx", "volubilis_test.ifo", "volubilis_test.syn"]
+
+    def test_convert_to_stardict_without_dictzip(self, temp_dir):
+        """Test that dictzip can be turned off to keep the plain .dict."""
+        txt_dir = temp_dir / "txt"
+        txt_dir.mkdir()
+        (txt_dir / "volubilis_test.txt").write_text("กิน\teat\n", encoding='utf-8')
+        builder = StardictBuilder(txt_dir, temp_dir / "stardict", dictzip=False)
+
+        builder.convert_to_stardict()
+
+        assert (builder.unzipped_dir / "volubilis_test.dict").exists()
+        assert not (builder.unzipped_dir / "volubilis_test.dict.dz").exists()
+
+
+class TestCombinedStardict:
+    """Test cases for the combined Thai-English package."""
+
+    def test_combine_articles(self):
+        """Test that articles with the same definition share one article under the first headword."""
+        th_en = [(["กิน", "ทาน"], "eat"), (["แมว"], "cat")]
+        th_pron_en = [([".kin - กิน", "ทาน (eat)"], "eat"), ([".maew - แมว (cat)"], "cat (pron)")]
+        merge = [([",kin - กิน"], "eat"), ([",kin - กิน"], "eat")]
+
+        assert combine_articles([th_en, th_pron_en, merge]) == [
+            (["กิน", "ทาน", ".kin - กิน", "ทาน (eat)", ",kin - กิน"], "eat"),
+            (["แมว"], "cat"),
+            ([".maew - แมว (cat)"], "cat (pron)"),
+        ]
+
+    def test_convert_combined_package(self, temp_dir):
+        """Test that pronunciation headwords of the combined package are synonyms of the th-en entries."""
+        txt_dir = temp_dir / "txt"
+        txt_dir.mkdir()
+        (txt_dir / "volubilis_th-en.txt").write_text("กิน|ทาน\teat\nแมว\tcat\n", encoding='utf-8')
+        (txt_dir / "volubilis_th-pr-en.txt").write_text(
+            ".kin - กิน|ทาน (eat)\teat\n.maew - แมว (cat)\tcat\n", encoding='utf-8')
+        builder = StardictBuilder(txt_dir, temp_dir / "stardict", combined=True)
+
+        builder.convert_to_stardict()
+
+        ifo_file = builder.unzipped_dir / "volubilis_th-en-combined.ifo"
+        assert "bookname=volubilis_th-en-combined.txt" in ifo_file.read_text(encoding='utf-8')
+        assert (builder.unzipped_dir / "volubilis_th-en-combined.dict.dz").exists()
+        written = StardictReader(ifo_file).verify()
+        assert (written.word_count, written.synonym_count) == (2, 4)
+        # Entries: 0 กิน, 1 แมว; the pronunciation headword splits at "|" like every headword
+        assert (builder.unzipped_dir / "volubilis_th-en-combined.syn").read_bytes() == b"".join(
+            word.encode('utf-8') + b"\0" + struct.pack('>I', index)
+            for word, index in ((".kin - กิน", 0), (".maew - แมว (cat)", 1), ("ทาน", 0), ("ทาน (eat)", 0)))
+        assert builder._create_single_zip(ifo_file).name == "volubilis_th-en-combined.zip"
+
+    def test_combined_package_is_optional(self, temp_dir):
+        """Test that no combined package is built by default."""
+        txt_dir = temp_dir / "txt"
+        txt_dir.mkdir()
+        (txt_dir / "volubilis_th-en.txt").write_text("แมว\tcat\n", encoding='utf-8')
+        builder = StardictBuilder(txt_dir, temp_dir / "stardict")
+
+        builder.convert_to_stardict()
+
+        assert not list(builder.unzipped_dir.glob("volubilis_th-en-combined.*"))
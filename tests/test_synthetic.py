@@ -0,0 +1,59 @@
+"""Tests for the synthetic benchmark data generator."""
+
+from benchmarks.bench_pipeline import scaling_exponent
+from benchmarks.synthetic import HEADER, generate_rows, write_workbook
+from src.schema import RowSchema
+from src.xlsx_reader import NativeXlsxReader
+
+
+def _trim(row):
+    row = list(row)
+    while row and row[-1] is None:
+        row.pop()
+    return tuple(row)
+
+
+class TestSyntheticData:
+    """Test cases for the synthetic row generator."""
+
+    def test_rows_are_deterministic(self):
+        """Test that the same seed yields the same rows."""
+        assert list(generate_rows(50, seed=3)) == list(generate_rows(50, seed=3))
+        assert list(generate_rows(50, seed=3)) != list(generate_rows(50, seed=4))
+
+    def test_header_matches_schema(self):
+        """Test that the header resolves to the default column positions."""
+        rows = list(generate_rows(10))
+
+        assert rows[1] == HEADER
+        assert RowSchema.from_header(rows[1]) == RowSchema()
+        assert len(rows) == 12
+
+    def test_rows_are_processed(self, mock_config):
+        """Test that every synthetic row is accepted by _process_row."""
+        from collections import defaultdict
+        from src.dictionary_processor import DictionaryProcessor
+        processor = DictionaryProcessor(mock_config)
+        maps = (defaultdict(list), defaultdict(list), defaultdict(list),
+                defaultdict(lambda: defaultdict(list)))
+
+        processed = [processor._process_row(row, *maps) for row in generate_rows(200, header=False)]
+
+        assert all(processed)
+        # Zipf-like headword picks give repeated headwords
+        assert len(maps[0]) < 200
+
+    def test_workbook_round_trip(self, temp_dir):
+        """Test that the written xlsx reads back as the generated rows."""
+        path = temp_dir / "synthetic.xlsx"
+        expected = [_trim(row) for row in generate_rows(100)]
+
+        assert write_workbook(path, generate_rows(100)) == 102
+        with NativeXlsxReader(path) as reader:
+            assert [_trim(row) for row in reader.iter_rows()] == expected
+
+    def test_scaling_exponent(self):
+        """Test the log-log slope used for the scaling report."""
+        assert round(scaling_exponent([(1000, 1.0), (10000, 10.0)]), 6) == 1.0
+        assert round(scaling_exponent([(1000, 1.0), (10000, 100.0)]), 6) == 2.0
+        assert scaling_exponent([(1000, 1.0)]) is None
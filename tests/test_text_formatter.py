@@ -48,4 +48,176 @@ class TestTextFormatter:
         """Test multiple regex replacements."""
         replacements = {"a": "b", "c": "d"}
         result = formatter.replace_multi("abcd", replacements)
-        assert result == "bbdd"
\ No newline at end of file
+        assert result == "bbdd"
+
+    def test_pipelines_match_replace_multi(self, formatter):
+        """Test that the compiled transforms give the replace_multi chain output."""
+        p = formatter.patterns
+
+        def chain(text, *groups):
+            for group in groups:
+                text = formatter.replace_multi(text, group)
+            return text
+
+        for text in ["¯[kin] _øn", "\\bān ¯tūa", "  maa /sūa  ", "_ǿ ¯khon"]:
+            tones = chain(text, p.default, p.remove_starting_brackets, p.pron, p.pron2)
+            assert formatter.format_tones(text, paiboon=False) == tones
+            assert formatter.format_tones(text, paiboon=True) == chain(tones, p.type_friendly_1, p.to_paiboon)
+            assert formatter.format_pronunciation_search(tones, paiboon=False) == \
+                chain(tones, p.remove_brackets, p.type_friendly_1, p.type_friendly_2)
+            assert formatter.format_pronunciation_search(tones, paiboon=True) == \
+                chain(tones, p.remove_brackets, p.type_friendly_2)
+            assert formatter.format_final_pronunciation(tones) == chain(tones, p.final_pron)
+
+        classifier = "ตัว [¯tūa]"
+        expected = chain(classifier, p.classifier, p.default, p.remove_starting_brackets, p.pron, p.pron2)
+        assert formatter.format_classifier(classifier) == expected
+
+    def test_regex_pipeline_is_immutable(self):
+        """Test that pipelines compile in order, skip empty patterns and cannot be changed."""
+        import dataclasses
+        from src.text_formatter import RegexPipeline
+
+        pipeline = RegexPipeline.compile({"a": "b", "": "x"}, {"b": "c"})
+
+        assert len(pipeline) == 2
+        assert pipeline("aab") == "ccc"
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            pipeline.steps = ()
+
+    def test_cache_disabled_by_default(self, formatter):
+        """Test that no memoization happens unless a cache size is given."""
+        formatter.format_tones("¯tūa", paiboon=True)
+        assert formatter.cache is None
+        assert formatter.cache_stats() is None
+
+    def test_cache_returns_same_results(self, formatter):
+        """Test that memoized transforms give the uncached results and count hits and misses."""
+        cached = TextFormatter(RegexPatterns(), cache_size=100)
+        texts = ["¯[kin] _øn", "\\bān ¯tūa", "¯[kin] _øn"]
+
+        for paiboon in (True, False):
+            for text in texts:
+                assert cached.format_tones(text, paiboon) == formatter.format_tones(text, paiboon)
+                assert cached.transliterate(text) == formatter.transliterate(text)
+            assert cached.split_and_format_classifiers("ตัว [¯tūa]; อัน [ān]", paiboon=paiboon) == \
+                formatter.split_and_format_classifiers("ตัว [¯tūa]; อัน [ān]", paiboon=paiboon)
+
+        stats = cached.cache_stats()
+        # format_tones: 2 distinct texts x 2 settings, transliterate: 2 texts, classifiers: 2 + 2 parts
+        assert stats['misses'] == 4 + 2 + 2 + 4
+        assert stats['hits'] == 2 + 4
+        assert stats['size'] == stats['misses']
+        assert stats['evictions'] == 0
+
+    def test_cache_keyword_and_positional_share_entry(self):
+        """Test that paiboon passed by keyword or position hits the same entry."""
+        cached = TextFormatter(RegexPatterns(), cache_size=10)
+        cached.format_tones("¯tūa", True)
+        cached.format_tones("¯tūa", paiboon=True)
+        assert cached.cache_stats()['hits'] == 1
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test that the cache stays within its size and evicts the oldest entry."""
+        cached = TextFormatter(RegexPatterns(), cache_size=2)
+        cached.format_tones("¯a")
+        cached.format_tones("_b")
+        cached.format_tones("¯a")  # refresh "¯a"
+        cached.format_tones("/c")  # evicts "_b"
+        cached.format_tones("¯a")
+
+        stats = cached.cache_stats()
+        assert stats['size'] == 2
+        assert stats['evictions'] == 1
+        assert stats['hits'] == 2
+        cached.format_tones("_b")
+        assert cached.cache_stats()['misses'] == 4
+
+    def test_cache_cleared_when_patterns_replaced(self):
+        """Test that assigning other patterns recompiles and drops memoized results."""
+        cached = TextFormatter(RegexPatterns(), cache_size=10)
+        assert cached.format_tones("¯tūa") == "¯tūa"
+
+        patterns = RegexPatterns()
+        patterns.pron2 = {**patterns.pron2, "ū": "uu"}
+        cached.patterns = patterns
+
+        assert cached.engine is None
+        assert cached.cache_stats()['size'] == 0
+        assert cached.format_tones("¯tūa") == "¯tuua"
+
+    def test_literal_sources(self):
+        """Test that plain literals and literal character sets are recognized, regexes are not."""
+        from src.text_formatter import literal_sources
+
+        assert literal_sources("ē") == ("ē",)
+        assert literal_sources(r"\t") == ("\t",)
+        assert literal_sources(r"\\") == ("\\",)
+        assert literal_sources(r"[…\.\(\)]") == ("…", ".", "(", ")")
+        assert literal_sources(r"[̀́]") == ("̀", "́")
+        for pattern in (r"^\s+", r"([tkp])h", "[a-z]", "[^a]", r"\1", "a+", r"[ ]-"):
+            assert literal_sources(pattern) is None
+
+    def test_literal_rules_are_merged(self):
+        """Test that literal rules sharing a replacement become one step only when that is exact."""
+        from src.text_formatter import RegexPipeline
+
+        merged = RegexPipeline.compile({"[ab]": "", "c": "", "…": ""})
+        assert len(merged) == 1
+        assert merged("a…bxc") == "x"
+
+        # "b" is produced by the first rule, so only the later two are merged
+        chained = RegexPipeline.compile({"a": "b", "[bc]": "b", "d": "b"})
+        assert len(chained) == 2
+        assert chained("abcd") == "bbbb"
+
+    def test_pipelines_match_replace_multi_random(self, formatter):
+        """Test every pattern group and transform pipeline against replace_multi on random text."""
+        import dataclasses
+        import random
+        from src.text_formatter import RegexPipeline
+
+        p = formatter.patterns
+        rnd = random.Random(0)
+        alphabet = "abkhtpøǿɔēāīūōñ…. -_\\/¯()[]\t̅́ตัว"
+        texts = ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 12))) for _ in range(2000)]
+
+        chains = [[getattr(p, field.name)] for field in dataclasses.fields(p)]
+        chains += [[p.default, p.remove_starting_brackets, p.pron, p.pron2, p.type_friendly_1, p.to_paiboon],
+                   [p.remove_brackets, p.type_friendly_1, p.type_friendly_2],
+                   [p.remove_brackets, p.type_friendly_2]]
+        for groups in chains:
+            pipeline = RegexPipeline.compile(*groups)
+            for text in texts:
+                expected = text
+                for group in groups:
+                    expected = formatter.replace_multi(expected, group)
+                assert pipeline(text) == expected
+
+    def test_batch_matches_per_call(self, formatter):
+        """Test that batch calls dedupe their input and return per-call results in order."""
+        from unittest.mock import patch
+
+        texts = ["¯[kin] _øn", "\\bān ¯tūa", "¯[kin] _øn", "", "_ǿ ¯khon"]
+        with patch.object(formatter, 'format_tones', wraps=formatter.format_tones) as format_tones:
+            result = formatter.format_tones_batch(texts, paiboon=True)
+        assert format_tones.call_count == 4
+        assert result == [formatter.format_tones(text, True) for text in texts]
+
+        assert formatter.transliterate_batch(texts) == [formatter.transliterate(text) for text in texts]
+        assert formatter.format_pronunciation_search_batch(texts) == \
+            [formatter.format_pronunciation_search(text) for text in texts]
+        classifiers = ["ตัว [¯tūa]; อัน [ān]", "", "ตัว [¯tūa]; อัน [ān]"]
+        assert formatter.split_and_format_classifiers_batch(classifiers, paiboon=True) == \
+            [formatter.split_and_format_classifiers(text, True) for text in classifiers]
+
+    def test_batch_in_worker_pool(self, formatter, monkeypatch):
+        """Test that large batches give the same results when formatted by worker processes."""
+        import src.text_formatter as text_formatter
+
+        monkeypatch.setattr(text_formatter, 'PARALLEL_BATCH_MIN', 1)
+        monkeypatch.setattr(text_formatter, 'BATCH_CHUNK_SIZE', 2)
+        texts = ["¯[kin] _øn", "\\bān ¯tūa", "¯[kin] _øn", "_ǿ ¯khon", "/sūa"]
+        with formatter.create_batch_executor(2) as executor:
+            result = formatter.format_tones_batch(texts, True, executor)
+        assert result == [formatter.format_tones(text, True) for text in texts]
@@ -0,0 +1,105 @@
+"""Tests for the persistent transform store."""
+
+import pytest
+
+from src.config import RegexPatterns
+from src.text_formatter import TextFormatter
+from src.transform_store import TransformStore, patterns_fingerprint
+
+
+class TestTransformStore:
+    """Test cases for TransformStore."""
+
+    def test_results_persist_across_runs(self, temp_dir):
+        """Test that results written on close are loaded by the next open."""
+        path = temp_dir / "store.sqlite"
+        store = TransformStore.open(path, RegexPatterns())
+        assert store.get(("tones", "¯tūa", True)) is None
+        store.put(("tones", "¯tūa", True), "tǘa")
+        store.close()
+
+        store = TransformStore.open(path, RegexPatterns())
+        assert len(store) == 1
+        assert store.get(("tones", "¯tūa", True)) == "tǘa"
+        assert store.get(("tones", "¯tūa", False)) is None
+        assert store.stats() == {'loaded': 1, 'hits': 1, 'misses': 1, 'written': 0, 'hit_rate': 0.5}
+        store.close()
+
+    def test_fingerprint_separates_patterns(self, temp_dir):
+        """Test that results of other patterns are kept but not served."""
+        path = temp_dir / "store.sqlite"
+        custom = RegexPatterns()
+        custom.pron2 = {**custom.pron2, "ū": "uu"}
+        assert patterns_fingerprint(custom) != patterns_fingerprint(RegexPatterns())
+
+        store = TransformStore.open(path, RegexPatterns())
+        store.put(("tones", "¯tūa", False), "¯tūa")
+        store.close()
+
+        store = TransformStore.open(path, custom)
+        assert len(store) == 0
+        store.put(("tones", "¯tūa", False), "¯tuua")
+        store.close()
+
+        store = TransformStore.open(path, RegexPatterns())
+        assert store.get(("tones", "¯tūa", False)) == "¯tūa"
+        store.close()
+
+    def test_compaction_drops_least_recently_used(self, temp_dir):
+        """Test that rows above max_entries are removed oldest generation first."""
+        path = temp_dir / "store.sqlite"
+        store = TransformStore.open(path, RegexPatterns(), max_entries=2)
+        store.put(("tones", "a", False), "a")
+        store.put(("tones", "b", False), "b")
+        store.close()
+
+        store = TransformStore.open(path, RegexPatterns(), max_entries=2)
+        assert store.get(("tones", "b", False)) == "b"
+        store.put(("tones", "c", False), "c")
+        store.close()
+
+        store = TransformStore.open(path, RegexPatterns(), max_entries=2)
+        assert store.get(("tones", "a", False)) is None
+        assert store.get(("tones", "b", False)) == "b"
+        assert store.get(("tones", "c", False)) == "c"
+        store.close()
+
+
+class TestFormatterWithStore:
+    """Test cases for TextFormatter backed by a TransformStore."""
+
+    def test_warm_store_serves_identical_results(self, temp_dir, text_formatter):
+        """Test that a second formatter gets every result from the store."""
+        path = temp_dir / "store.sqlite"
+        texts = ["¯[kin] _øn", "\\bān ¯tūa"]
+
+        for run in range(2):
+            formatter = TextFormatter(RegexPatterns())
+            store = TransformStore.open(path, formatter.patterns)
+            formatter.attach_store(store)
+            for text in texts:
+                assert formatter.transliterate(text) == text_formatter.transliterate(text)
+                assert formatter.format_tones(text, paiboon=True) == text_formatter.format_tones(text, True)
+            assert formatter.format_classifier("ตัว [¯tūa]") == text_formatter.format_classifier("ตัว [¯tūa]")
+            stats = store.stats()
+            store.close()
+
+        assert stats['misses'] == 0
+        assert stats['hits'] == 5
+
+    def test_attach_requires_matching_patterns(self, temp_dir):
+        """Test that a store for other patterns is rejected and replaced patterns detach it."""
+        formatter = TextFormatter(RegexPatterns())
+        custom = RegexPatterns()
+        custom.pron2 = {**custom.pron2, "ū": "uu"}
+
+        store = TransformStore.open(temp_dir / "store.sqlite", custom)
+        with pytest.raises(ValueError):
+            formatter.attach_store(store)
+        store.close()
+
+        store = TransformStore.open(temp_dir / "store.sqlite", RegexPatterns())
+        formatter.attach_store(store)
+        formatter.patterns = custom
+        assert formatter.store is None
+        store.close()
@@ -0,0 +1,101 @@
+"""Differential tests of the single-pass transliteration engine against the regex chain."""
+
+import random
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic import generate_rows
+from src.config import RegexPatterns
+from src.schema import RowSchema
+from src.text_formatter import TextFormatter
+from src.transliteration import ThaiphonEngine, Transliteration
+from src.xlsx_reader import NativeXlsxReader
+
+WORKBOOKS = sorted(Path(__file__).parent.parent.glob("src/vol_mundo_*.xlsx"))
+
+
+@pytest.fixture
+def formatter():
+    """Create a TextFormatter with the default patterns."""
+    return TextFormatter(RegexPatterns())
+
+
+def regex_chain(formatter, text):
+    """The four forms as computed by the compiled regex pipelines."""
+    plain = formatter.pipelines.tones(text)
+    paiboon = formatter.pipelines.tones_paiboon(text)
+    return Transliteration(plain, paiboon, formatter.pipelines.search(plain),
+                           formatter.pipelines.search_paiboon(paiboon))
+
+
+def assert_matches_chain(formatter, texts):
+    engine = ThaiphonEngine()
+    for text in texts:
+        result = engine.transliterate(text)
+        if result is not None:
+            assert result == regex_chain(formatter, text), text
+        assert formatter.transliterate(text) == regex_chain(formatter, text), text
+
+
+class TestThaiphonEngine:
+    """Test cases for ThaiphonEngine."""
+
+    def test_known_forms(self):
+        """Test the forms of a few typical pronunciations."""
+        engine = ThaiphonEngine()
+
+        result = engine.transliterate("¯[kin] _øn")
+        assert result.plain == "¯(kin) _ɔ\u0305n"
+        # A marker before a bracket keeps its tone mark
+        assert result.paiboon == "¯(kin) -ɔ\u0300ɔn"
+        assert result.search_plain == "kin oon"
+        assert result.search_paiboon == "kin oon"
+
+        result = engine.transliterate("\\bān thūa")
+        assert result.paiboon == "bâan thuua"
+        assert result.search(paiboon=False) == "baan tuua"
+
+    def test_synthetic_rows(self, formatter):
+        """Test every pronunciation and classifier of synthetic rows."""
+        texts = []
+        for row in generate_rows(3000, seed=1, header=False):
+            texts.append(row[2].lower())
+            if row[10]:
+                texts.extend(part.strip() for part in row[10].split(";"))
+        assert_matches_chain(formatter, texts)
+
+    def test_random_notation(self, formatter):
+        """Test random strings over the notation alphabet, edge cases included."""
+        alphabet = "abkhtpmnoeiuɔøǿāēīūōñ -_\\/¯[]().…,;'xyzAB12"
+        rnd = random.Random(0)
+        texts = ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 12))) for _ in range(20000)]
+        assert_matches_chain(formatter, texts)
+
+    def test_unsupported_text_falls_back(self, formatter):
+        """Test that characters outside the notation go through the regex chain."""
+        for text in ["maa\tmaa", "ø̅n", "¯kin\n", "ม้า"]:
+            assert ThaiphonEngine().transliterate(text) is None
+            assert formatter.transliterate(text) == regex_chain(formatter, text)
+
+    def test_custom_patterns_disable_engine(self):
+        """Test that non-default patterns never use the engine."""
+        patterns = RegexPatterns()
+        patterns.type_friendly_2 = {**patterns.type_friendly_2, r"ɔ": "aw"}
+        formatter = TextFormatter(patterns)
+
+        assert formatter.engine is None
+        assert formatter.transliterate("_øn").search_plain == "awawn"
+
+    @pytest.mark.skipif(not WORKBOOKS, reason="Volubilis workbook not available")
+    def test_workbook_rows(self, formatter):
+        """Test the pronunciation of every row of the real workbook."""
+        with NativeXlsxReader(WORKBOOKS[-1]) as reader:
+            rows = reader.iter_rows()
+            header = [next(rows), next(rows)]
+            schema = RowSchema.from_header(header[1])
+            column = schema.positions['thaiphon']
+            texts = [str(row[column]).strip().lower() for row in rows
+                     if len(row) > column and row[column]]
+
+        assert_matches_chain(formatter, texts)
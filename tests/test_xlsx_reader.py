@@ -0,0 +1,134 @@
+"""Tests for the Excel reader backends."""
+
+import zipfile
+
+import pytest
+
+from src.xlsx_reader import (
+    CalamineReader, NativeXlsxReader, OpenpyxlReader, ParallelXlsxReader, READERS,
+    available_readers, create_reader
+)
+
+pytest.importorskip("openpyxl")
+
+
+class TestXlsxReaders:
+    """Test cases for the reader backends."""
+
+    def test_native_matches_openpyxl(self, sample_workbook):
+        """Test that the native reader yields the same rows as openpyxl."""
+        with OpenpyxlReader(sample_workbook) as reader:
+            expected = [tuple(row) for row in reader.iter_rows()]
+        with NativeXlsxReader(sample_workbook) as reader:
+            rows = list(reader.iter_rows())
+
+        assert rows == expected
+        assert rows[2] == (None, None, "¯maa", "มา", "come", None, None, 1, 2.5)
+        assert rows[3] == ()
+        assert rows[4] == (None, None, None, "ม้า", "horse", None, True)
+
+    @pytest.mark.skipif(not CalamineReader.is_available(), reason="python-calamine not installed")
+    def test_calamine_matches_openpyxl(self, sample_workbook):
+        """Test that calamine rows are normalised to openpyxl values."""
+        with OpenpyxlReader(sample_workbook) as reader:
+            expected = [tuple(row) for row in reader.iter_rows()]
+        with CalamineReader(sample_workbook) as reader:
+            rows = list(reader.iter_rows())
+
+        assert rows == expected
+
+    @pytest.mark.parametrize("name", list(READERS))
+    def test_backends_read_the_active_sheet(self, sample_workbook, name):
+        """Test that every backend yields the active sheet's rows, gaps included."""
+        if not READERS[name].is_available():
+            pytest.skip(f"{name} backend not installed")
+        with OpenpyxlReader(sample_workbook) as reader:
+            expected = [tuple(row) for row in reader.iter_rows()]
+        with READERS[name](sample_workbook, jobs=2) as reader:
+            rows = [tuple(row) for row in reader.iter_rows()]
+
+        assert rows == expected
+        assert rows[0] == ("Volubilis",)
+        assert rows[3] == ()
+
+    @pytest.mark.parametrize("name", list(READERS))
+    def test_backends_pad_leading_rows_and_columns(self, temp_dir, name):
+        """Test that rows and columns before the first used cell come back empty."""
+        if not READERS[name].is_available():
+            pytest.skip(f"{name} backend not installed")
+        import openpyxl
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws["B3"] = "mai"
+        ws["D5"] = "ไม่"
+        path = temp_dir / "offset.xlsx"
+        wb.save(path)
+
+        with READERS[name](path) as reader:
+            rows = [tuple(row) for row in reader.iter_rows()]
+
+        assert rows == [(), (), (None, "mai"), (), (None, None, None, "ไม่")]
+
+    def test_parallel_reader_matches_native(self, sample_workbook, monkeypatch):
+        """Test that row-range parsing yields the rows in their original order."""
+        # Force one range per row so gaps and range boundaries are exercised
+        monkeypatch.setattr(ParallelXlsxReader, "MIN_RANGE_BYTES", 1)
+        with NativeXlsxReader(sample_workbook) as reader:
+            expected = list(reader.iter_rows())
+        reader = ParallelXlsxReader(sample_workbook, jobs=2)
+        with reader:
+            rows = list(reader.iter_rows())
+            sheet_file = reader._sheet_file
+            ranges, _, _ = reader._split_sheet(sheet_file)
+
+        assert rows == expected
+        assert len(ranges) > 1
+        assert not sheet_file.exists()
+
+    def test_available_readers(self):
+        """Test that the native reader is always available."""
+        assert NativeXlsxReader.name in available_readers()
+        assert set(available_readers()) <= set(READERS)
+
+    def test_create_reader_unknown_backend(self, sample_workbook):
+        """Test that unknown backend names are rejected."""
+        with pytest.raises(ValueError, match="Unknown reader backend"):
+            create_reader("xlrd", sample_workbook)
+
+    def test_create_reader_falls_back_to_native(self, sample_workbook, monkeypatch):
+        """Test that a missing optional backend falls back to the native reader."""
+        monkeypatch.setattr(CalamineReader, "is_available", classmethod(lambda cls: False))
+
+        reader = create_reader("calamine", sample_workbook)
+
+        assert isinstance(reader, NativeXlsxReader)
+
+    def test_native_projection_skips_columns(self, sample_workbook):
+        """Test that a projection set after the header applies to the following rows."""
+        with NativeXlsxReader(sample_workbook) as reader:
+            rows = reader.iter_rows()
+            header = [next(rows), next(rows)]
+            reader.project(frozenset({3, 4}))
+            data = list(rows)
+
+        assert header[1] == ("THAIROM", "EASYTHAI", "THAIPHON", "THA", "ENG")
+        assert data[0] == (None, None, None, "มา", "come")
+        assert data[2] == (None, None, None, "ม้า", "horse")
+
+    def test_native_decodes_shared_string_escapes(self, temp_dir):
+        """Test that _xHHHH_ escapes in shared strings are decoded, _x005F_ to an underscore."""
+        items = ["line_x000D__x000A_break", "tone _x00E2_", "literal _x005F_x0041_", "_x12_ _xzzzz_"]
+        path = temp_dir / "strings.xlsx"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("xl/sharedStrings.xml", (
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                + "".join(f"<si><t>{item}</t></si>" for item in items)
+                + "</sst>"
+            ))
+
+        reader = NativeXlsxReader(path)
+        with reader, zipfile.ZipFile(path) as archive:
+            reader._archive = archive
+            strings = reader._read_shared_strings()
+
+        assert strings == ["line\r\nbreak", "tone â", "literal _x0041_", "_x12_ _xzzzz_"]